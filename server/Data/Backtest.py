@@ -0,0 +1,283 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Signal encoding shared by every strategy
+BUY = 1
+SELL = -1
+HOLD = 0
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Values this close to a decision boundary are recomputed with sequential
+# sums so comparisons agree exactly with the Node engine's loops
+TIE_TOLERANCE = 1e-9
+
+STRATEGY_DEFAULTS = {
+    'SMA': {'shortPeriod': 20, 'longPeriod': 50},
+    'RSI': {'period': 14, 'oversold': 30, 'overbought': 70}
+}
+
+def sma(close: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average via a cumulative sum, NaN until the window is full."""
+    out = np.full(len(close), np.nan)
+    if period <= 0 or period > len(close):
+        return out
+    csum = np.concatenate(([0.0], np.cumsum(close)))
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+def rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI using plain average gains/losses over the last ``period`` changes.
+
+    This is the same definition as ``RSIStrategy.calculateRSI`` in the Node
+    engine (not Wilder smoothing): NaN until ``period`` changes exist, and
+    100 when the window contains no losses.
+    """
+    n = len(close)
+    out = np.full(n, np.nan)
+    if period <= 0 or period >= n:
+        return out
+    changes = np.diff(close)
+    gains = np.concatenate(([0.0], np.cumsum(np.where(changes > 0, changes, 0.0))))
+    losses = np.concatenate(([0.0], np.cumsum(np.where(changes < 0, -changes, 0.0))))
+    loss_counts = np.concatenate(([0], np.cumsum(changes < 0)))
+
+    # Window for bar i covers changes i-period+1..i, i.e. diff slots i-period..i-1
+    avg_gain = (gains[period:] - gains[:-period]) / period
+    avg_loss = (losses[period:] - losses[:-period]) / period
+    no_losses = (loss_counts[period:] - loss_counts[:-period]) == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - (100 / (1 + avg_gain / avg_loss))
+    out[period:] = np.where(no_losses, 100.0, values)
+    return out
+
+def _sequential_window_sums(values: np.ndarray, period: int, idx: np.ndarray) -> np.ndarray:
+    """Left-to-right sums of ``values[i-period+1..i]`` for each ``i`` in ``idx``.
+
+    Matches the rounding of a plain accumulation loop; only used on the few
+    bars where the cumulative-sum shortcut is too close to call.
+    """
+    acc = np.zeros(len(idx))
+    for k in range(period):
+        acc += values[idx - period + 1 + k]
+    return acc
+
+def _refine_sma_ties(close: np.ndarray, short_sma: np.ndarray, long_sma: np.ndarray, short_period: int, long_period: int) -> None:
+    """Recompute both averages exactly where they are nearly equal (in place)."""
+    diff = np.abs(short_sma - long_sma)
+    ties = np.flatnonzero(diff <= TIE_TOLERANCE * np.maximum(np.abs(long_sma), 1.0))
+    ties = ties[ties >= max(short_period, long_period) - 1]
+    if len(ties):
+        short_sma[ties] = _sequential_window_sums(close, short_period, ties) / short_period
+        long_sma[ties] = _sequential_window_sums(close, long_period, ties) / long_period
+
+def sma_crossover_signals(close: np.ndarray, short_period: int, long_period: int, short_sma: Optional[np.ndarray] = None, long_sma: Optional[np.ndarray] = None) -> np.ndarray:
+    """Golden/death cross signals matching ``SMAStrategy.generateSignal``.
+
+    Precomputed averages can be passed in to reuse them across calls.
+    """
+    n = len(close)
+    signals = np.zeros(n, dtype=np.int8)
+    if n <= long_period:
+        return signals
+    short_sma = (sma(close, short_period) if short_sma is None else short_sma).copy()
+    long_sma = (sma(close, long_period) if long_sma is None else long_sma).copy()
+    _refine_sma_ties(close, short_sma, long_sma, short_period, long_period)
+
+    cur_s, cur_l = short_sma[long_period:], long_sma[long_period:]
+    prev_s, prev_l = short_sma[long_period - 1:-1], long_sma[long_period - 1:-1]
+    golden = (prev_s <= prev_l) & (cur_s > cur_l)
+    death = (prev_s >= prev_l) & (cur_s < cur_l)
+    signals[long_period:] = np.where(golden, BUY, np.where(death, SELL, HOLD))
+    return signals
+
+def _sequential_rsi(close: np.ndarray, period: int, idx: np.ndarray) -> np.ndarray:
+    """RSI at ``idx`` accumulated change by change, as the Node loop does."""
+    gains = np.zeros(len(idx))
+    losses = np.zeros(len(idx))
+    for k in range(period):
+        change = close[idx - period + 1 + k] - close[idx - period + k]
+        gains += np.where(change > 0, change, 0.0)
+        losses += np.where(change > 0, 0.0, np.abs(change))
+    avg_gain, avg_loss = gains / period, losses / period
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - (100 / (1 + avg_gain / avg_loss))
+    return np.where(avg_loss == 0, 100.0, values)
+
+def rsi_signals(close: np.ndarray, period: int, oversold: float, overbought: float, rsi_values: Optional[np.ndarray] = None) -> np.ndarray:
+    """Oversold/overbought signals matching ``RSIStrategy.generateSignal``."""
+    values = (rsi(close, period) if rsi_values is None else rsi_values).copy()
+    near = np.flatnonzero(
+        (np.abs(values - oversold) <= TIE_TOLERANCE * 100) | (np.abs(values - overbought) <= TIE_TOLERANCE * 100)
+    )
+    if len(near):
+        values[near] = _sequential_rsi(close, period, near)
+    signals = np.zeros(len(close), dtype=np.int8)
+    valid = ~np.isnan(values)
+    signals[valid & (values < oversold)] = BUY
+    signals[valid & (values > overbought) & ~(values < oversold)] = SELL
+    return signals
+
+def build_signals(close: np.ndarray, strategy_type: str, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Generate signals for a strategy spec as used by the Node backtest API.
+
+    ARGS:
+        close (ndarray): Closing prices in date order.
+        strategy_type (str): 'SMA' or 'RSI'.
+        params (dict): Strategy parameters using the Node field names.
+
+    RETURNS:
+        ndarray: int8 array of BUY/SELL/HOLD signals.
+
+    RAISES:
+        ValueError: If the strategy type or parameters are invalid.
+    """
+    strategy_type = (strategy_type or '').upper()
+    if strategy_type not in STRATEGY_DEFAULTS:
+        raise ValueError('Invalid strategy type')
+    resolved = dict(STRATEGY_DEFAULTS[strategy_type], **(params or {}))
+
+    try:
+        if strategy_type == 'SMA':
+            short_period, long_period = int(resolved['shortPeriod']), int(resolved['longPeriod'])
+            if short_period <= 0 or long_period <= 0:
+                raise ValueError('SMA periods must be positive')
+            return sma_crossover_signals(close, short_period, long_period)
+
+        period = int(resolved['period'])
+        oversold, overbought = float(resolved['oversold']), float(resolved['overbought'])
+        if period <= 0:
+            raise ValueError('RSI period must be positive')
+        return rsi_signals(close, period, oversold, overbought)
+    except (TypeError, KeyError) as e:
+        raise ValueError(f'Invalid strategy parameters: {e}')
+
+def run_backtest(
+    close: np.ndarray,
+    signals: np.ndarray,
+    initial_capital: float = 10000,
+    dates: Optional[List[str]] = None,
+    detail: bool = True
+) -> Dict[str, Any]:
+    """Simulate trading signals with the Node ``BacktestingEngine`` semantics.
+
+    Orders fill at the signal bar's close with a whole number of shares
+    (all available cash), a BUY only opens a position when flat, a SELL
+    only closes an open one, and any open position is closed on the last
+    bar. Only the trade boundaries are walked in Python; cash, holdings and
+    the equity curve are built with cumulative sums over the whole series.
+
+    ARGS:
+        close (ndarray): Closing prices in date order.
+        signals (ndarray): BUY/SELL/HOLD signal per bar.
+        initial_capital (float): Starting cash.
+        dates (list): Optional 'YYYY-MM-DD' date per bar for trade records.
+        detail (bool): Include the trade list and equity curve in the result.
+
+    RETURNS:
+        dict: Metrics using the same field names as the Node engine.
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    buy_idx = np.flatnonzero(signals == BUY)
+    sell_idx = np.flatnonzero(signals == SELL)
+
+    cash_delta = np.zeros(n)
+    qty_delta = np.zeros(n)
+    if n:
+        cash_delta[0] = initial_capital
+    cash = float(initial_capital)
+    entries, exits, quantities = [], [], []
+
+    cursor = 0
+    while True:
+        candidates = buy_idx[np.searchsorted(buy_idx, cursor):]
+        if len(candidates) == 0:
+            break
+        # Cash is unchanged while flat, so the first affordable BUY is the entry
+        affordable = np.flatnonzero(np.floor(cash / close[candidates]) > 0)
+        if len(affordable) == 0:
+            break
+        entry = int(candidates[affordable[0]])
+        quantity = int(np.floor(cash / close[entry]))
+        later_sells = sell_idx[np.searchsorted(sell_idx, entry, side='right'):]
+        exit_ = int(later_sells[0]) if len(later_sells) else n - 1
+
+        cash -= quantity * close[entry]
+        cash += quantity * close[exit_]
+        cash_delta[entry] -= quantity * close[entry]
+        qty_delta[entry] += quantity
+        if len(later_sells):
+            # Sold on the exit bar itself; an end-of-data close-out happens after equity is marked
+            cash_delta[exit_] += quantity * close[exit_]
+            qty_delta[exit_] -= quantity
+        entries.append(entry)
+        exits.append(exit_)
+        quantities.append(quantity)
+        if not len(later_sells):
+            break
+        cursor = exit_ + 1
+
+    equity = np.concatenate(([float(initial_capital)], np.cumsum(cash_delta) + np.cumsum(qty_delta) * close))
+    final_capital = cash
+
+    entry_prices = close[entries] if entries else np.array([])
+    exit_prices = close[exits] if exits else np.array([])
+    qty = np.array(quantities, dtype=float)
+    profits = qty * exit_prices - qty * entry_prices
+
+    results = {
+        'initialCapital': initial_capital,
+        'finalCapital': final_capital,
+        'totalReturn': (final_capital - initial_capital) / initial_capital * 100,
+        **equity_metrics(equity),
+        'winRate': float((profits > 0).sum() / len(profits) * 100) if len(profits) else 0,
+        'totalTrades': len(entries)
+    }
+    if detail:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_pcts = profits / (qty * entry_prices) * 100
+        results['trades'] = [
+            {
+                'type': 'SELL',
+                'entryDate': dates[entry] if dates is not None else entry,
+                'exitDate': dates[exit_] if dates is not None else exit_,
+                'entryPrice': float(close[entry]),
+                'exitPrice': float(close[exit_]),
+                'quantity': quantity,
+                'profit': float(profit),
+                'returnPct': float(return_pct)
+            }
+            for entry, exit_, quantity, profit, return_pct in zip(entries, exits, quantities, profits, return_pcts)
+        ]
+        results['equity'] = equity.tolist()
+    return results
+
+def equity_metrics(equity: np.ndarray) -> Dict[str, float]:
+    """Sharpe ratio and maximum drawdown (percent) of an equity curve."""
+    returns = np.diff(equity) / equity[:-1]
+    if len(returns):
+        std = returns.std()
+        sharpe = float(returns.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR)) if std != 0 else 0
+    else:
+        sharpe = 0
+    peaks = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max((peaks - equity) / peaks * 100)) if len(equity) else 0
+    return {'sharpeRatio': sharpe, 'maxDrawdown': max(max_drawdown, 0)}
+
+def backtest_frame(frame: pd.DataFrame, strategy_type: str, params: Optional[Dict[str, Any]] = None, initial_capital: float = 10000) -> Dict[str, Any]:
+    """Run a strategy over a prepared price frame from ``YahooData``.
+
+    RAISES:
+        ValueError: If the strategy spec is invalid or the frame has no closes.
+    """
+    if frame is None or frame.empty or 'Close' not in frame.columns:
+        raise ValueError('No price data to backtest')
+    close = frame['Close'].to_numpy(dtype=float)
+    dates = frame.index.strftime('%Y-%m-%d').tolist()
+    signals = build_signals(close, strategy_type, params)
+    return run_backtest(close, signals, initial_capital, dates)
@@ -0,0 +1,331 @@
+import numpy as np
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+import threading
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterator
+from Backtest import build_signals, run_backtest, STRATEGY_DEFAULTS
+from YahooData import get_price_series, prefetch_tickers
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_TICKERS = 1000
+BATCH_FETCH_WORKERS = int(os.environ.get('FINRUS_BATCH_FETCH_WORKERS', 8))
+BATCH_BACKTEST_WORKERS = int(os.environ.get('FINRUS_BATCH_WORKERS', os.cpu_count() or 1))
+# Tickers per multi-symbol prefetch call
+PREFETCH_CHUNK = 50
+# Prefetch calls kept in flight ahead of the per-ticker fetches
+PREFETCH_AHEAD = 2
+# Finished jobs kept around for polling before the oldest are dropped
+MAX_RETAINED_JOBS = 50
+
+def _backtest_series(symbol: str, close: np.ndarray, dates: List[str], strategy_type: str, params: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    """Backtest one ticker; runs inside a pool worker."""
+    signals = build_signals(close, strategy_type, params)
+    results = run_backtest(close, signals, initial_capital, dates, detail=False)
+    results.update({
+        'symbol': symbol,
+        'success': True,
+        'data_points': len(close),
+        'first_date': dates[0],
+        'last_date': dates[-1]
+    })
+    return results
+
+class BatchJob:
+    """State, progress and streamed results of one universe backtest."""
+
+    def __init__(self, tickers: List[str], strategy_type: str, params: Dict[str, Any], start_date: str, end_date: str, initial_capital: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.tickers = tickers
+        self.strategy_type = strategy_type
+        self.params = params
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_capital = initial_capital
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.results: List[Dict[str, Any]] = []
+        self.created_at = datetime.now()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def _add_result(self, result: Dict[str, Any]) -> None:
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def _set_status(self, status: str, error: Optional[str] = None) -> None:
+        with self._changed:
+            self.status = status
+            self.error = error
+            if status == 'running':
+                self.started = time.monotonic()
+            elif status in ('completed', 'failed'):
+                self.finished = time.monotonic()
+            self._changed.notify_all()
+
+    def progress(self) -> Dict[str, Any]:
+        """Return counts, elapsed time and throughput."""
+        with self._changed:
+            completed = len(self.results)
+            failed = sum(1 for r in self.results if not r['success'])
+            end = self.finished or time.monotonic()
+            elapsed = (end - self.started) if self.started else 0.0
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'strategyType': self.strategy_type,
+                'strategyParams': self.params,
+                'start_date': self.start_date,
+                'end_date': self.end_date,
+                'total': len(self.tickers),
+                'completed': completed,
+                'succeeded': completed - failed,
+                'failed': failed,
+                'pending': len(self.tickers) - completed,
+                'percent_complete': round(completed / len(self.tickers) * 100, 1) if self.tickers else 100.0,
+                'elapsed_seconds': round(elapsed, 3),
+                'tickers_per_second': round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+                'created_at': self.created_at.isoformat()
+            }
+
+    def iter_results(self, start: int = 0, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield results from index ``start`` as they finish, until the job is done."""
+        index = start
+        while True:
+            with self._changed:
+                while index >= len(self.results) and not self.done:
+                    if not self._changed.wait(timeout=timeout):
+                        return
+                batch = self.results[index:]
+                done = self.done
+            for result in batch:
+                yield result
+            index += len(batch)
+            if done and index >= len(self.results):
+                return
+
+class BatchBacktestManager:
+    """Runs batch jobs in the background and keeps recent jobs for polling.
+
+    Each job fetches prices with a bounded thread pool (seeding the cache
+    with multi-symbol prefetches a few chunks ahead) and hands every series
+    to a process pool for backtesting as soon as its data arrives.
+    """
+
+    def __init__(self, fetch_workers: int = BATCH_FETCH_WORKERS, backtest_workers: int = BATCH_BACKTEST_WORKERS, retries: int = 3, delay: int = 1):
+        self.fetch_workers = max(1, fetch_workers)
+        self.backtest_workers = backtest_workers
+        self.retries = retries
+        self.delay = delay
+        self._jobs: 'OrderedDict[str, BatchJob]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _backtest_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Lazily create the shared backtest process pool (None runs inline)."""
+        if self.backtest_workers <= 1:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # Spawn, not fork: this process runs request, warmer and fetch threads
+                # whose held locks a forked child would inherit
+                self._pool = ProcessPoolExecutor(max_workers=self.backtest_workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def submit(self, tickers: List[str], strategy_type: str, params: Optional[Dict[str, Any]], start_date: str, end_date: str, initial_capital: float = 10000, background: bool = True) -> BatchJob:
+        """Validate and start a batch job.
+
+        RAISES:
+            ValueError: If the ticker list, strategy spec or capital is invalid.
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        if not tickers:
+            raise ValueError('No tickers provided')
+        if len(tickers) > MAX_BATCH_TICKERS:
+            raise ValueError(f'Maximum {MAX_BATCH_TICKERS} tickers allowed per batch')
+        if not initial_capital > 0:
+            raise ValueError('initialCapital must be positive')
+        strategy_type = (strategy_type or '').upper()
+        # Validate the spec up front rather than failing every ticker
+        build_signals(np.ones(2), strategy_type, params)
+
+        job = BatchJob(tickers, strategy_type, params or {}, start_date, end_date, initial_capital)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        if background:
+            threading.Thread(target=self._run, args=(job,), name=f'batch-{job.id}', daemon=True).start()
+        else:
+            self._run(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.progress() for job in jobs]
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the retention limit. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - MAX_RETAINED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: BatchJob) -> None:
+        """Fetch, backtest and record every ticker of a job.
+
+        Prefetches, per-ticker fetches and backtests all run as futures
+        waited on in one loop, so each result is published the moment its
+        backtest finishes. Prefetch chunks are issued a few ahead of the
+        fetches instead of all up front.
+        """
+        job._set_status('running')
+        logger.info(f"🚀 Batch job {job.id}: {len(job.tickers)} tickers, {job.strategy_type}")
+        pool = self._backtest_pool()
+        chunks = [job.tickers[i:i + PREFETCH_CHUNK] for i in range(0, len(job.tickers), PREFETCH_CHUNK)]
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers:
+                # future -> (kind, chunk index or symbol)
+                pending: Dict[Future, tuple] = {}
+                next_chunk = 0
+
+                def prefetch_next() -> None:
+                    nonlocal next_chunk
+                    if next_chunk < len(chunks):
+                        future = fetchers.submit(prefetch_tickers, chunks[next_chunk], job.start_date, job.end_date)
+                        pending[future] = ('prefetch', next_chunk)
+                        next_chunk += 1
+
+                for _ in range(PREFETCH_AHEAD):
+                    prefetch_next()
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, item = pending.pop(future)
+                        if kind == 'prefetch':
+                            # prefetch_tickers is best effort; the fetches retry anything it missed
+                            for symbol in chunks[item]:
+                                fetch = fetchers.submit(get_price_series, symbol, job.start_date, job.end_date, self.retries, self.delay)
+                                pending[fetch] = ('fetch', symbol)
+                            prefetch_next()
+                        elif kind == 'fetch':
+                            try:
+                                series = future.result()
+                                if series is None or 'Close' not in series.columns:
+                                    raise ValueError('No data found')
+                                args = (
+                                    item,
+                                    series.columns['Close'],
+                                    series.date_strings(),
+                                    job.strategy_type, job.params, job.initial_capital
+                                )
+                            except Exception as e:
+                                job._add_result({'symbol': item, 'success': False, 'error': str(e)})
+                                continue
+                            if pool is None:
+                                job._add_result(self._safe_backtest(*args))
+                            else:
+                                pending[pool.submit(_backtest_series, *args)] = ('backtest', item)
+                        else:
+                            try:
+                                job._add_result(future.result())
+                            except Exception as e:
+                                job._add_result({'symbol': item, 'success': False, 'error': str(e)})
+
+            job._set_status('completed')
+            progress = job.progress()
+            logger.info(f"✅ Batch job {job.id} finished: {progress['succeeded']}/{progress['total']} ok, {progress['tickers_per_second']} tickers/s")
+        except Exception as e:
+            logger.exception(f"❌ Batch job {job.id} failed: {str(e)}")
+            job._set_status('failed', str(e))
+
+    @staticmethod
+    def _safe_backtest(symbol: str, *args) -> Dict[str, Any]:
+        """Inline backtest that turns errors into a per-ticker failure result."""
+        try:
+            return _backtest_series(symbol, *args)
+        except Exception as e:
+            return {'symbol': symbol, 'success': False, 'error': str(e)}
+
+# Shared manager used by the Flask routes
+batch_manager = BatchBacktestManager()
+
+def _read_tickers(args: argparse.Namespace) -> List[str]:
+    """Collect tickers from --tickers and --tickers-file."""
+    tickers = [t for t in (args.tickers or '').split(',') if t.strip()]
+    if args.tickers_file:
+        with open(args.tickers_file, 'r') as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return tickers
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: run one batch job and stream NDJSON results to stdout."""
+    parser = argparse.ArgumentParser(description='Backtest one strategy across a universe of tickers.')
+    parser.add_argument('--tickers', help='Comma-separated ticker symbols')
+    parser.add_argument('--tickers-file', help='File with one ticker per line')
+    parser.add_argument('--strategy', required=True, choices=sorted(STRATEGY_DEFAULTS), type=str.upper)
+    parser.add_argument('--params', default='{}', help='Strategy parameters as JSON')
+    parser.add_argument('--start', required=True, help='Start date YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='End date YYYY-MM-DD')
+    parser.add_argument('--capital', type=float, default=10000)
+    parser.add_argument('--fixtures', help='Directory of <TICKER>.csv files to use instead of yfinance')
+    parser.add_argument('--store', help='Price store directory to read from and fill')
+    parser.add_argument('--offline', action='store_true', help='Only use data already in the price store or fixtures')
+    parser.add_argument('--workers', type=int, default=BATCH_BACKTEST_WORKERS, help='Backtest processes')
+    parser.add_argument('--fetch-workers', type=int, default=BATCH_FETCH_WORKERS, help='Concurrent data fetches')
+    parser.add_argument('--output', help='Write NDJSON results here instead of stdout')
+    args = parser.parse_args(argv)
+
+    import YahooData
+    from DataProviders import CSVFixtureProvider, StaticProvider
+    from PriceStore import PriceStore
+
+    if args.store:
+        YahooData.set_price_store(PriceStore(args.store))
+    if args.fixtures:
+        YahooData.set_provider(CSVFixtureProvider(args.fixtures))
+    elif args.offline:
+        YahooData.set_provider(StaticProvider())
+
+    # Offline runs have nothing to retry against
+    retries, delay = (1, 0) if args.offline else (3, 1)
+    manager = BatchBacktestManager(fetch_workers=args.fetch_workers, backtest_workers=args.workers, retries=retries, delay=delay)
+    try:
+        job = manager.submit(_read_tickers(args), args.strategy, json.loads(args.params), args.start, args.end, args.capital)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in job.iter_results():
+            out.write(json.dumps(result, default=float) + '\n')
+            out.flush()
+    finally:
+        if args.output:
+            out.close()
+    progress = job.progress()
+    print(json.dumps(progress), file=sys.stderr)
+    return 0 if progress['status'] == 'completed' else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import tracemalloc
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable
+
+import numpy as np
+
+# Benchmarks run against the in-process tiers only, with upstream pacing off;
+# set these before the service modules read their configuration
+os.environ.setdefault('FINRUS_USE_SHARED_CACHE', 'false')
+os.environ.setdefault('FINRUS_USE_PRICE_STORE', 'false')
+os.environ.setdefault('FINRUS_CACHE_WARMER', 'false')
+os.environ.setdefault('FINRUS_UPSTREAM_RATE', '1000000')
+os.environ.setdefault('FINRUS_UPSTREAM_BURST', '1000000')
+
+logger = logging.getLogger(__name__)
+
+# Calendar-day ranges ending at BENCH_END_DATE for the range-length scenarios
+RANGE_LENGTHS = [('1m', 30), ('1y', 365), ('5y', 5 * 365), ('20y', 20 * 365)]
+
+BENCH_END_DATE = '2025-01-01'
+
+def _range_start(days: int, end_date: str = BENCH_END_DATE) -> str:
+    return str(np.datetime64(end_date) - np.timedelta64(days, 'D'))
+
+def summarize(samples: List[float], wall_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds plus throughput for a list of durations (seconds)."""
+    values = np.asarray(samples, dtype=float) * 1000
+    wall = wall_seconds if wall_seconds is not None else float(values.sum()) / 1000
+    return {
+        'count': len(values),
+        'throughput_per_second': round(len(values) / wall, 2) if wall > 0 else None,
+        'mean_ms': round(float(values.mean()), 4),
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p90_ms': round(float(np.percentile(values, 90)), 4),
+        'p99_ms': round(float(np.percentile(values, 99)), 4),
+        'max_ms': round(float(values.max()), 4)
+    }
+
+def _timed(fn: Callable[[], Any], iterations: int, before: Optional[Callable[[], None]] = None) -> List[float]:
+    """Run ``fn`` repeatedly, timing each call; ``before`` runs untimed first."""
+    samples = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+class BenchmarkRunner:
+    """Runs the data-service scenarios against a synthetic upstream.
+
+    Requests go through the Flask test client, so routing, validation,
+    caching and serialization are all measured, but no sockets or live
+    yfinance calls are involved. Results are collected as a list of flat
+    records (scenario, case, latency summary, extra fields).
+    """
+
+    def __init__(self, iterations: int = 200, tickers: int = 20, concurrency: int = 8, seed: int = 0, upstream_latency: float = 0.0):
+        import YahooData
+        import WireFormats
+        import HistoricalDataAPI
+        from DataProviders import SyntheticProvider
+        from RateLimiter import RateLimiter, MemoryRateLimitBackend
+
+        self.iterations = iterations
+        self.tickers = [f'SYN{i}' for i in range(tickers)]
+        self.concurrency = concurrency
+        self.seed = seed
+        self.yahoo = YahooData
+        self.wire = WireFormats
+        self.api = HistoricalDataAPI
+        self.provider = SyntheticProvider(seed=seed, latency=upstream_latency)
+        YahooData.set_provider(self.provider)
+        YahooData.set_price_store(None)
+        YahooData.set_shared_cache(None)
+        # The benchmark is the only client, so lift the per-IP limit
+        HistoricalDataAPI.rate_limiter = RateLimiter(MemoryRateLimitBackend(), 10 ** 9, 60)
+        self.client = HistoricalDataAPI.app.test_client()
+        self.results: List[Dict[str, Any]] = []
+        # Generate the synthetic histories up front so cold runs time the service, not the fake
+        for ticker in self.tickers:
+            self.provider.history(ticker, _range_start(365), BENCH_END_DATE)
+
+    def _record(self, scenario: str, case: str, samples: List[float], wall_seconds: Optional[float] = None, **extra) -> None:
+        result = {'scenario': scenario, 'case': case}
+        result.update(summarize(samples, wall_seconds))
+        result.update(extra)
+        self.results.append(result)
+        logger.info(f"⏱️ {scenario}/{case}: p50={result['p50_ms']}ms p99={result['p99_ms']}ms ({result['throughput_per_second']}/s)")
+
+    def clear_caches(self) -> None:
+        self.yahoo.clear_cache()
+        self.wire.clear_encoded_cache()
+
+    def _get(self, url: str) -> None:
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        response.get_data()
+
+    def bench_single(self) -> None:
+        """Single-ticker endpoint with a cold cache on every call vs. a warm cache."""
+        url = f'/api/stock/{self.tickers[0]}?start_date={_range_start(365)}&end_date={BENCH_END_DATE}'
+        self._record('single_ticker', 'cold', _timed(lambda: self._get(url), self.iterations, self.clear_caches))
+        self._get(url)
+        self._record('single_ticker', 'warm', _timed(lambda: self._get(url), self.iterations))
+        self._record('single_ticker', 'warm_binary', _timed(lambda: self._get(url + '&format=binary'), self.iterations))
+
+    def bench_multi(self) -> None:
+        """Multi-ticker endpoint over every benchmark ticker, cold vs. warm."""
+        url = f"/api/stock/multiple?tickers={','.join(self.tickers)}&start_date={_range_start(365)}&end_date={BENCH_END_DATE}"
+        iterations = max(5, self.iterations // 10)
+        self._record('multi_ticker', 'cold', _timed(lambda: self._get(url), iterations, self.clear_caches), tickers=len(self.tickers))
+        self._get(url)
+        self._record('multi_ticker', 'warm', _timed(lambda: self._get(url), iterations), tickers=len(self.tickers))
+
+    def bench_serialization(self) -> None:
+        """Encoding cost per wire format and range length, on a warm series cache."""
+        formats = ['json', 'columnar', 'binary'] + (['arrow'] if self.wire.arrow_available() else [])
+        ticker = self.tickers[0]
+        for label, days in RANGE_LENGTHS:
+            series, metadata = self.yahoo.fetch_historical_series(ticker, _range_start(days), BENCH_END_DATE)
+            for fmt in formats:
+                build = lambda: self.wire.build_body(fmt, ticker, series, metadata)
+                body, _ = build()
+                extra = {'range': label, 'format': fmt, 'bars': len(series), 'body_bytes': len(body)}
+                self._record('serialization', f'{fmt}_{label}_cold', _timed(build, self.iterations, self.wire.clear_encoded_cache), **extra)
+                self._record('serialization', f'{fmt}_{label}_warm', _timed(build, self.iterations), **extra)
+            records = lambda: json.dumps(self.yahoo.fetch_historical_data(ticker, _range_start(days), BENCH_END_DATE))
+            self._record('serialization', f'records_dumps_{label}', _timed(records, self.iterations), range=label, format='records_dumps', bars=len(series))
+
+    def bench_memory(self) -> None:
+        """Traced and accounted bytes per cached entry and per bar."""
+        for label, days in RANGE_LENGTHS:
+            self.clear_caches()
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            bars = 0
+            for ticker in self.tickers:
+                series = self.yahoo.get_price_series(ticker, _range_start(days), BENCH_END_DATE)
+                bars += len(series) if series is not None else 0
+            del series
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+            accounted = self.yahoo.get_cache_info()['current_bytes']
+            entries = len(self.tickers)
+            self.results.append({
+                'scenario': 'memory',
+                'case': f'entry_{label}',
+                'range': label,
+                'entries': entries,
+                'bars': bars,
+                'traced_bytes_per_entry': round(traced / entries, 1),
+                'traced_bytes_per_bar': round(traced / bars, 2) if bars else None,
+                'accounted_bytes_per_entry': round(accounted / entries, 1),
+                'accounted_bytes_per_bar': round(accounted / bars, 2) if bars else None
+            })
+            logger.info(f"🧠 memory/{label}: {traced / entries:.0f} traced bytes per entry")
+
+    def bench_concurrent(self) -> None:
+        """Mixed single, recent and multi-ticker requests from concurrent clients."""
+        rng = random.Random(self.seed)
+        urls = []
+        for _ in range(self.iterations * 2):
+            roll = rng.random()
+            ticker = rng.choice(self.tickers)
+            days = rng.choice(RANGE_LENGTHS)[1]
+            if roll < 0.7:
+                urls.append(f'/api/stock/{ticker}?start_date={_range_start(days)}&end_date={BENCH_END_DATE}')
+            elif roll < 0.9:
+                urls.append(f'/api/stock/{ticker}?start_date={_range_start(days)}&end_date={BENCH_END_DATE}&format=columnar')
+            else:
+                urls.append(f"/api/stock/multiple?tickers={','.join(rng.sample(self.tickers, 5))}&start_date={_range_start(365)}&end_date={BENCH_END_DATE}")
+
+        def worker(chunk: List[str]) -> List[float]:
+            client = self.api.app.test_client()
+            samples = []
+            for url in chunk:
+                started = time.perf_counter()
+                response = client.get(url)
+                response.get_data()
+                samples.append(time.perf_counter() - started)
+            return samples
+
+        for case in ('cold_start', 'warm'):
+            if case == 'cold_start':
+                self.clear_caches()
+            chunks = [urls[i::self.concurrency] for i in range(self.concurrency)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                samples = [s for chunk in executor.map(worker, chunks) for s in chunk]
+            self._record('concurrent', case, samples, time.perf_counter() - started, concurrency=self.concurrency)
+
+    def run(self, scenarios: List[str]) -> List[Dict[str, Any]]:
+        for name in scenarios:
+            getattr(self, f'bench_{name}')()
+        return self.results
+
+SCENARIOS = ['single', 'multi', 'serialization', 'memory', 'concurrent']
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(current: List[Dict[str, Any]], baseline_path: str) -> List[str]:
+    """Lines describing p50 and throughput changes against an earlier results file."""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['scenario'], r['case']): r for r in json.load(f)['results']}
+    lines = []
+    for result in current:
+        before = baseline.get((result['scenario'], result['case']))
+        if before is None or 'p50_ms' not in result or not before.get('p50_ms'):
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        lines.append(f"{result['scenario']}/{result['case']}: p50 {before['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms ({change:+.1f}%)")
+    return lines
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: run the selected scenarios and write JSON results."""
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the historical data service.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--iterations', type=int, default=200, help='Timed calls per case')
+    parser.add_argument('--tickers', type=int, default=20, help='Synthetic tickers to use')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads for the concurrent scenario')
+    parser.add_argument('--upstream-latency', type=float, default=0.0, help='Seconds slept per synthetic upstream call')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results file to compare p50 latencies against')
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Per-request service logs would dominate the timings
+    for name in ('YahooData', 'HistoricalDataAPI', 'DataCache', 'WireFormats', 'werkzeug'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    runner = BenchmarkRunner(args.iterations, args.tickers, args.concurrency, args.seed, args.upstream_latency)
+    results = runner.run(scenarios)
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'arrow_available': runner.wire.arrow_available(),
+            'params': vars(args)
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"📊 Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        for line in compare(results, args.compare):
+            print(line)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,359 @@
+import io
+import os
+import abc
+import re
+import sys
+import csv
+import time
+import sqlite3
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from YahooData import get_unrounded_series_many, MAX_FETCH_WORKERS
+
+try:
+    import psycopg2
+except ImportError:  # Postgres loading is optional; the SQLite target needs nothing extra
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKFILL_START = '2000-01-01'
+DEFAULT_BATCH_ROWS = 5000
+# Symbols fetched together; bounds how many series are held before they are written
+DEFAULT_CHUNK_SYMBOLS = 50
+MAX_SYMBOL_LENGTH = 10  # historical_prices.symbol is VARCHAR(10)
+
+PRICE_COLUMNS = ('symbol', 'date', 'open', 'high', 'low', 'close', 'volume')
+Row = Tuple[str, str, float, float, float, float, Optional[int]]
+
+# Mirrors config/schema.sql so a fresh database or SQLite file can be loaded directly
+POSTGRES_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS historical_prices ('
+    'id SERIAL PRIMARY KEY, symbol VARCHAR(10) NOT NULL, date DATE NOT NULL, '
+    'open DECIMAL(10, 4) NOT NULL, high DECIMAL(10, 4) NOT NULL, low DECIMAL(10, 4) NOT NULL, '
+    'close DECIMAL(10, 4) NOT NULL, volume BIGINT, UNIQUE(symbol, date))',
+    'CREATE TABLE IF NOT EXISTS historical_prices_sync ('
+    'symbol VARCHAR(10) PRIMARY KEY, last_date DATE NOT NULL, '
+    'rows_loaded BIGINT NOT NULL DEFAULT 0, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'
+)
+SQLITE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS historical_prices ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, date TEXT NOT NULL, '
+    'open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL, '
+    'volume INTEGER, UNIQUE(symbol, date))',
+    'CREATE TABLE IF NOT EXISTS historical_prices_sync ('
+    'symbol TEXT PRIMARY KEY, last_date TEXT NOT NULL, '
+    'rows_loaded INTEGER NOT NULL DEFAULT 0, updated_at TEXT DEFAULT CURRENT_TIMESTAMP)'
+)
+
+# Unchanged rows are skipped so re-loading an overlap does not churn the table
+UPSERT_SET = (
+    'ON CONFLICT (symbol, date) DO UPDATE SET '
+    'open = excluded.open, high = excluded.high, low = excluded.low, '
+    'close = excluded.close, volume = excluded.volume '
+    'WHERE (historical_prices.open, historical_prices.high, historical_prices.low, '
+    'historical_prices.close, historical_prices.volume) {distinct} '
+    '(excluded.open, excluded.high, excluded.low, excluded.close, excluded.volume)'
+)
+SYNC_UPSERT = (
+    'ON CONFLICT (symbol) DO UPDATE SET '
+    'last_date = excluded.last_date, '
+    'rows_loaded = historical_prices_sync.rows_loaded + excluded.rows_loaded, '
+    'updated_at = CURRENT_TIMESTAMP'
+)
+
+class PriceTarget(abc.ABC):
+    """Database the loader writes to: schema, high-water marks and batched upserts.
+
+    Every write happens in the connection's open transaction; ``commit``
+    makes a chunk's rows and its high-water marks visible together, so an
+    interrupted run resumes from the last committed chunk.
+    """
+
+    placeholder = '?'
+    schema: Tuple[str, ...] = ()
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def ensure_schema(self) -> None:
+        cur = self.conn.cursor()
+        for statement in self.schema:
+            cur.execute(statement)
+        self.conn.commit()
+
+    def high_water_marks(self, symbols: List[str]) -> Dict[str, str]:
+        """Last loaded date per symbol, falling back to MAX(date) for rows loaded elsewhere."""
+        marks = {}
+        cur = self.conn.cursor()
+        for start in range(0, len(symbols), 500):
+            batch = symbols[start:start + 500]
+            params = ', '.join([self.placeholder] * len(batch))
+            cur.execute(f'SELECT symbol, last_date FROM historical_prices_sync WHERE symbol IN ({params})', batch)
+            marks.update({symbol: str(last) for symbol, last in cur.fetchall()})
+            missing = [symbol for symbol in batch if symbol not in marks]
+            if missing:
+                params = ', '.join([self.placeholder] * len(missing))
+                cur.execute(f'SELECT symbol, MAX(date) FROM historical_prices WHERE symbol IN ({params}) GROUP BY symbol', missing)
+                marks.update({symbol: str(last) for symbol, last in cur.fetchall() if last is not None})
+        return marks
+
+    @abc.abstractmethod
+    def upsert_prices(self, rows: List[Row]) -> None:
+        """Insert or update a batch of rows, skipping rows that are unchanged."""
+
+    def set_high_water_marks(self, marks: List[Tuple[str, str, int]]) -> None:
+        """Record (symbol, last_date, rows) for symbols loaded in this transaction."""
+        p = self.placeholder
+        self.conn.cursor().executemany(
+            f'INSERT INTO historical_prices_sync (symbol, last_date, rows_loaded) VALUES ({p}, {p}, {p}) {SYNC_UPSERT}',
+            marks
+        )
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.close()
+
+class SqliteTarget(PriceTarget):
+    """SQLite stand-in with the same tables, for local runs and testing."""
+
+    schema = SQLITE_SCHEMA
+
+    def __init__(self, path: str):
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        super().__init__(conn)
+
+    def upsert_prices(self, rows: List[Row]) -> None:
+        # One prepared statement over the whole batch inside the open transaction
+        self.conn.executemany(
+            f"INSERT INTO historical_prices ({', '.join(PRICE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            + UPSERT_SET.format(distinct='IS NOT'),
+            rows
+        )
+
+class PostgresTarget(PriceTarget):
+    """Postgres target loading each batch with COPY into a staging table, then one upsert."""
+
+    placeholder = '%s'
+    schema = POSTGRES_SCHEMA
+
+    def __init__(self, dsn: str):
+        if psycopg2 is None:
+            raise RuntimeError('Loading into Postgres requires psycopg2 (pip install psycopg2-binary)')
+        # An empty DSN lets libpq read PGHOST, PGUSER, PGPASSWORD, PGDATABASE, like config/database.js
+        super().__init__(psycopg2.connect(dsn))
+        self._staging = False
+
+    def upsert_prices(self, rows: List[Row]) -> None:
+        cur = self.conn.cursor()
+        if not self._staging:
+            cur.execute(
+                'CREATE TEMP TABLE historical_prices_load ('
+                'symbol VARCHAR(10), date DATE, open DECIMAL(10, 4), high DECIMAL(10, 4), '
+                'low DECIMAL(10, 4), close DECIMAL(10, 4), volume BIGINT) ON COMMIT DELETE ROWS'
+            )
+            self._staging = True
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        columns = ', '.join(PRICE_COLUMNS)
+        cur.copy_expert(f'COPY historical_prices_load ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cur.execute(
+            f'INSERT INTO historical_prices ({columns}) SELECT {columns} FROM historical_prices_load '
+            + UPSERT_SET.format(distinct='IS DISTINCT FROM')
+        )
+        cur.execute('TRUNCATE historical_prices_load')
+
+    def rollback(self) -> None:
+        super().rollback()
+        # The staging table was created inside the rolled-back transaction
+        self._staging = False
+
+def open_target(database_url: Optional[str] = None, sqlite_path: Optional[str] = None) -> PriceTarget:
+    """Open the SQLite file if given, otherwise Postgres from the URL or PG* variables.
+
+    RAISES:
+        RuntimeError: If Postgres is requested but psycopg2 is not installed.
+    """
+    if sqlite_path:
+        return SqliteTarget(sqlite_path)
+    return PostgresTarget(database_url or os.environ.get('DATABASE_URL', ''))
+
+def series_rows(symbol: str, series) -> List[Row]:
+    """Rows for historical_prices; bars missing any OHLC value are dropped."""
+    columns = series.columns
+    ohlc = np.column_stack([columns[name] for name in ('Open', 'High', 'Low', 'Close')])
+    keep = np.isfinite(ohlc).all(axis=1)
+    dates = np.datetime_as_string(series.dates[keep], unit='D').tolist()
+    volume = columns['Volume'][keep] if 'Volume' in columns else np.full(int(keep.sum()), np.nan)
+    volumes = [int(v) if v == v else None for v in volume.tolist()]
+    return [(symbol, date, *prices, vol) for date, prices, vol in zip(dates, np.round(ohlc[keep], 4).tolist(), volumes)]
+
+def _next_day(date: str) -> str:
+    return (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+def plan_ranges(symbols: List[str], marks: Dict[str, str], backfill_start: str, end_date: str, full: bool = False) -> Dict[str, List[str]]:
+    """Group symbols by the date their load resumes from.
+
+    Symbols sharing a start date are fetched with one batch call, so a
+    daily sync of an up-to-date universe is a single group. Symbols with
+    nothing left to load are left out.
+    """
+    groups = defaultdict(list)
+    for symbol in symbols:
+        start = backfill_start if full or symbol not in marks else max(backfill_start, _next_day(marks[symbol]))
+        if start < end_date:
+            groups[start].append(symbol)
+    return dict(groups)
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def load_prices(
+    target: PriceTarget,
+    symbols: List[str],
+    start_date: str = DEFAULT_BACKFILL_START,
+    end_date: Optional[str] = None,
+    full: bool = False,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    chunk_symbols: int = DEFAULT_CHUNK_SYMBOLS,
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """Backfill or sync historical_prices for a ticker universe.
+
+    Each symbol resumes the day after its high-water mark (or from
+    ``start_date`` on its first load). Symbols are fetched concurrently in
+    chunks through ``get_unrounded_series_many`` (prices keep their
+    upstream precision up to the table's 4 decimals) and written with batched
+    upserts; a chunk's rows and marks commit together. Ranges end before
+    ``end_date`` (default today), so a bar is only loaded once its session
+    has closed.
+
+    RETURNS:
+        dict: Counts of symbols loaded, up to date, empty and failed, rows
+            written and elapsed seconds.
+    """
+    started = time.perf_counter()
+    end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+    target.ensure_schema()
+    marks = target.high_water_marks(symbols)
+    groups = plan_ranges(symbols, marks, start_date, end_date, full)
+    planned = sum(len(group) for group in groups.values())
+    stats = {'symbols': len(symbols), 'up_to_date': len(symbols) - planned, 'loaded': 0, 'empty': 0, 'failed': [], 'rows': 0, 'batches': 0}
+    logger.info(f"🗄️ Loading {planned} of {len(symbols)} symbols in {len(groups)} date groups up to {end_date}")
+
+    for group_start, group in sorted(groups.items()):
+        for chunk in _chunks(group, chunk_symbols):
+            try:
+                series = get_unrounded_series_many(chunk, group_start, end_date, max_workers=max_workers or MAX_FETCH_WORKERS)
+            except Exception as e:
+                logger.error(f"❌ Fetch failed for {', '.join(chunk)}: {str(e)}")
+                stats['failed'].extend(chunk)
+                continue
+            pending: List[Row] = []
+            loaded: List[Tuple[str, str, int]] = []
+            try:
+                for symbol in chunk:
+                    rows = series_rows(symbol, series[symbol]) if series.get(symbol) is not None else []
+                    if not rows:
+                        stats['empty'] += 1
+                        continue
+                    pending.extend(rows)
+                    loaded.append((symbol, rows[-1][1], len(rows)))
+                    while len(pending) >= batch_rows:
+                        target.upsert_prices(pending[:batch_rows])
+                        pending = pending[batch_rows:]
+                        stats['batches'] += 1
+                if pending:
+                    target.upsert_prices(pending)
+                    stats['batches'] += 1
+                target.set_high_water_marks(loaded)
+                target.commit()
+            except Exception as e:
+                target.rollback()
+                logger.error(f"❌ Write failed for {', '.join(chunk)}: {str(e)}")
+                stats['failed'].extend(symbol for symbol, _, _ in loaded)
+                continue
+            stats['loaded'] += len(loaded)
+            stats['rows'] += sum(count for _, _, count in loaded)
+            logger.info(f"✅ Loaded {sum(count for _, _, count in loaded)} rows for {len(loaded)} symbols from {group_start}")
+
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+def read_symbols(tickers: Optional[str], tickers_file: Optional[str]) -> List[str]:
+    """Symbols from a comma list and/or a file (one per line, # comments), else the warm watchlist."""
+    raw = (tickers or '').split(',')
+    if tickers_file:
+        with open(tickers_file) as f:
+            raw.extend(line.split('#', 1)[0] for line in f)
+    if not tickers and not tickers_file:
+        raw = os.environ.get('FINRUS_WARM_WATCHLIST', '').split(',')
+    return list(dict.fromkeys(s.strip().upper() for s in raw if s.strip()))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: backfill or sync historical_prices and print a summary."""
+    parser = argparse.ArgumentParser(description='Bulk load historical prices into the historical_prices table.')
+    parser.add_argument('--tickers', help='Comma-separated symbols (default: FINRUS_WARM_WATCHLIST)')
+    parser.add_argument('--tickers-file', help='File with one symbol per line')
+    parser.add_argument('--database-url', help='Postgres DSN (default: DATABASE_URL or the PG* variables)')
+    parser.add_argument('--sqlite', help='Load into this SQLite file instead of Postgres')
+    parser.add_argument('--start', default=DEFAULT_BACKFILL_START, help='First date for symbols without a high-water mark')
+    parser.add_argument('--end', help='Exclusive end date (default: today)')
+    parser.add_argument('--full', action='store_true', help='Ignore high-water marks and reload from --start')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per COPY / upsert batch')
+    parser.add_argument('--chunk-symbols', type=int, default=DEFAULT_CHUNK_SYMBOLS, help='Symbols fetched and committed together')
+    parser.add_argument('--workers', type=int, help='Concurrent fetches (default: FINRUS_FETCH_WORKERS)')
+    args = parser.parse_args(argv)
+
+    symbols = read_symbols(args.tickers, args.tickers_file)
+    if not symbols:
+        parser.error('No tickers given (use --tickers, --tickers-file or FINRUS_WARM_WATCHLIST)')
+    pattern = re.compile(r'^[A-Z0-9.\-^=]+$')
+    invalid = [s for s in symbols if len(s) > MAX_SYMBOL_LENGTH or not pattern.match(s)]
+    if invalid:
+        parser.error(f"Invalid symbols: {', '.join(invalid)}")
+    for name in ('start', 'end'):
+        value = getattr(args, name)
+        if value and not re.match(r'^\d{4}-\d{2}-\d{2}$', value):
+            parser.error(f'--{name} must be in YYYY-MM-DD format')
+    if args.batch_rows < 1 or args.chunk_symbols < 1:
+        parser.error('--batch-rows and --chunk-symbols must be positive')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Per-ticker fetch logs would drown the load progress
+    logging.getLogger('YahooData').setLevel(logging.WARNING)
+
+    try:
+        target = open_target(args.database_url, args.sqlite)
+    except Exception as e:
+        logger.error(f"❌ Could not open the target database: {str(e)}")
+        return 2
+    try:
+        stats = load_prices(target, symbols, args.start, args.end, args.full, args.batch_rows, args.chunk_symbols, args.workers)
+    finally:
+        target.close()
+    logger.info(
+        f"🗄️ {stats['loaded']} symbols loaded, {stats['up_to_date']} up to date, {stats['empty']} without new bars, "
+        f"{len(stats['failed'])} failed; {stats['rows']} rows in {stats['batches']} batches, {stats['elapsed_seconds']}s"
+    )
+    if stats['failed']:
+        logger.warning(f"⚠️ Failed symbols: {', '.join(stats['failed'])}")
+    return 1 if stats['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import threading
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List, Tuple, Iterable
+from DataProviders import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+class CacheWarmer:
+    """Background refresh-ahead scheduler for hot cache ranges.
+
+    Every ``interval_seconds`` the warmer looks at the watchlist ranges and
+    the most requested ranges, and refreshes any that expire within
+    ``refresh_ahead_seconds`` (watchlist ranges are also loaded when
+    missing). Request handlers call ``schedule`` when they serve a stale
+    or nearly expired entry. Refreshes run on a small thread pool and are
+    capped by a per-minute token budget so warming never floods upstream.
+    ``refresh`` returns None when another process already owns the refresh.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str, str, str], Optional[bool]],
+        remaining_ttl: Callable[[str, str, str], Optional[float]],
+        watch_range: Callable[[], Tuple[str, str]],
+        watchlist: Optional[Iterable[str]] = None,
+        max_workers: int = 2,
+        budget_per_minute: float = 30,
+        refresh_ahead_seconds: float = 60,
+        interval_seconds: float = 15,
+        popular_keys: int = 50
+    ):
+        self.refresh = refresh
+        self.remaining_ttl = remaining_ttl
+        self.watch_range = watch_range
+        self.watchlist: List[str] = []
+        self.max_workers = max_workers
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.interval_seconds = interval_seconds
+        self.popular_keys = popular_keys
+        self._budget = TokenBucket(rate=budget_per_minute / 60.0, capacity=max(1.0, budget_per_minute))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._inflight: set = set()
+        self._popularity: Counter = Counter()
+        self.runs = 0
+        self.scheduled = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.skipped_budget = 0
+        self.skipped_inflight = 0
+        self.skipped_claimed = 0
+        self.last_run_at: Optional[str] = None
+        self.set_watchlist(watchlist or [])
+
+    def set_watchlist(self, tickers: Iterable[str]) -> None:
+        """Replace the tickers kept warm regardless of traffic."""
+        cleaned = [t.strip().upper() for t in tickers if t and t.strip()]
+        with self._lock:
+            self.watchlist = list(dict.fromkeys(cleaned))
+
+    def record(self, ticker: str, start_date: str, end_date: str) -> None:
+        """Count a request for a range so popular ranges get refreshed ahead."""
+        with self._lock:
+            self._popularity[(ticker, start_date, end_date)] += 1
+
+    def schedule(self, ticker: str, start_date: str, end_date: str) -> bool:
+        """Queue a background refresh unless one is running or the budget is spent."""
+        key = (ticker, start_date, end_date)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cache-warmer')
+            if key in self._inflight:
+                self.skipped_inflight += 1
+                return False
+            if not self._budget.try_acquire():
+                self.skipped_budget += 1
+                return False
+            self._inflight.add(key)
+            self.scheduled += 1
+            executor = self._executor
+        executor.submit(self._refresh, key)
+        return True
+
+    def _refresh(self, key: CacheKey) -> None:
+        try:
+            refreshed = self.refresh(*key)
+            if refreshed is None:
+                # Another process holds this range's refresh
+                with self._lock:
+                    self.skipped_claimed += 1
+            elif refreshed:
+                with self._lock:
+                    self.refreshed += 1
+            else:
+                with self._lock:
+                    self.failures += 1
+        except Exception as e:
+            logger.warning(f"Background refresh of {key[0]} failed: {str(e)}")
+            with self._lock:
+                self.failures += 1
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def _candidates(self) -> List[Tuple[CacheKey, bool]]:
+        """Watchlist ranges (warm even when missing), then the most requested ranges."""
+        start_date, end_date = self.watch_range()
+        with self._lock:
+            keys = [((ticker, start_date, end_date), True) for ticker in self.watchlist]
+            popular = [key for key, _ in self._popularity.most_common(self.popular_keys)]
+            # Halve counts each pass so popularity tracks recent traffic
+            self._popularity = Counter({k: c // 2 for k, c in self._popularity.items() if c > 1})
+        seen = {key for key, _ in keys}
+        keys += [(key, False) for key in popular if key not in seen]
+        return keys
+
+    def run_once(self) -> int:
+        """Schedule refreshes for every candidate near or past expiry; returns how many."""
+        count = 0
+        for key, warm_missing in self._candidates():
+            remaining = self.remaining_ttl(*key)
+            if remaining is None:
+                due = warm_missing
+            else:
+                due = remaining < self.refresh_ahead_seconds
+            if due and self.schedule(*key):
+                count += 1
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = datetime.now().isoformat()
+        return count
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning(f"Cache warmer pass failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start the background scheduler thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='cache-warmer', daemon=True)
+            self._thread.start()
+        logger.info(f"🔥 Cache warmer started ({len(self.watchlist)} watched tickers, every {self.interval_seconds}s)")
+
+    def stop(self) -> None:
+        """Stop the scheduler thread; queued refreshes finish in the background."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval_seconds + 1)
+
+    def info(self) -> Dict[str, Any]:
+        """Return configuration and counters for the warmer."""
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'watchlist': list(self.watchlist),
+                'tracked_ranges': len(self._popularity),
+                'inflight_refreshes': len(self._inflight),
+                'max_workers': self.max_workers,
+                'refresh_ahead_seconds': self.refresh_ahead_seconds,
+                'interval_seconds': self.interval_seconds,
+                'budget': self._budget.info(),
+                'runs': self.runs,
+                'scheduled': self.scheduled,
+                'refreshed': self.refreshed,
+                'failures': self.failures,
+                'skipped_budget': self.skipped_budget,
+                'skipped_inflight': self.skipped_inflight,
+                'skipped_claimed': self.skipped_claimed,
+                'last_run_at': self.last_run_at
+            }
@@ -0,0 +1,421 @@
+import sys
+import time
+import threading
+import logging
+import pandas as pd
+from PriceSeries import PriceSeries
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Tuple, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """An in-progress load that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.deduplicated = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per key at a time.
+
+        RETURNS:
+            tuple: ``(value, shared)``. ``shared`` is True for callers that
+                waited on another caller's execution.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = fn()
+            return flight.value, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def inflight(self) -> int:
+        """Number of executions currently running."""
+        with self._lock:
+            return len(self._flights)
+
+class DataCache:
+    """Thread-safe LRU cache with a byte budget, TTL and single-flight loads.
+
+    Entries are evicted least-recently-used first whenever the estimated
+    size of all entries exceeds ``max_bytes``. Expired entries are dropped
+    as soon as they are looked up or when space is needed.
+    ``get_or_load`` makes sure that concurrent misses on the same key run
+    the loader once and share its result.
+
+    With ``stale_seconds`` set, expired entries are kept that much longer
+    and ``lookup`` still returns them (with a negative remaining TTL) so
+    callers can serve stale data while they refresh it.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, stale_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float, int]]' = OrderedDict()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop an entry and release its bytes. Caller holds the lock."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key: Hashable, allow_stale: bool = False) -> Tuple[bool, Any, float]:
+        """Return ``(found, value, remaining_ttl)`` and update counters. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None, 0.0
+        value, expires_at, _ = entry
+        now = time.monotonic()
+        remaining = expires_at - now
+        if remaining <= -self.stale_seconds:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None, 0.0
+        if remaining <= 0 and not allow_stale:
+            self.misses += 1
+            return False, None, 0.0
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if remaining <= 0:
+            self.stale_hits += 1
+        return True, value, remaining
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key``, or None on a miss."""
+        with self._lock:
+            return self._lookup(key)[1]
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], float]:
+        """Return ``(value, remaining_ttl)``, including stale entries.
+
+        ``remaining_ttl`` is negative for entries served from the stale
+        window; ``value`` is None on a miss.
+        """
+        with self._lock:
+            _, value, remaining = self._lookup(key, allow_stale=True)
+            return value, remaining
+
+    def remaining_ttl(self, key: Hashable) -> Optional[float]:
+        """Seconds until ``key`` expires (negative while stale), without counting a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            remaining = entry[1] - time.monotonic()
+            return remaining if remaining > -self.stale_seconds else None
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return an unexpired value without touching LRU order or counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                return None
+            return entry[0]
+
+    def delete(self, key: Hashable) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def set(self, key: Hashable, value: Any, size: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        """Insert or replace an entry, evicting older entries to stay in budget.
+
+        ``ttl_seconds`` overrides the cache's TTL for this entry, e.g. for
+        data that was already partly aged when it was stored.
+        """
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        size = size if size is not None else estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning(f"Cache entry of {size} bytes exceeds budget of {self.max_bytes}, not cached")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl_seconds, size)
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._purge_expired()
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _purge_expired(self) -> None:
+        """Drop every entry past its stale window. Caller holds the lock."""
+        now = time.monotonic() - self.stale_seconds
+        for key in [k for k, (_, expires_at, _) in self._entries.items() if now >= expires_at]:
+            self._remove(key)
+            self.expirations += 1
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Tuple[Any, bool]:
+        """Return the cached value for ``key`` or load it exactly once.
+
+        ARGS:
+            key: Cache key.
+            loader (callable): Produces the value on a miss.
+            cacheable (callable): Decides whether a loaded value is stored.
+
+        RETURNS:
+            tuple: ``(value, from_cache)``. ``from_cache`` is True for cache
+                hits and for callers that waited on another caller's load.
+        """
+        with self._lock:
+            found, value, _ = self._lookup(key)
+        if found:
+            return value, True
+
+        def load():
+            loaded = loader()
+            if cacheable(loaded):
+                self.set(key, loaded)
+            return loaded
+
+        return self._flight.do(key, load)
+
+    def clear(self) -> int:
+        """Remove every entry and return how many were removed."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return count
+
+    def info(self) -> Dict[str, Any]:
+        """Return size, occupancy and hit/miss/eviction counters."""
+        with self._lock:
+            now = time.monotonic()
+            valid = sum(1 for _, expires_at, _ in self._entries.values() if now < expires_at)
+            lookups = self.hits + self.misses
+            return {
+                'total_items': len(self._entries),
+                'valid_items': valid,
+                'expired_items': len(self._entries) - valid,
+                'current_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'inflight_loads': self._flight.inflight(),
+                'deduplicated_loads': self._flight.deduplicated
+            }
+
+class RangeCache:
+    """Per-ticker cache of price series looked up by date interval.
+
+    Each cached ``PriceSeries`` covers a ``[start, end)`` interval for one
+    ticker. A request inside any cached interval is answered with a
+    zero-copy slice of that series, and a new series that overlaps or
+    touches cached intervals is merged with them into a single wider
+    interval. Storage, TTL and the byte budget are delegated to a
+    ``DataCache`` keyed by ``(ticker, start, end)``.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, stale_seconds: float = 0):
+        self._store = DataCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+        self._intervals: Dict[str, List[Tuple[str, str]]] = {}
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.range_hits = 0
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._store.ttl_seconds
+
+    def get(self, ticker: str, start_date: str, end_date: str) -> Optional[PriceSeries]:
+        """Return the bars for ``[start_date, end_date)`` if a fresh cached interval covers it."""
+        return self.lookup(ticker, start_date, end_date, allow_stale=False)[0]
+
+    def lookup(self, ticker: str, start_date: str, end_date: str, allow_stale: bool = True) -> Tuple[Optional[PriceSeries], float]:
+        """Return ``(bars, remaining_ttl)`` from the freshest covering interval.
+
+        A negative ``remaining_ttl`` means the bars are past their TTL but
+        still inside the stale window.
+        """
+        with self._lock:
+            best = None
+            for interval in [
+                iv for iv in self._intervals.get(ticker, [])
+                if iv[0] <= start_date and end_date <= iv[1]
+            ]:
+                remaining = self._store.remaining_ttl((ticker,) + interval)
+                if remaining is None:
+                    # Evicted or expired underneath us
+                    self._intervals[ticker].remove(interval)
+                elif (remaining > 0 or allow_stale) and (best is None or remaining > best[1]):
+                    best = (interval, remaining)
+            if best is not None:
+                series, remaining = self._store.lookup((ticker,) + best[0])
+                if series is not None:
+                    self.hits += 1
+                    if best[0] != (start_date, end_date):
+                        self.range_hits += 1
+                    return series.slice(start_date, end_date), remaining
+            self.misses += 1
+            return None, 0.0
+
+    def remaining_ttl(self, ticker: str, start_date: str, end_date: str) -> Optional[float]:
+        """Longest remaining TTL among covering intervals, without counting a lookup."""
+        with self._lock:
+            ttls = [
+                self._store.remaining_ttl((ticker,) + iv) for iv in self._intervals.get(ticker, [])
+                if iv[0] <= start_date and end_date <= iv[1]
+            ]
+            ttls = [ttl for ttl in ttls if ttl is not None]
+            return max(ttls) if ttls else None
+
+    def covers(self, ticker: str, start_date: str, end_date: str) -> bool:
+        """Whether a live cached interval covers the range, without counting a lookup."""
+        with self._lock:
+            return any(
+                iv[0] <= start_date and end_date <= iv[1] and self._store.peek((ticker,) + iv) is not None
+                for iv in self._intervals.get(ticker, [])
+            )
+
+    def put(self, ticker: str, start_date: str, end_date: str, series: PriceSeries, ttl_seconds: Optional[float] = None) -> None:
+        """Cache a series for an interval, merging it with overlapping intervals.
+
+        The merged entry expires with the oldest part that still contributes
+        bars, so merging never re-stamps old data as fresh. Intervals the new
+        series fully replaces do not count.
+        """
+        with self._lock:
+            intervals = self._intervals.setdefault(ticker, [])
+            merged = series
+            merged_start, merged_end = start_date, end_date
+            ttl = self._store.ttl_seconds if ttl_seconds is None else ttl_seconds
+            for interval in [iv for iv in intervals if iv[0] <= end_date and start_date <= iv[1]]:
+                intervals.remove(interval)
+                cached = self._store.peek((ticker,) + interval)
+                remaining = self._store.remaining_ttl((ticker,) + interval)
+                self._store.delete((ticker,) + interval)
+                if cached is None:
+                    continue
+                if interval[0] < start_date or end_date < interval[1]:
+                    ttl = min(ttl, remaining)
+                # The newest series wins on overlapping dates
+                merged = cached.merge(merged)
+                merged_start = min(merged_start, interval[0])
+                merged_end = max(merged_end, interval[1])
+
+            self._store.set((ticker, merged_start, merged_end), merged, ttl_seconds=ttl)
+            if self._store.peek((ticker, merged_start, merged_end)) is not None:
+                intervals.append((merged_start, merged_end))
+
+    def get_or_load(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        loader: Callable[[], Tuple[Optional[PriceSeries], Optional[float]]],
+        on_hit: Optional[Callable[[float], None]] = None
+    ) -> Tuple[Optional[PriceSeries], bool]:
+        """Serve a range from cache, or load it once for all concurrent callers.
+
+        ARGS:
+            loader (callable): Returns ``(series, ttl_seconds)``; a TTL
+                shortens the local entry for data that was already aged in
+                another tier, None means the full TTL.
+            on_hit (callable): Called with the remaining TTL on every hit,
+                including stale hits, so callers can schedule a refresh.
+
+        RETURNS:
+            tuple: ``(series, from_cache)``. Empty or missing series are
+                returned but never cached.
+        """
+        series, remaining = self.lookup(ticker, start_date, end_date)
+        if series is not None:
+            if on_hit is not None:
+                on_hit(remaining)
+            return series, True
+
+        def load():
+            loaded, ttl_seconds = loader()
+            if loaded is not None and not loaded.empty:
+                self.put(ticker, start_date, end_date, loaded, ttl_seconds)
+            return loaded
+
+        return self._flight.do((ticker, start_date, end_date), load)
+
+    def clear(self) -> int:
+        """Remove every cached interval and return how many were removed."""
+        with self._lock:
+            self._intervals.clear()
+            return self._store.clear()
+
+    def info(self) -> Dict[str, Any]:
+        """Return storage stats plus request-level hit/miss counters."""
+        info = self._store.info()
+        with self._lock:
+            lookups = self.hits + self.misses
+            info.update({
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'range_hits': self.range_hits,
+                'tickers': sum(1 for ivs in self._intervals.values() if ivs),
+                'inflight_loads': self._flight.inflight(),
+                'deduplicated_loads': self._flight.deduplicated
+            })
+        return info
+
+def estimate_size(value: Any) -> int:
+    """Roughly estimate the memory footprint of a JSON-like value in bytes."""
+    if isinstance(value, PriceSeries):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    return size
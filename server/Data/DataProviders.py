@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+import yfinance as yf
+import os
+import zlib
+import time
+import threading
+import logging
+from typing import Optional, Dict, List
+
+logger = logging.getLogger(__name__)
+
+class YFinanceProvider:
+    """Default upstream provider backed by yfinance.
+
+    A provider is any object with a ``name`` attribute and a
+    ``history(ticker, start_date, end_date)`` method returning an OHLCV
+    DataFrame indexed by date (end date exclusive, like yfinance).
+    """
+
+    name = 'yfinance'
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch daily OHLCV bars for one ticker."""
+        stock = yf.Ticker(ticker)
+        return stock.history(start=start_date, end=end_date)
+
+    def history_many(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """Fetch several tickers with one multi-symbol ``yf.download`` call.
+
+        Tickers that come back without any bars are left out of the result
+        so callers can retry them individually.
+        """
+        batch = yf.download(
+            tickers, start=start_date, end=end_date, actions=True,
+            group_by='ticker', threads=True, progress=False
+        )
+        results = {}
+        if batch is None or batch.empty:
+            return results
+        for ticker in tickers:
+            if isinstance(batch.columns, pd.MultiIndex):
+                if ticker not in batch.columns.get_level_values(0):
+                    continue
+                frame = batch[ticker]
+            else:
+                frame = batch
+            frame = frame.dropna(how='all')
+            if not frame.empty:
+                frame.columns.name = None
+                results[ticker] = frame
+        return results
+
+class StaticProvider:
+    """Local fake provider that serves bars from in-memory DataFrames.
+
+    Used in place of yfinance when exercising the price store and cache
+    offline. Every call is recorded in ``calls`` so callers can assert
+    which ranges actually went upstream.
+    """
+
+    name = 'static'
+
+    def __init__(self, frames: Optional[Dict[str, pd.DataFrame]] = None):
+        self.frames = {ticker.upper(): frame for ticker, frame in (frames or {}).items()}
+        self.calls = []
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Return the stored bars for ``ticker`` in ``[start_date, end_date)``."""
+        self.calls.append((ticker, start_date, end_date))
+        frame = self.frames.get(ticker.upper())
+        if frame is None:
+            return pd.DataFrame()
+        dates = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+        mask = (dates >= pd.Timestamp(start_date)) & (dates < pd.Timestamp(end_date))
+        return frame[mask]
+
+    def history_many(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """Batch variant of ``history``; recorded as a single call."""
+        self.calls.append((tuple(tickers), start_date, end_date))
+        results = {}
+        for ticker in tickers:
+            frame = self.frames.get(ticker.upper())
+            if frame is None:
+                continue
+            dates = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+            mask = (dates >= pd.Timestamp(start_date)) & (dates < pd.Timestamp(end_date))
+            if mask.any():
+                results[ticker] = frame[mask]
+        return results
+
+class CSVFixtureProvider(StaticProvider):
+    """Offline provider that reads ``<TICKER>.csv`` files from a directory.
+
+    Each file needs a 'Date' column plus OHLCV columns named like the
+    yfinance output. Files are loaded lazily and kept in memory.
+    """
+
+    name = 'csv_fixtures'
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+
+    def _load(self, ticker: str) -> None:
+        """Read a ticker's fixture file into ``frames`` if it exists."""
+        ticker = ticker.upper()
+        if ticker in self.frames:
+            return
+        path = os.path.join(self.directory, f'{ticker}.csv')
+        if not os.path.exists(path):
+            return
+        frame = pd.read_csv(path, parse_dates=['Date'], index_col='Date').sort_index()
+        self.frames[ticker] = frame
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self._load(ticker)
+        return super().history(ticker, start_date, end_date)
+
+    def history_many(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        for ticker in tickers:
+            self._load(ticker)
+        return super().history_many(tickers, start_date, end_date)
+
+class SyntheticProvider(StaticProvider):
+    """Deterministic fake upstream generating daily OHLCV bars for any ticker.
+
+    Each ticker gets a geometric random walk seeded from its symbol and
+    ``seed``, over every weekday from ``first_date`` to ``last_date`` in
+    New York time like yfinance, so a date always has the same bar
+    whatever range is asked for. ``latency`` seconds are slept per call to
+    stand in for the network round trip. Used by the benchmark harness.
+    """
+
+    name = 'synthetic'
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: float = 0.0,
+        first_date: str = '2000-01-03',
+        last_date: str = '2035-12-31'
+    ):
+        super().__init__()
+        self.seed = seed
+        self.latency = latency
+        self.first_date = first_date
+        self.last_date = last_date
+        self._lock = threading.Lock()
+
+    def _load(self, ticker: str) -> None:
+        """Generate a ticker's full bar history on first use."""
+        ticker = ticker.upper()
+        with self._lock:
+            if ticker in self.frames:
+                return
+            rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode('utf-8'))])
+            dates = pd.bdate_range(self.first_date, self.last_date, tz='America/New_York', name='Date')
+            n = len(dates)
+            close = rng.uniform(20, 200) * np.exp(np.cumsum(rng.normal(0.0002, 0.015, n)))
+            open_ = close * np.exp(rng.normal(0, 0.005, n))
+            spread = np.abs(rng.normal(0, 0.01, n))
+            self.frames[ticker] = pd.DataFrame({
+                'Open': open_,
+                'High': np.maximum(open_, close) * (1 + spread),
+                'Low': np.minimum(open_, close) * (1 - spread),
+                'Close': close,
+                'Volume': rng.integers(100_000, 50_000_000, n),
+                'Dividends': 0.0,
+                'Stock Splits': 0.0
+            }, index=dates)
+
+    def history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self._load(ticker)
+        if self.latency:
+            time.sleep(self.latency)
+        return super().history(ticker, start_date, end_date)
+
+    def history_many(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        for ticker in tickers:
+            self._load(ticker)
+        if self.latency:
+            time.sleep(self.latency)
+        return super().history_many(tickers, start_date, end_date)
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace calls to the upstream provider.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``;
+    ``acquire`` blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waits = 0
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last refill. Caller holds the lock."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+                self.waits += 1
+            time.sleep(wait)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` if available right now; never blocks."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def info(self) -> Dict[str, float]:
+        """Return the limiter configuration and current fill level."""
+        with self._lock:
+            self._refill()
+            return {
+                'rate_per_second': self.rate,
+                'capacity': self.capacity,
+                'available_tokens': round(self._tokens, 2),
+                'waits': self.waits
+            }
+
+class UpstreamUnavailableError(Exception):
+    """Raised when an upstream provider is failing and its circuit is open."""
+
+class CircuitBreaker:
+    """Per-upstream circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow`` rejects calls for ``reset_seconds``. The circuit then goes
+    half-open and lets a single trial call through: success closes it,
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now."""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+            return False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == 'open'
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"✅ Upstream {self.name} recovered, closing circuit")
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == 'half_open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                if self.state == 'closed':
+                    logger.warning(f"⚡ Upstream {self.name} failed {self._failures} times in a row, opening circuit")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def info(self) -> Dict[str, object]:
+        """Return the breaker state and counters."""
+        with self._lock:
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at)) if self.state == 'open' else 0.0
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+                'retry_in_seconds': round(retry_in, 1),
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected
+            }
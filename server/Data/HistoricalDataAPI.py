@@ -1,7 +1,23 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, make_response, Response, stream_with_context, g
 from flask_cors import CORS
-from YahooData import fetch_historical_data, fetch_multiple_tickers, get_recent_data, clear_cache, get_cache_info
-from datetime import datetime, timedelta
+from YahooData import fetch_historical_data, fetch_historical_series, fetch_multiple_tickers, iter_multiple_tickers, recent_date_range, get_price_frame, get_price_series, clear_cache, get_cache_info, ensure_cache_warmer, set_warm_watchlist, get_warmer_info, get_upstream_health
+from WireFormats import negotiate_format, negotiate_encoding, content_validators, build_body, encode_columns, arrow_available, get_encoded_cache_info, clear_encoded_cache, FORMAT_MIMETYPES
+from Backtest import backtest_frame
+from Indicators import parse_indicator_specs, get_indicators, clear_indicator_cache, get_indicator_cache_info
+from PortfolioAnalytics import analyze_portfolio, clear_aligned_cache, get_aligned_cache_info, DEFAULT_BENCHMARK, DEFAULT_ROLLING_WINDOW
+from Simulation import iter_simulation, run_simulation, portfolio_returns, strategy_returns
+from ParameterSweep import run_sweep
+from BatchBacktest import batch_manager
+from RateLimiter import RateLimiter, create_backend
+from Metrics import (
+    registry, stage, begin_request_stages, end_request_stages, server_timing_header, process_memory,
+    SamplingProfiler, profiles, REQUEST_SECONDS, REQUESTS_TOTAL, REQUESTS_IN_FLIGHT
+)
+import os
+import time
+import threading
+import json
+from datetime import datetime, timezone
 import logging
 import re
 from typing import Dict, Any, Optional
@@ -14,10 +30,77 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
-# Rate limiting (simple in-memory implementation)
-request_counts = {}
+# Rate limiting: sliding-window counters per client, shared across workers
+# when FINRUS_RATE_LIMIT_BACKEND=sqlite
 RATE_LIMIT_WINDOW = 60  # seconds
 MAX_REQUESTS_PER_WINDOW = 100
+rate_limiter = RateLimiter(create_backend(), MAX_REQUESTS_PER_WINDOW, RATE_LIMIT_WINDOW)
+
+# Multi-ticker requests fan out concurrently, so the cap can be generous
+MAX_TICKERS_PER_REQUEST = 50
+
+# Rows per NDJSON line when streaming long ranges
+STREAM_CHUNK_ROWS = 500
+
+# Sampling profiler for single requests sending the profile header (off unless FINRUS_PROFILING=true)
+PROFILING_ENABLED = os.environ.get('FINRUS_PROFILING', 'false').lower() == 'true'
+PROFILE_HEADER = 'X-FinRus-Profile'
+
+CACHE_HIT_RATIO = registry.gauge('finrus_cache_hit_ratio', 'Cache hit ratio per tier since startup')
+CACHE_LOOKUPS = registry.gauge('finrus_cache_lookups', 'Cache lookups per tier and result since startup')
+CACHE_BYTES = registry.gauge('finrus_cache_bytes', 'Bytes held per cache tier')
+PROCESS_MEMORY = registry.gauge('finrus_process_memory_bytes', 'Process memory (resident and peak resident)')
+
+def _route_label() -> str:
+    """Route template for metric labels, so ticker paths share one series."""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    """Start the latency clock, stage timings and, if asked for, the profiler."""
+    g.request_started = time.perf_counter()
+    # Started per worker on first request, never in a preloading master (FINRUS_CACHE_WARMER)
+    ensure_cache_warmer()
+    REQUESTS_IN_FLIGHT.inc()
+    begin_request_stages()
+    if PROFILING_ENABLED and request.headers.get(PROFILE_HEADER):
+        g.profiler = SamplingProfiler(threading.get_ident())
+        g.profiler.start()
+
+@app.after_request
+def add_request_metrics(response):
+    """Attach Server-Timing stages and the profile id to the response."""
+    g.response_status = response.status_code
+    stages = end_request_stages()
+    stages.append(('total', time.perf_counter() - g.request_started))
+    response.headers['Server-Timing'] = server_timing_header(stages)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        route = _route_label()
+        if response.is_streamed:
+            # A streamed body is generated after this hook; keep sampling until it is sent
+            profile_id = profiles.new_id()
+            response.call_on_close(lambda: (profiler.stop(), profiles.add(route, profiler, profile_id)))
+        else:
+            profiler.stop()
+            profile_id = profiles.add(route, profiler)
+        response.headers['X-FinRus-Profile-Id'] = profile_id
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Record latency once the response (including any stream) is done."""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+    route = _route_label()
+    status = g.pop('response_status', 500)
+    REQUESTS_IN_FLIGHT.dec()
+    REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+    REQUESTS_TOTAL.inc(route=route, method=request.method, status=status)
 
 def validate_ticker(ticker: str) -> bool:
     """Validate ticker symbol format."""
@@ -34,36 +117,108 @@ def validate_date_format(date_str: str) -> bool:
     except ValueError:
         return False
 
-def rate_limit(f):
-    """Simple rate limiting decorator."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        client_ip = request.remote_addr
-        current_time = datetime.now()
-        
-        # Clean old entries
-        cutoff_time = current_time - timedelta(seconds=RATE_LIMIT_WINDOW)
-        if client_ip in request_counts:
-            request_counts[client_ip] = [
-                req_time for req_time in request_counts[client_ip] 
-                if req_time > cutoff_time
-            ]
-        else:
-            request_counts[client_ip] = []
-        
-        # Check rate limit
-        if len(request_counts[client_ip]) >= MAX_REQUESTS_PER_WINDOW:
-            logger.warning(f"Rate limit exceeded for {client_ip}")
-            return jsonify({
-                'error': 'Rate limit exceeded',
-                'message': f'Maximum {MAX_REQUESTS_PER_WINDOW} requests per {RATE_LIMIT_WINDOW} seconds'
-            }), 429
-        
-        # Add current request
-        request_counts[client_ip].append(current_time)
-        
-        return f(*args, **kwargs)
-    return decorated_function
+def rate_limit(f=None, *, limit: Optional[int] = None, window: Optional[float] = None):
+    """Rate limiting decorator.
+    
+    Bare ``@rate_limit`` counts against one shared per-client budget.
+    ``@rate_limit(limit=..., window=...)`` gives the route its own budget.
+    Responses carry X-RateLimit-* headers, and 429s carry Retry-After.
+    """
+    def decorator(func):
+        @wraps(func)
+        def decorated_function(*args, **kwargs):
+            client_ip = request.remote_addr
+            scope = func.__name__ if limit or window else 'global'
+            decision = rate_limiter.check(f'{scope}:{client_ip}', limit, window)
+            
+            if not decision.allowed:
+                logger.warning(f"Rate limit exceeded for {client_ip} on {scope}")
+                response = jsonify({
+                    'error': 'Rate limit exceeded',
+                    'message': f'Maximum {decision.limit} requests per {window or RATE_LIMIT_WINDOW} seconds',
+                    'retry_after': int(decision.headers()['Retry-After'])
+                })
+                response.status_code = 429
+            else:
+                response = make_response(func(*args, **kwargs))
+            response.headers.update(decision.headers())
+            return response
+        return decorated_function
+    return decorator(f) if f is not None else decorator
+
+def get_stream_mode() -> Optional[str]:
+    """Return the requested streaming mode, or None for a normal JSON response.
+    
+    Raises:
+        ValueError: If an unsupported stream mode is requested.
+    """
+    mode = request.args.get('stream', '').lower()
+    if not mode:
+        return None
+    if mode != 'ndjson':
+        raise ValueError(f"Unsupported stream mode: {mode} (use 'ndjson')")
+    return mode
+
+def ndjson_ticker_lines(ticker: str, data: Dict[str, Any], chunk_rows: int = STREAM_CHUNK_ROWS):
+    """Yield NDJSON lines for one ticker's payload.
+    
+    The first line (type 'ticker') carries the metadata and the first chunk
+    of rows; longer series continue with 'rows' lines of ``chunk_rows`` each.
+    """
+    rows = data.get('data', [])
+    yield json.dumps({
+        'type': 'ticker',
+        'ticker': ticker,
+        'metadata': data.get('metadata', {}),
+        'data': rows[:chunk_rows]
+    }) + '\n'
+    for start in range(chunk_rows, len(rows), chunk_rows):
+        yield json.dumps({'type': 'rows', 'ticker': ticker, 'data': rows[start:start + chunk_rows]}) + '\n'
+
+def get_wire_format() -> str:
+    """Return the negotiated wire format from ``format=`` or the Accept header.
+    
+    Raises:
+        ValueError: If an unsupported format is requested.
+    """
+    return negotiate_format(request.args.get('format'), request.accept_mimetypes)
+
+def series_response(fmt: str, ticker: str, series, metadata: Dict[str, Any]):
+    """Serve a price series in the negotiated wire format.
+    
+    Failed lookups (no series) keep the original JSON error payload whatever
+    the format, so clients can always read the error. Series responses
+    carry a content-hash ETag and Last-Modified, answer matching
+    conditional requests with 304, and are gzip/brotli compressed when the
+    client accepts it.
+    """
+    if series is None:
+        with stage('jsonify'):
+            return jsonify({'ticker': ticker, 'data': [], 'metadata': metadata, 'success': True})
+    if fmt == 'arrow' and not arrow_available():
+        return create_error_response('Arrow format is not available on this server', 406)
+    
+    etag, last_modified = content_validators(fmt, ticker, series)
+    last_modified = datetime.fromtimestamp(last_modified, timezone.utc)
+    if _not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        encoding = negotiate_encoding(request.accept_encodings)
+        body, headers = build_body(fmt, ticker, series, metadata, encoding)
+        response = Response(body, mimetype=FORMAT_MIMETYPES[fmt], headers=headers)
+    # Weak because the envelope metadata (fetched_at, cached) is not part of the hash
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def _not_modified(etag: str, last_modified: datetime) -> bool:
+    """Whether the request's validators still match; If-None-Match wins over If-Modified-Since."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified <= since
 
 def create_error_response(error_message: str, status_code: int = 400) -> tuple:
     """Create standardized error response."""
@@ -84,9 +239,14 @@ def get_stock_data(ticker: str):
         - start_date (str): Start date in YYYY-MM-DD format
         - end_date (str): End date in YYYY-MM-DD format
         - use_cache (bool): Whether to use caching (default: true)
+        - stream (str): 'ndjson' to stream rows in chunks
+        - format (str): 'json' (default), 'columnar', 'arrow' or 'binary';
+          the Accept header is used when omitted
+        - interval (str): 'daily' (default), 'weekly' or 'monthly' OHLCV bars
+        - max_points (int): Cap on returned bars, downsampled with LTTB
     
     Returns:
-        JSON response with stock data or error message
+        Stock data in the negotiated format, or a JSON error message
     """
     try:
         # Validate ticker
@@ -100,6 +260,13 @@ def get_stock_data(ticker: str):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         use_cache = request.args.get('use_cache', 'true').lower() == 'true'
+        stream_mode = get_stream_mode()
+        wire_format = get_wire_format()
+        interval = request.args.get('interval', 'daily')
+        max_points = request.args.get('max_points', type=int)
+        
+        if stream_mode and wire_format != 'json':
+            return create_error_response("stream=ndjson cannot be combined with a non-JSON format")
         
         # Validate days_back
         if days_back <= 0 or days_back > 365:
@@ -107,8 +274,7 @@ def get_stock_data(ticker: str):
         
         # Calculate dates if not provided
         if not start_date or not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            start_date, end_date = recent_date_range(days_back)
         else:
             # Validate provided dates
             if not validate_date_format(start_date) or not validate_date_format(end_date):
@@ -120,16 +286,16 @@ def get_stock_data(ticker: str):
         
         logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
         
-        # Fetch data
-        data = fetch_historical_data(ticker, start_date, end_date, use_cache=use_cache)
-        
-        if data is None:
-            return create_error_response(f'No data found for {ticker}', 404)
-        
-        # Add success flag to response
-        data['success'] = True
+        if stream_mode:
+            data = fetch_historical_data(ticker, start_date, end_date, use_cache=use_cache, interval=interval, max_points=max_points)
+            data['success'] = True
+            return Response(stream_with_context(ndjson_ticker_lines(ticker, data)), mimetype='application/x-ndjson')
         
-        return jsonify(data)
+        # Fetch data
+        series, metadata = fetch_historical_series(
+            ticker, start_date, end_date, use_cache=use_cache, interval=interval, max_points=max_points
+        )
+        return series_response(wire_format, ticker, series, metadata)
         
     except ValueError as ve:
         return create_error_response(str(ve))
@@ -148,9 +314,12 @@ def get_multiple_stocks():
         - start_date (str): Start date in YYYY-MM-DD format
         - end_date (str): End date in YYYY-MM-DD format
         - use_cache (bool): Whether to use caching (default: true)
+        - stream (str): 'ndjson' to stream each ticker as soon as it is ready
+        - format (str): 'json' (default) or 'columnar' for per-column arrays
     
     Returns:
-        JSON response with data for all requested tickers
+        JSON response with data for all requested tickers, or an NDJSON stream
+        of 'ticker'/'rows' lines followed by a final 'summary' line
     """
     try:
         # Get and validate tickers
@@ -164,8 +333,8 @@ def get_multiple_stocks():
             return create_error_response('No valid tickers provided')
         
         # Limit number of tickers to prevent abuse
-        if len(tickers) > 10:
-            return create_error_response('Maximum 10 tickers allowed per request')
+        if len(tickers) > MAX_TICKERS_PER_REQUEST:
+            return create_error_response(f'Maximum {MAX_TICKERS_PER_REQUEST} tickers allowed per request')
         
         # Validate all tickers
         invalid_tickers = [ticker for ticker in tickers if not validate_ticker(ticker)]
@@ -177,6 +346,12 @@ def get_multiple_stocks():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         use_cache = request.args.get('use_cache', 'true').lower() == 'true'
+        stream_mode = get_stream_mode()
+        wire_format = get_wire_format()
+        
+        # Binary formats describe one series; a multi-ticker envelope stays JSON
+        if wire_format not in ('json', 'columnar'):
+            return create_error_response(f"Format '{wire_format}' is only available for single-ticker requests", 406)
         
         # Validate days_back
         if days_back <= 0 or days_back > 365:
@@ -184,8 +359,7 @@ def get_multiple_stocks():
         
         # Calculate dates if not provided
         if not start_date or not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            start_date, end_date = recent_date_range(days_back)
         else:
             # Validate provided dates
             if not validate_date_format(start_date) or not validate_date_format(end_date):
@@ -196,14 +370,25 @@ def get_multiple_stocks():
         
         logger.info(f"Fetching data for {len(tickers)} tickers from {start_date} to {end_date}")
         
+        if stream_mode:
+            return Response(
+                stream_with_context(_stream_multiple_stocks(tickers, start_date, end_date, use_cache)),
+                mimetype='application/x-ndjson'
+            )
+        
         # Fetch data for all tickers
         results = fetch_multiple_tickers(tickers, start_date, end_date, use_cache=use_cache)
+        if wire_format == 'columnar':
+            with stage('serialize'):
+                for data in results.values():
+                    data['data'] = encode_columns(data['data'])
         
         # Add metadata to response
         response = {
             'success': True,
             'tickers_requested': tickers,
             'tickers_count': len(tickers),
+            'format': wire_format,
             'data': results,
             'metadata': {
                 'start_date': start_date,
@@ -212,12 +397,38 @@ def get_multiple_stocks():
             }
         }
         
-        return jsonify(response)
+        with stage('jsonify'):
+            return jsonify(response)
         
+    except ValueError as ve:
+        return create_error_response(str(ve))
     except Exception as e:
         logger.exception(f"Unexpected error in get_multiple_stocks: {str(e)}")
         return create_error_response(f'Internal server error: {str(e)}', 500)
 
+def _stream_multiple_stocks(tickers, start_date: str, end_date: str, use_cache: bool):
+    """Generate NDJSON lines for each ticker as it finishes, then a summary line."""
+    completed = []
+    try:
+        for ticker, data in iter_multiple_tickers(tickers, start_date, end_date, use_cache=use_cache):
+            completed.append(ticker)
+            yield from ndjson_ticker_lines(ticker, data)
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.exception(f"Unexpected error while streaming multiple stocks: {str(e)}")
+        yield json.dumps({'type': 'error', 'error': f'Internal server error: {str(e)}'}) + '\n'
+    yield json.dumps({
+        'type': 'summary',
+        'success': len(completed) == len(set(tickers)),
+        'tickers_requested': tickers,
+        'tickers_count': len(tickers),
+        'metadata': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'fetched_at': datetime.now().isoformat()
+        }
+    }) + '\n'
+
 @app.route('/api/stock/recent/<ticker>')
 @rate_limit
 def get_recent_stock_data(ticker: str):
@@ -226,6 +437,7 @@ def get_recent_stock_data(ticker: str):
     Query Parameters:
         - days_back (int): Number of days back from today (default: 30)
         - use_cache (bool): Whether to use caching (default: true)
+        - format (str): 'json' (default), 'columnar', 'arrow' or 'binary'
     """
     try:
         if not validate_ticker(ticker):
@@ -234,22 +446,497 @@ def get_recent_stock_data(ticker: str):
         ticker = ticker.upper()
         days_back = request.args.get('days_back', 30, type=int)
         use_cache = request.args.get('use_cache', 'true').lower() == 'true'
+        wire_format = get_wire_format()
         
         if days_back <= 0 or days_back > 365:
             return create_error_response("days_back must be between 1 and 365")
         
         logger.info(f"Fetching recent {days_back} days data for {ticker}")
         
-        data = get_recent_data(ticker, days_back=days_back, use_cache=use_cache)
+        start_date, end_date = recent_date_range(days_back)
+        series, metadata = fetch_historical_series(ticker, start_date, end_date, use_cache=use_cache)
+        return series_response(wire_format, ticker, series, metadata)
         
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in get_recent_stock_data: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/indicators/<ticker>')
+@rate_limit
+def get_stock_indicators(ticker: str):
+    """API endpoint computing technical indicators over cached price data.
+    
+    Query Parameters:
+        - indicators (str): Comma-separated specs, parameters after colons,
+          e.g. 'sma:20,ema:50,rsi:14,macd:12:26:9,bbands:20:2,atr:14'
+        - days_back (int): Number of days back from today (default: 30)
+        - start_date (str): Start date in YYYY-MM-DD format
+        - end_date (str): End date in YYYY-MM-DD format
+        - use_cache (bool): Whether to use caching (default: true)
+    
+    Returns:
+        JSON with the dates and one column set per indicator; values are
+        null until an indicator's warm-up window is filled
+    """
+    try:
+        if not validate_ticker(ticker):
+            return create_error_response(f"Invalid ticker format: {ticker}")
+        
+        ticker = ticker.upper()
+        specs = parse_indicator_specs(request.args.get('indicators', ''))
+        days_back = request.args.get('days_back', 30, type=int)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        use_cache = request.args.get('use_cache', 'true').lower() == 'true'
+        
+        if not start_date or not end_date:
+            if days_back <= 0 or days_back > 365:
+                return create_error_response("days_back must be between 1 and 365")
+            start_date, end_date = recent_date_range(days_back)
+        else:
+            if not validate_date_format(start_date) or not validate_date_format(end_date):
+                return create_error_response("Dates must be in YYYY-MM-DD format")
+            if start_date >= end_date:
+                return create_error_response("start_date must be before end_date")
+        
+        logger.info(f"📈 Computing {', '.join(spec.key for spec in specs)} for {ticker} from {start_date} to {end_date}")
+        data, metadata = get_indicators(ticker, specs, start_date, end_date, use_cache=use_cache)
         if data is None:
-            return create_error_response(f'No recent data found for {ticker}', 404)
+            data = {'dates': [], 'indicators': {}}
         
-        data['success'] = True
-        return jsonify(data)
+        with stage('jsonify'):
+            return jsonify({
+                'success': True,
+                'ticker': ticker,
+                'dates': data['dates'],
+                'indicators': data['indicators'],
+                'metadata': metadata
+            })
         
+    except ValueError as ve:
+        return create_error_response(str(ve))
     except Exception as e:
-        logger.exception(f"Unexpected error in get_recent_stock_data: {str(e)}")
+        logger.exception(f"Unexpected error in get_stock_indicators: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/portfolio/analytics', methods=['POST'])
+@rate_limit(limit=30)
+def get_portfolio_analytics():
+    """API endpoint computing risk analytics for a weighted portfolio.
+    
+    JSON Body:
+        - tickers (list): Ticker symbols
+        - weights (list|dict): Weights in ticker order or by ticker; scaled
+          to sum to 1 (default: equal weights)
+        - benchmark (str): Benchmark ticker for beta (default: SPY)
+        - start_date, end_date (str): Range in YYYY-MM-DD format, or
+        - days_back (int): Days back from today (default: 365)
+        - window (int): Rolling window in trading days (default: 63)
+        - include_asset_returns (bool): Also return each asset's daily returns
+    
+    Returns:
+        JSON with return series, covariance and correlation matrices,
+        volatility, beta and rolling metrics
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        tickers = body.get('tickers')
+        if not isinstance(tickers, list) or not tickers:
+            return create_error_response('tickers must be a non-empty list')
+        tickers = [str(ticker).strip().upper() for ticker in tickers if str(ticker).strip()]
+        benchmark = str(body.get('benchmark') or DEFAULT_BENCHMARK).strip().upper()
+        invalid_tickers = [ticker for ticker in tickers + [benchmark] if not validate_ticker(ticker)]
+        if invalid_tickers:
+            return create_error_response(f'Invalid ticker format: {", ".join(invalid_tickers)}')
+        
+        start_date = body.get('start_date')
+        end_date = body.get('end_date')
+        if not start_date or not end_date:
+            days_back = int(body.get('days_back', 365))
+            if days_back <= 1 or days_back > 3650:
+                return create_error_response("days_back must be between 2 and 3650")
+            start_date, end_date = recent_date_range(days_back)
+        else:
+            if not validate_date_format(start_date) or not validate_date_format(end_date):
+                return create_error_response("Dates must be in YYYY-MM-DD format")
+            if start_date >= end_date:
+                return create_error_response("start_date must be before end_date")
+        
+        try:
+            window = int(body.get('window', DEFAULT_ROLLING_WINDOW))
+        except (TypeError, ValueError):
+            return create_error_response('window must be an integer')
+        
+        logger.info(f"📐 Portfolio analytics for {len(tickers)} tickers vs {benchmark} from {start_date} to {end_date}")
+        analytics = analyze_portfolio(
+            tickers, start_date, end_date,
+            weights=body.get('weights'),
+            benchmark=benchmark,
+            window=window,
+            include_asset_returns=bool(body.get('include_asset_returns', False))
+        )
+        analytics['success'] = True
+        with stage('jsonify'):
+            return jsonify(analytics)
+        
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in get_portfolio_analytics: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/backtest', methods=['POST'])
+@rate_limit
+def run_backtest():
+    """API endpoint to run a vectorized backtest on the fetched price series.
+    
+    Accepts the same JSON body as the Node ``POST /api/backtest/run`` route and
+    returns results with the same field names so the engines can be compared.
+    
+    JSON Body:
+        - strategyType (str): 'SMA' or 'RSI'
+        - strategyParams (dict): Strategy parameters (shortPeriod/longPeriod or period/oversold/overbought)
+        - symbol (str): Ticker symbol
+        - startDate (str): Start date in YYYY-MM-DD format
+        - endDate (str): End date in YYYY-MM-DD format
+        - initialCapital (float): Starting capital (default: 10000)
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        strategy_type = body.get('strategyType')
+        symbol = body.get('symbol')
+        start_date = body.get('startDate')
+        end_date = body.get('endDate')
+        
+        if not strategy_type or not symbol or not start_date or not end_date:
+            return create_error_response('Missing required fields: strategyType, symbol, startDate, endDate')
+        
+        if not validate_ticker(symbol):
+            return create_error_response(f"Invalid ticker format: {symbol}")
+        
+        if not validate_date_format(start_date) or not validate_date_format(end_date):
+            return create_error_response("Dates must be in YYYY-MM-DD format")
+        
+        if start_date >= end_date:
+            return create_error_response("startDate must be before endDate")
+        
+        try:
+            initial_capital = float(body.get('initialCapital', 10000))
+        except (TypeError, ValueError):
+            return create_error_response('initialCapital must be a number')
+        if initial_capital <= 0:
+            return create_error_response('initialCapital must be positive')
+        
+        symbol = symbol.upper()
+        frame = get_price_frame(symbol, start_date, end_date)
+        if frame is None:
+            return create_error_response(f'No data found for {symbol}', 404)
+        
+        results = backtest_frame(frame, strategy_type, body.get('strategyParams'), initial_capital)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'metadata': {
+                'symbol': symbol,
+                'strategyType': strategy_type.upper(),
+                'start_date': start_date,
+                'end_date': end_date,
+                'data_points': len(frame)
+            }
+        })
+        
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in run_backtest: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/backtest/sweep', methods=['POST'])
+@rate_limit(limit=10)
+def run_parameter_sweep():
+    """API endpoint to evaluate a grid of strategy parameters in parallel.
+    
+    JSON Body:
+        - strategyType (str): 'SMA' or 'RSI'
+        - paramRanges (dict): Per-parameter list of values or {start, stop, step}
+        - symbol (str): Ticker symbol
+        - startDate (str): Start date in YYYY-MM-DD format
+        - endDate (str): End date in YYYY-MM-DD format
+        - initialCapital (float): Starting capital (default: 10000)
+        - sortBy (str): Ranking metric (default: sharpeRatio)
+        - limit (int): Number of ranked rows to return (default: 50)
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        strategy_type = body.get('strategyType')
+        symbol = body.get('symbol')
+        start_date = body.get('startDate')
+        end_date = body.get('endDate')
+        
+        if not strategy_type or not symbol or not start_date or not end_date:
+            return create_error_response('Missing required fields: strategyType, symbol, startDate, endDate')
+        
+        if not validate_ticker(symbol):
+            return create_error_response(f"Invalid ticker format: {symbol}")
+        
+        if not validate_date_format(start_date) or not validate_date_format(end_date):
+            return create_error_response("Dates must be in YYYY-MM-DD format")
+        
+        if start_date >= end_date:
+            return create_error_response("startDate must be before endDate")
+        
+        param_ranges = body.get('paramRanges') or {}
+        if not isinstance(param_ranges, dict):
+            return create_error_response('paramRanges must be an object')
+        
+        try:
+            initial_capital = float(body.get('initialCapital', 10000))
+            limit = int(body.get('limit', 50))
+        except (TypeError, ValueError):
+            return create_error_response('initialCapital and limit must be numbers')
+        if initial_capital <= 0:
+            return create_error_response('initialCapital must be positive')
+        
+        symbol = symbol.upper()
+        series = get_price_series(symbol, start_date, end_date)
+        if series is None or 'Close' not in series.columns:
+            return create_error_response(f'No data found for {symbol}', 404)
+        
+        started = datetime.now()
+        sweep = run_sweep(
+            series.columns['Close'],
+            strategy_type,
+            param_ranges,
+            initial_capital=initial_capital,
+            sort_by=body.get('sortBy', 'sharpeRatio'),
+            limit=limit
+        )
+        elapsed = (datetime.now() - started).total_seconds()
+        
+        sweep['success'] = True
+        sweep['metadata'] = {
+            'symbol': symbol,
+            'start_date': start_date,
+            'end_date': end_date,
+            'data_points': len(series),
+            'elapsed_seconds': round(elapsed, 3)
+        }
+        return jsonify(sweep)
+        
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in run_parameter_sweep: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/backtest/batch', methods=['POST'])
+@rate_limit(limit=5)
+def submit_batch_backtest():
+    """API endpoint to start a backtest job across a list of tickers.
+    
+    JSON Body:
+        - tickers (list): Ticker symbols
+        - strategyType (str): 'SMA' or 'RSI'
+        - strategyParams (dict): Strategy parameters
+        - startDate (str): Start date in YYYY-MM-DD format
+        - endDate (str): End date in YYYY-MM-DD format
+        - initialCapital (float): Starting capital per ticker (default: 10000)
+    
+    Returns:
+        202 with the job id; poll /api/backtest/batch/<job_id> or stream
+        /api/backtest/batch/<job_id>/stream for results.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        tickers = body.get('tickers') or []
+        start_date = body.get('startDate')
+        end_date = body.get('endDate')
+        
+        if not isinstance(tickers, list) or not body.get('strategyType') or not start_date or not end_date:
+            return create_error_response('Missing required fields: tickers, strategyType, startDate, endDate')
+        
+        invalid_tickers = [t for t in tickers if not validate_ticker(t)]
+        if invalid_tickers:
+            return create_error_response(f'Invalid ticker format: {", ".join(map(str, invalid_tickers))}')
+        
+        if not validate_date_format(start_date) or not validate_date_format(end_date):
+            return create_error_response("Dates must be in YYYY-MM-DD format")
+        
+        if start_date >= end_date:
+            return create_error_response("startDate must be before endDate")
+        
+        try:
+            initial_capital = float(body.get('initialCapital', 10000))
+        except (TypeError, ValueError):
+            return create_error_response('initialCapital must be a number')
+        if initial_capital <= 0:
+            return create_error_response('initialCapital must be positive')
+        
+        job = batch_manager.submit(tickers, body['strategyType'], body.get('strategyParams'), start_date, end_date, initial_capital)
+        response = job.progress()
+        response['success'] = True
+        return jsonify(response), 202
+        
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in submit_batch_backtest: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+@app.route('/api/backtest/batch')
+def list_batch_backtests():
+    """List recent batch jobs with their progress."""
+    return jsonify({'success': True, 'jobs': batch_manager.list_jobs()})
+
+@app.route('/api/backtest/batch/<job_id>')
+def get_batch_backtest(job_id: str):
+    """Get progress and results so far for a batch job.
+    
+    Query Parameters:
+        - offset (int): Skip this many results (default: 0)
+    """
+    job = batch_manager.get(job_id)
+    if job is None:
+        return create_error_response(f'Batch job not found: {job_id}', 404)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    response = job.progress()
+    response['success'] = True
+    response['offset'] = offset
+    response['results'] = job.results[offset:]
+    return jsonify(response)
+
+@app.route('/api/backtest/batch/<job_id>/stream')
+def stream_batch_backtest(job_id: str):
+    """Stream a batch job's per-ticker results as NDJSON as they finish.
+    
+    The last line is the job's final progress summary.
+    """
+    job = batch_manager.get(job_id)
+    if job is None:
+        return create_error_response(f'Batch job not found: {job_id}', 404)
+    
+    def generate():
+        for result in job.iter_results():
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'summary': job.progress()}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/risk/simulate', methods=['POST'])
+@rate_limit(limit=10)
+def simulate_risk():
+    """API endpoint for Monte Carlo / bootstrap VaR, CVaR and outcome distributions.
+    
+    Simulates future paths from one of three return histories: a ticker,
+    a weighted portfolio (``tickers``), or a strategy backtest on a ticker
+    (``strategyType``).
+    
+    JSON Body:
+        - ticker (str) or tickers (list): Ticker symbol(s)
+        - weights (list|dict): Portfolio weights (default: equal weights)
+        - strategyType (str), strategyParams (dict): Simulate a strategy's
+          backtest returns on ``ticker`` instead of buy-and-hold
+        - start_date, end_date (str): History range in YYYY-MM-DD format, or
+        - days_back (int): Days of history back from today (default: 1825)
+        - method (str): 'bootstrap' (block bootstrap) or 'gbm' (default: bootstrap)
+        - paths (int): Number of simulated paths (default: 10000)
+        - horizon (int): Trading days simulated (default: 252)
+        - block_size (int): Bootstrap block length in days (default: 5)
+        - confidence_levels (list): VaR / CVaR levels (default: [0.95, 0.99])
+        - initial_value (float): Starting value for the bands (default: 10000)
+        - seed (int): Seed for reproducible results
+    
+    Query Parameters:
+        - stream (str): 'ndjson' to stream running VaR / CVaR per chunk of
+          paths; the last line is the full summary
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        stream_mode = get_stream_mode()
+        tickers = body.get('tickers')
+        ticker = body.get('ticker')
+        if tickers is not None:
+            if not isinstance(tickers, list) or not tickers:
+                return create_error_response('tickers must be a non-empty list')
+            tickers = [str(t).strip().upper() for t in tickers if str(t).strip()]
+        elif ticker:
+            tickers = [str(ticker).strip().upper()]
+        else:
+            return create_error_response('Missing required field: ticker or tickers')
+        invalid_tickers = [t for t in tickers if not validate_ticker(t)]
+        if invalid_tickers:
+            return create_error_response(f'Invalid ticker format: {", ".join(invalid_tickers)}')
+        strategy_type = body.get('strategyType')
+        if strategy_type and len(tickers) != 1:
+            return create_error_response('strategyType requires a single ticker')
+        
+        start_date = body.get('start_date')
+        end_date = body.get('end_date')
+        if not start_date or not end_date:
+            days_back = int(body.get('days_back', 1825))
+            if days_back <= 1 or days_back > 7300:
+                return create_error_response("days_back must be between 2 and 7300")
+            start_date, end_date = recent_date_range(days_back)
+        else:
+            if not validate_date_format(start_date) or not validate_date_format(end_date):
+                return create_error_response("Dates must be in YYYY-MM-DD format")
+            if start_date >= end_date:
+                return create_error_response("start_date must be before end_date")
+        
+        try:
+            options = {
+                'method': str(body.get('method', 'bootstrap')).lower(),
+                'paths': int(body.get('paths', 10000)),
+                'horizon': int(body.get('horizon', 252)),
+                'block_size': int(body.get('block_size', 5)),
+                'seed': int(body['seed']) if body.get('seed') is not None else None,
+                'confidence_levels': [float(level) for level in body.get('confidence_levels') or []] or None,
+                'initial_value': float(body.get('initial_value', 10000))
+            }
+        except (TypeError, ValueError):
+            return create_error_response('paths, horizon, block_size, seed, confidence_levels and initial_value must be numbers')
+        if options['initial_value'] <= 0:
+            return create_error_response('initial_value must be positive')
+        
+        with stage('transform'):
+            if strategy_type:
+                returns = strategy_returns(tickers[0], strategy_type, body.get('strategyParams'), start_date, end_date)
+            else:
+                returns = portfolio_returns(tickers, start_date, end_date, body.get('weights'))
+        source = {
+            'tickers': tickers,
+            'strategyType': strategy_type.upper() if strategy_type else None,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+        logger.info(f"🎲 Risk simulation for {', '.join(tickers)} ({options['method']}, {options['paths']} paths)")
+        
+        if stream_mode == 'ndjson':
+            # Validate before the response starts so bad input still gets a 400
+            items = iter_simulation(returns, **options)
+            
+            def generate():
+                for item in items:
+                    if item['type'] == 'summary':
+                        item['source'] = source
+                        item['success'] = True
+                    yield json.dumps(item) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        result = run_simulation(returns, **options)
+        result['source'] = source
+        result['success'] = True
+        with stage('jsonify'):
+            return jsonify(result)
+        
+    except ValueError as ve:
+        return create_error_response(str(ve))
+    except Exception as e:
+        logger.exception(f"Unexpected error in simulate_risk: {str(e)}")
         return create_error_response(f'Internal server error: {str(e)}', 500)
 
 @app.route('/api/cache/info')
@@ -257,6 +944,9 @@ def get_cache_status():
     """Get cache information."""
     try:
         cache_info = get_cache_info()
+        cache_info['encoded_payloads'] = get_encoded_cache_info()
+        cache_info['indicators'] = get_indicator_cache_info()
+        cache_info['aligned_closes'] = get_aligned_cache_info()
         cache_info['success'] = True
         return jsonify(cache_info)
     except Exception as e:
@@ -267,6 +957,9 @@ def clear_data_cache():
     """Clear the data cache."""
     try:
         clear_cache()
+        clear_encoded_cache()
+        clear_indicator_cache()
+        clear_aligned_cache()
         return jsonify({
             'success': True,
             'message': 'Cache cleared successfully',
@@ -275,14 +968,104 @@ def clear_data_cache():
     except Exception as e:
         return create_error_response(f'Error clearing cache: {str(e)}', 500)
 
+@app.route('/api/cache/warmer')
+def get_cache_warmer():
+    """Get the background cache warmer's configuration and metrics."""
+    info = get_warmer_info()
+    info['success'] = True
+    return jsonify(info)
+
+@app.route('/api/cache/warmer', methods=['POST'])
+def update_cache_warmer():
+    """Replace the warmer watchlist.
+    
+    JSON Body:
+        - watchlist (list): Ticker symbols to keep warm
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        watchlist = body.get('watchlist')
+        if not isinstance(watchlist, list):
+            return create_error_response('watchlist must be a list of tickers')
+        
+        tickers = [str(ticker).strip().upper() for ticker in watchlist if str(ticker).strip()]
+        invalid_tickers = [ticker for ticker in tickers if not validate_ticker(ticker)]
+        if invalid_tickers:
+            return create_error_response(f'Invalid ticker format: {", ".join(invalid_tickers)}')
+        if len(tickers) > MAX_TICKERS_PER_REQUEST:
+            return create_error_response(f'Maximum {MAX_TICKERS_PER_REQUEST} tickers allowed in the watchlist')
+        
+        set_warm_watchlist(tickers)
+        info = get_warmer_info()
+        info['success'] = True
+        return jsonify(info)
+    except Exception as e:
+        logger.exception(f"Unexpected error in update_cache_warmer: {str(e)}")
+        return create_error_response(f'Internal server error: {str(e)}', 500)
+
+def _collect_runtime_metrics() -> None:
+    """Refresh scrape-time gauges from the cache tiers and the process."""
+    cache_info = get_cache_info()
+    tiers = {
+        'memory': cache_info,
+        'shared': cache_info['shared_cache'],
+        'negative': cache_info['negative_cache'],
+        'reduced': cache_info['reduced'],
+        'encoded': get_encoded_cache_info(),
+        'indicators': get_indicator_cache_info(),
+        'aligned': get_aligned_cache_info()
+    }
+    for tier, info in tiers.items():
+        if 'hits' not in info:
+            continue
+        CACHE_HIT_RATIO.set(info['hit_ratio'], tier=tier)
+        CACHE_LOOKUPS.set(info['hits'], tier=tier, result='hit')
+        CACHE_LOOKUPS.set(info['misses'], tier=tier, result='miss')
+        CACHE_BYTES.set(info['current_bytes'], tier=tier)
+    memory = process_memory()
+    if 'rss_bytes' in memory:
+        PROCESS_MEMORY.set(memory['rss_bytes'], kind='resident')
+    if 'peak_rss_bytes' in memory:
+        PROCESS_MEMORY.set(memory['peak_rss_bytes'], kind='peak_resident')
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Prometheus text exposition of request, stage, cache and upstream metrics."""
+    try:
+        _collect_runtime_metrics()
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        logger.exception(f"Unexpected error in get_metrics: {str(e)}")
+        return create_error_response(f'Error collecting metrics: {str(e)}', 500)
+
+@app.route('/api/metrics/profiles/<profile_id>')
+def get_profile(profile_id: str):
+    """Return a request profile as collapsed stacks (flame graph input).
+
+    Query Parameters:
+        - format (str): 'json' (default) or 'collapsed' for plain text
+    """
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return create_error_response(f'Profile not found: {profile_id}', 404)
+    if request.args.get('format') == 'collapsed':
+        return Response(profile['collapsed'], mimetype='text/plain')
+    return jsonify(dict(profile, success=True, profile_id=profile_id))
+
 @app.route('/api/health')
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint.
+    
+    Reports 'degraded' while any upstream circuit breaker is not closed.
+    """
+    upstreams = get_upstream_health()
+    degraded = any(breaker['state'] != 'closed' for breaker in upstreams.values())
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if degraded else 'healthy',
         'service': 'FinRus Historical Data API',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'upstreams': upstreams
     })
 
 @app.errorhandler(404)
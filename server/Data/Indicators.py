@@ -0,0 +1,351 @@
+import os
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from Backtest import sma
+from DataCache import DataCache
+from PriceSeries import PriceSeries
+from YahooData import get_price_series
+
+logger = logging.getLogger(__name__)
+
+# Computed indicators and their rolling state outlive the price cache so new
+# bars can be folded in incrementally instead of recomputing the history
+INDICATOR_CACHE_SECONDS = float(os.environ.get('FINRUS_INDICATOR_CACHE_SECONDS', 24 * 60 * 60))
+INDICATOR_CACHE_MAX_BYTES = int(os.environ.get('FINRUS_INDICATOR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+_results = DataCache(max_bytes=INDICATOR_CACHE_MAX_BYTES, ttl_seconds=INDICATOR_CACHE_SECONDS)
+
+MAX_INDICATORS_PER_REQUEST = 10
+MAX_PERIOD = 500
+
+Columns = Dict[str, np.ndarray]
+
+# ---------------------------------------------------------------------------
+# Streaming building blocks. Each takes the previous state (None to start)
+# and a block of new values, and returns (outputs for the block, new state),
+# so running once over a full history or block by block gives the same result.
+# ---------------------------------------------------------------------------
+
+def _ewm_from(previous: float, values: np.ndarray, alpha: float) -> np.ndarray:
+    """Continue ``y = (1 - alpha) * y + alpha * x`` from ``previous`` over ``values``."""
+    if not len(values):
+        return np.empty(0)
+    seeded = pd.Series(np.concatenate(([previous], values)))
+    return seeded.ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+def _smooth_run(values: np.ndarray, period: int, alpha: float, state: Optional[Tuple]) -> Tuple[np.ndarray, Optional[Tuple]]:
+    """Exponential smoothing seeded with the mean of the first ``period`` values.
+
+    Leading NaNs (warm-up of an upstream indicator) are skipped. The state
+    is ``('seed', pending_values)`` until enough values arrived, then
+    ``('value', last_smoothed)``.
+    """
+    out = np.full(len(values), np.nan)
+    if state is not None and state[0] == 'value':
+        out[:] = _ewm_from(state[1], values, alpha)
+        return out, (('value', out[-1]) if len(values) else state)
+
+    pending = state[1] if state is not None else np.empty(0)
+    if len(pending):
+        start = 0
+    else:
+        valid = np.flatnonzero(~np.isnan(values))
+        if not len(valid):
+            return out, state
+        start = valid[0]
+    sequence = np.concatenate((pending, values[start:]))
+    if len(sequence) < period:
+        return out, ('seed', sequence)
+    first = start + period - 1 - len(pending)
+    seed = sequence[:period].mean()
+    out[first] = seed
+    out[first + 1:] = _ewm_from(seed, sequence[period:], alpha)
+    return out, ('value', out[-1])
+
+def _window_run(values: np.ndarray, period: int, tail: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Extend the last ``period - 1`` values with a new block; returns (extended, new tail)."""
+    extended = np.concatenate((tail if tail is not None else np.empty(0), values))
+    return extended, extended[max(0, len(extended) - (period - 1)):]
+
+def _with_previous(close: np.ndarray, last_close: Optional[float]) -> np.ndarray:
+    """Previous close for each bar (NaN for the very first bar)."""
+    if not len(close):
+        return close
+    return np.concatenate(([np.nan if last_close is None else last_close], close[:-1]))
+
+# ---------------------------------------------------------------------------
+# Indicators: run(columns, params, state) -> (outputs, state)
+# ---------------------------------------------------------------------------
+
+def _run_sma(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    (period,) = params
+    extended, tail = _window_run(columns['Close'], period, state)
+    return {'sma': sma(extended, period)[len(extended) - len(columns['Close']):]}, tail
+
+def _run_ema(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    (period,) = params
+    values, state = _smooth_run(columns['Close'], period, 2.0 / (period + 1), state)
+    return {'ema': values}, state
+
+def _run_rsi(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    """Wilder RSI: gains and losses smoothed with ``alpha = 1 / period``."""
+    (period,) = params
+    close = columns['Close']
+    last_close, gain_state, loss_state = state or (None, None, None)
+    changes = close - _with_previous(close, last_close)
+    with np.errstate(invalid='ignore'):
+        gains = np.where(np.isnan(changes), np.nan, np.maximum(changes, 0.0))
+        losses = np.where(np.isnan(changes), np.nan, np.maximum(-changes, 0.0))
+    avg_gain, gain_state = _smooth_run(gains, period, 1.0 / period, gain_state)
+    avg_loss, loss_state = _smooth_run(losses, period, 1.0 / period, loss_state)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), values)
+    last = close[-1] if len(close) else last_close
+    return {'rsi': values}, (last, gain_state, loss_state)
+
+def _run_macd(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    fast, slow, signal_period = params
+    close = columns['Close']
+    fast_state, slow_state, signal_state = state or (None, None, None)
+    fast_ema, fast_state = _smooth_run(close, fast, 2.0 / (fast + 1), fast_state)
+    slow_ema, slow_state = _smooth_run(close, slow, 2.0 / (slow + 1), slow_state)
+    macd = fast_ema - slow_ema
+    signal, signal_state = _smooth_run(macd, signal_period, 2.0 / (signal_period + 1), signal_state)
+    return {'macd': macd, 'signal': signal, 'histogram': macd - signal}, (fast_state, slow_state, signal_state)
+
+def _run_bbands(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    period, width = params
+    count = len(columns['Close'])
+    extended, tail = _window_run(columns['Close'], period, state)
+    middle = np.full(count, np.nan)
+    deviation = np.full(count, np.nan)
+    if len(extended) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(extended, period)[-count:] if count else np.empty((0, period))
+        middle[len(middle) - len(windows):] = windows.mean(axis=1)
+        deviation[len(deviation) - len(windows):] = windows.std(axis=1)
+    return {'middle': middle, 'upper': middle + width * deviation, 'lower': middle - width * deviation}, tail
+
+def _run_atr(columns: Columns, params: Tuple, state: Optional[Any]) -> Tuple[Columns, Any]:
+    """Wilder ATR over true ranges; the first bar has no true range."""
+    (period,) = params
+    high, low, close = columns['High'], columns['Low'], columns['Close']
+    last_close, atr_state = state or (None, None)
+    previous = _with_previous(close, last_close)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+    values, atr_state = _smooth_run(true_range, period, 1.0 / period, atr_state)
+    last = close[-1] if len(close) else last_close
+    return {'atr': values}, (last, atr_state)
+
+class IndicatorDef:
+    """Parameters, defaults, warm-up and implementation of one indicator."""
+
+    def __init__(self, params: Tuple[str, ...], defaults: Tuple, warmup: Callable[[Tuple], int], run: Callable, columns: Tuple[str, ...] = ('Close',)):
+        self.params = params
+        self.defaults = defaults
+        self.warmup = warmup
+        self.run = run
+        self.columns = columns
+
+INDICATORS: Dict[str, IndicatorDef] = {
+    'sma': IndicatorDef(('period',), (20,), lambda p: p[0], _run_sma),
+    'ema': IndicatorDef(('period',), (20,), lambda p: 3 * p[0], _run_ema),
+    'rsi': IndicatorDef(('period',), (14,), lambda p: 5 * p[0], _run_rsi),
+    'macd': IndicatorDef(('fast', 'slow', 'signal'), (12, 26, 9), lambda p: 3 * p[1] + p[2], _run_macd),
+    'bbands': IndicatorDef(('period', 'width'), (20, 2.0), lambda p: p[0], _run_bbands),
+    'atr': IndicatorDef(('period',), (14,), lambda p: 5 * p[0], _run_atr, ('High', 'Low', 'Close'))
+}
+
+class IndicatorSpec:
+    """One requested indicator with its parameters, e.g. ``macd:12:26:9``."""
+
+    __slots__ = ('name', 'params')
+
+    def __init__(self, name: str, params: Tuple):
+        self.name = name
+        self.params = params
+
+    @property
+    def key(self) -> str:
+        """Response and cache key, e.g. ``'bbands_20_2'``."""
+        return '_'.join([self.name] + [f'{p:g}' if isinstance(p, float) else str(p) for p in self.params])
+
+    @property
+    def definition(self) -> IndicatorDef:
+        return INDICATORS[self.name]
+
+def parse_indicator_specs(text: str) -> List[IndicatorSpec]:
+    """Parse ``'sma:20,rsi,macd:12:26:9'``; omitted parameters take their defaults.
+
+    RAISES:
+        ValueError: If an indicator is unknown or its parameters are invalid.
+    """
+    specs = []
+    for item in (text or '').split(','):
+        if not item.strip():
+            continue
+        name, *raw = [part.strip() for part in item.strip().lower().split(':')]
+        definition = INDICATORS.get(name)
+        if definition is None:
+            raise ValueError(f"Unknown indicator '{name}'. Available: {', '.join(INDICATORS)}")
+        if len(raw) > len(definition.params):
+            raise ValueError(f"Indicator '{name}' takes at most {len(definition.params)} parameters ({', '.join(definition.params)})")
+        params = []
+        for default, value, label in zip(definition.defaults, raw + [None] * len(definition.defaults), definition.params):
+            if value is None or value == '':
+                params.append(default)
+                continue
+            try:
+                parsed = type(default)(value)
+            except ValueError:
+                raise ValueError(f"Indicator '{name}' parameter '{label}' must be a number")
+            if parsed <= 0 or (isinstance(parsed, int) and parsed > MAX_PERIOD):
+                raise ValueError(f"Indicator '{name}' parameter '{label}' must be between 1 and {MAX_PERIOD}")
+            params.append(parsed)
+        if name == 'macd' and params[0] >= params[1]:
+            raise ValueError("MACD fast period must be shorter than the slow period")
+        specs.append(IndicatorSpec(name, tuple(params)))
+    if not specs:
+        raise ValueError('No indicators requested')
+    if len(specs) > MAX_INDICATORS_PER_REQUEST:
+        raise ValueError(f'Maximum {MAX_INDICATORS_PER_REQUEST} indicators allowed per request')
+    return list({spec.key: spec for spec in specs}.values())
+
+class IndicatorResult:
+    """Indicator values over a price history plus the state to extend them.
+
+    ``values`` is a PriceSeries of the indicator outputs sharing the price
+    dates. ``close`` is kept to detect revised bars before extending.
+    """
+
+    __slots__ = ('values', 'close', 'state')
+
+    def __init__(self, values: PriceSeries, close: np.ndarray, state: Any):
+        self.values = values
+        self.close = close
+        self.state = state
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.close.nbytes
+
+    def prefix_of(self, series: PriceSeries) -> bool:
+        """True when ``series`` starts with the same bars this result was computed on.
+
+        The whole overlapping prefix is compared, so a revised bar anywhere in
+        history (e.g. a split adjustment) forces a full recompute.
+        """
+        n = min(len(series), len(self.values))
+        if not n:
+            return False
+        return (
+            np.array_equal(series.dates[:n], self.values.dates[:n])
+            and np.array_equal(series.columns['Close'][:n], self.close[:n], equal_nan=True)
+        )
+
+_stats_lock = threading.Lock()
+_stats = {'reused': 0, 'incremental_updates': 0, 'full_computes': 0, 'bars_computed': 0}
+
+def _count(counter: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[counter] += amount
+
+def compute_indicator(spec: IndicatorSpec, series: PriceSeries, previous: Optional[IndicatorResult] = None) -> Tuple[IndicatorResult, str]:
+    """Compute an indicator over ``series``, extending ``previous`` when possible.
+
+    RETURNS:
+        tuple: ``(result, how)`` where ``how`` is 'cached', 'incremental' or 'full'.
+    """
+    definition = spec.definition
+    if previous is not None and previous.prefix_of(series):
+        known = len(previous.values)
+        if len(series) <= known:
+            _count('reused')
+            return previous, 'cached'
+        new_columns = {name: series.columns[name][known:] for name in definition.columns}
+        outputs, state = definition.run(new_columns, spec.params, previous.state)
+        values = PriceSeries(series.dates, {
+            name: np.concatenate((previous.values.columns[name], block)) for name, block in outputs.items()
+        })
+        _count('incremental_updates')
+        _count('bars_computed', len(series) - known)
+        return IndicatorResult(values, series.columns['Close'], state), 'incremental'
+
+    outputs, state = definition.run({name: series.columns[name] for name in definition.columns}, spec.params, None)
+    _count('full_computes')
+    _count('bars_computed', len(series))
+    return IndicatorResult(PriceSeries(series.dates, outputs), series.columns['Close'], state), 'full'
+
+def anchor_date(start_date: str, warmup_bars: int) -> str:
+    """Start of the history indicators are computed from.
+
+    Steps back far enough for the warm-up (about 1.5 calendar days per
+    bar) and then to January 1st, so requests whose start drifts day by
+    day share one cached history that is extended as bars are appended.
+    """
+    earliest = np.datetime64(start_date, 'D') - np.timedelta64(int(warmup_bars * 1.5) + 10, 'D')
+    return f'{str(earliest.astype("datetime64[Y]"))}-01-01'
+
+def get_indicators(
+    ticker: str,
+    specs: List[IndicatorSpec],
+    start_date: str,
+    end_date: str,
+    use_cache: bool = True
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Compute indicators for a ticker over ``[start_date, end_date)``.
+
+    Indicators are computed over the cached price series from
+    ``anchor_date`` and memoized per (ticker, indicator, params, anchor).
+    When later requests see appended bars, only the new bars are run
+    through each indicator's saved rolling state.
+
+    RETURNS:
+        tuple: ``(data, metadata)``. ``data`` holds the 'dates' and, under
+            'indicators', one dict of output columns per indicator key; it
+            is None when no bars exist.
+
+    RAISES:
+        ValueError: If ticker is invalid or dates are malformed.
+    """
+    ticker = ticker.upper().strip()
+    anchor = anchor_date(start_date, max(spec.definition.warmup(spec.params) for spec in specs))
+    series = get_price_series(ticker, anchor, end_date, use_cache=use_cache)
+    metadata = {'start_date': start_date, 'end_date': end_date, 'anchor_date': anchor}
+    if series is None:
+        metadata.update({'data_points': 0, 'error': f'No data available for {ticker}'})
+        return None, metadata
+
+    indicators = {}
+    computed = {}
+    dates = []
+    for spec in specs:
+        key = (ticker, spec.key, anchor)
+        previous = _results.get(key) if use_cache else None
+        result, how = compute_indicator(spec, series, previous)
+        if how != 'cached' and use_cache:
+            _results.set(key, result, size=result.nbytes)
+        window = result.values.slice(start_date, end_date)
+        columns = window.column_lists()
+        dates = columns.pop('Date')
+        indicators[spec.key] = columns
+        computed[spec.key] = how
+    metadata.update({
+        'data_points': len(dates),
+        'computed': computed,
+        'stale': bool(series.attrs.get('stale', False))
+    })
+    return {'dates': dates, 'indicators': indicators}, metadata
+
+def clear_indicator_cache() -> int:
+    """Drop every memoized indicator result."""
+    return _results.clear()
+
+def get_indicator_cache_info() -> Dict[str, Any]:
+    """Cache occupancy plus reused / incremental / full computation counters."""
+    info = _results.info()
+    with _stats_lock:
+        info.update(_stats)
+    return info
@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import uuid
+import bisect
+import threading
+import logging
+from collections import OrderedDict, Counter as _TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Callable
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f'{self.name}{_format_labels(k)} {_format_value(v)}' for k, v in self._values.items()]
+
+class Gauge(Counter):
+    """Value that can go up and down, with optional labels."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One count per bucket, then +Inf, sum and count
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(key, ("le", _format_value(bound)))} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {repr(series[-2])}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {series[-1]}')
+        return lines
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together for scraping."""
+
+    def __init__(self):
+        self._metrics: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram('finrus_stage_seconds', 'Time spent per hot-path stage')
+REQUEST_SECONDS = registry.histogram('finrus_request_seconds', 'HTTP request latency by route')
+REQUESTS_TOTAL = registry.counter('finrus_requests_total', 'HTTP requests by route and status')
+REQUESTS_IN_FLIGHT = registry.gauge('finrus_requests_in_flight', 'HTTP requests currently being handled')
+UPSTREAM_REQUESTS = registry.counter('finrus_upstream_requests_total', 'Upstream provider calls by outcome')
+UPSTREAM_RETRIES = registry.counter('finrus_upstream_retries_total', 'Upstream provider retries')
+
+# Stage timings for the current request, reported back in a Server-Timing header
+_request_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('finrus_request_stages', default=None)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into ``finrus_stage_seconds`` and the current request's stages."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((name, elapsed))
+
+def begin_request_stages() -> None:
+    """Start collecting stage timings for the request on this context."""
+    _request_stages.set([])
+
+def end_request_stages() -> List[Tuple[str, float]]:
+    """Stop collecting and return ``(stage, seconds)`` pairs, summed per stage."""
+    stages = _request_stages.get() or []
+    _request_stages.set(None)
+    totals: 'OrderedDict[str, float]' = OrderedDict()
+    for name, elapsed in stages:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return list(totals.items())
+
+def in_current_context(fn: Callable) -> Callable:
+    """Wrap ``fn`` to run in the caller's context, e.g. when submitted to a thread pool.
+
+    Worker threads start with an empty context, so stages they time would
+    otherwise never reach the request. Each call runs in its own copy (a
+    context can only be entered by one thread at a time); the copies share
+    the request's stage list.
+    """
+    context = copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+def server_timing_header(stages: List[Tuple[str, float]]) -> str:
+    """Format stage timings as a ``Server-Timing`` header value (milliseconds)."""
+    return ', '.join(f'{name};dur={elapsed * 1000:.2f}' for name, elapsed in stages)
+
+def process_memory() -> Dict[str, int]:
+    """Resident and peak resident memory of this process in bytes."""
+    memory = {}
+    try:
+        with open('/proc/self/statm') as f:
+            memory['rss_bytes'] = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        memory['peak_rss_bytes'] = peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        pass
+    return memory
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval.
+
+    Produces collapsed stacks (``outer;inner count``) that flame graph
+    tools read directly. Used for single requests, so it only runs while
+    a request asks for it.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: _TallyCounter = _TallyCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='finrus-profiler', daemon=True)
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def collapsed(self) -> str:
+        return '\n'.join(f'{stack} {count}' for stack, count in self.samples.most_common()) + '\n'
+
+class ProfileStore:
+    """Keeps the most recent request profiles in memory by id."""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:12]
+
+    def add(self, route: str, profiler: SamplingProfiler, profile_id: Optional[str] = None) -> str:
+        """Store a stopped profiler's samples, under ``profile_id`` if one was handed out already."""
+        profile_id = profile_id or self.new_id()
+        with self._lock:
+            self._profiles[profile_id] = {
+                'route': route,
+                'duration_seconds': round(profiler.duration, 6),
+                'samples': sum(profiler.samples.values()),
+                'interval_seconds': profiler.interval,
+                'collapsed': profiler.collapsed()
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+profiles = ProfileStore()
@@ -0,0 +1,246 @@
+import numpy as np
+import os
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, List, Tuple
+from Backtest import sma, rsi, sma_crossover_signals, rsi_signals, run_backtest, STRATEGY_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+MAX_SWEEP_COMBINATIONS = 20000
+MAX_SWEEP_WORKERS = int(os.environ.get('FINRUS_SWEEP_WORKERS', os.cpu_count() or 1))
+# Below this many combinations a process pool costs more than it saves
+MIN_PARALLEL_COMBINATIONS = 64
+CHUNK_SIZE = 256
+
+# Which parameter drives each indicator column, per strategy
+PERIOD_PARAMS = {
+    'SMA': ('shortPeriod', 'longPeriod'),
+    'RSI': ('period',)
+}
+
+SORTABLE_METRICS = {
+    'sharpeRatio': True,
+    'totalReturn': True,
+    'winRate': True,
+    'finalCapital': True,
+    'maxDrawdown': False,
+    'totalTrades': True
+}
+
+# Worker-side views onto the shared price/indicator block
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_close: Optional[np.ndarray] = None
+_worker_indicators: Optional[np.ndarray] = None
+_worker_rows: Dict[int, int] = {}
+
+def _expand_values(name: str, spec: Any) -> List[float]:
+    """Turn a list, scalar or ``{start, stop, step}`` spec into a list of values."""
+    if isinstance(spec, dict):
+        try:
+            start, stop = float(spec['start']), float(spec['stop'])
+            step = float(spec.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'{name} range needs numeric start and stop')
+        if step <= 0:
+            raise ValueError(f'{name} step must be positive')
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count <= 0:
+            raise ValueError(f'{name} range is empty')
+        return [start + i * step for i in range(count)]
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError(f'{name} list is empty')
+        return spec
+    return [spec]
+
+def expand_grid(strategy_type: str, param_ranges: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the list of parameter combinations to evaluate.
+
+    Parameters missing from ``param_ranges`` use the strategy defaults.
+    SMA combinations where the short period is not below the long period
+    are skipped.
+
+    RAISES:
+        ValueError: If the strategy or ranges are invalid or the grid is too large.
+    """
+    strategy_type = (strategy_type or '').upper()
+    if strategy_type not in STRATEGY_DEFAULTS:
+        raise ValueError('Invalid strategy type')
+    unknown = set(param_ranges or {}) - set(STRATEGY_DEFAULTS[strategy_type])
+    if unknown:
+        raise ValueError(f'Unknown parameters for {strategy_type}: {", ".join(sorted(unknown))}')
+
+    names = list(STRATEGY_DEFAULTS[strategy_type])
+    axes = []
+    for name in names:
+        values = _expand_values(name, (param_ranges or {}).get(name, STRATEGY_DEFAULTS[strategy_type][name]))
+        if name in PERIOD_PARAMS[strategy_type]:
+            values = sorted({int(round(float(v))) for v in values})
+            if values[0] <= 0:
+                raise ValueError(f'{name} values must be positive')
+        else:
+            values = [float(v) for v in values]
+        axes.append(values)
+
+    size = int(np.prod([len(a) for a in axes]))
+    if size > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f'Sweep has {size} combinations; maximum is {MAX_SWEEP_COMBINATIONS}')
+
+    combos = [dict(zip(names, values)) for values in itertools.product(*axes)]
+    if strategy_type == 'SMA':
+        combos = [c for c in combos if c['shortPeriod'] < c['longPeriod']]
+    if not combos:
+        raise ValueError('Parameter ranges produce no valid combinations')
+    return combos
+
+def _indicator_matrix(close: np.ndarray, strategy_type: str, combos: List[Dict[str, Any]]) -> Tuple[np.ndarray, Dict[int, int]]:
+    """Compute each distinct indicator period once; returns ``(matrix, period -> row)``."""
+    periods = sorted({c[p] for c in combos for p in PERIOD_PARAMS[strategy_type]})
+    compute = sma if strategy_type == 'SMA' else rsi
+    matrix = np.empty((len(periods), len(close)))
+    for row, period in enumerate(periods):
+        matrix[row] = compute(close, period)
+    return matrix, {period: row for row, period in enumerate(periods)}
+
+def _evaluate(
+    close: np.ndarray,
+    indicators: np.ndarray,
+    rows: Dict[int, int],
+    strategy_type: str,
+    combos: List[Dict[str, Any]],
+    initial_capital: float
+) -> List[Dict[str, Any]]:
+    """Run one backtest per combination using precomputed indicator rows."""
+    results = []
+    for combo in combos:
+        if strategy_type == 'SMA':
+            signals = sma_crossover_signals(
+                close, combo['shortPeriod'], combo['longPeriod'],
+                short_sma=indicators[rows[combo['shortPeriod']]],
+                long_sma=indicators[rows[combo['longPeriod']]]
+            )
+        else:
+            signals = rsi_signals(
+                close, combo['period'], combo['oversold'], combo['overbought'],
+                rsi_values=indicators[rows[combo['period']]]
+            )
+        metrics = run_backtest(close, signals, initial_capital, detail=False)
+        metrics['params'] = combo
+        results.append(metrics)
+    return results
+
+def _attach_shared(shm_name: str, shape: Tuple[int, int], rows: Dict[int, int]) -> None:
+    """Process-pool initializer: map the shared block instead of unpickling arrays."""
+    global _worker_shm, _worker_close, _worker_indicators, _worker_rows
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_close = block[0]
+    _worker_indicators = block[1:]
+    _worker_rows = rows
+
+def _evaluate_shared(strategy_type: str, combos: List[Dict[str, Any]], initial_capital: float) -> List[Dict[str, Any]]:
+    """Worker entry point evaluating a chunk against the shared block."""
+    return _evaluate(_worker_close, _worker_indicators, _worker_rows, strategy_type, combos, initial_capital)
+
+def _chunk_by_period(strategy_type: str, combos: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split combos into chunks, keeping combinations that share a period together."""
+    key = PERIOD_PARAMS[strategy_type][-1]
+    ordered = sorted(combos, key=lambda c: c[key])
+    return [ordered[i:i + CHUNK_SIZE] for i in range(0, len(ordered), CHUNK_SIZE)]
+
+def run_sweep(
+    close: np.ndarray,
+    strategy_type: str,
+    param_ranges: Dict[str, Any],
+    initial_capital: float = 10000,
+    sort_by: str = 'sharpeRatio',
+    limit: int = 50,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """Evaluate a grid of strategy parameters over one price series.
+
+    Indicator columns are computed once per distinct period. The close
+    series and indicator matrix are placed in one shared-memory block that
+    pool workers map on start-up, so each task only ships its parameter
+    combinations.
+
+    ARGS:
+        close (ndarray): Closing prices in date order.
+        strategy_type (str): 'SMA' or 'RSI'.
+        param_ranges (dict): Per-parameter list, scalar or {start, stop, step}.
+        initial_capital (float): Starting cash for every backtest.
+        sort_by (str): Metric to rank by (maxDrawdown ranks ascending).
+        limit (int): Number of ranked rows to return.
+        workers (int): Process count; defaults to FINRUS_SWEEP_WORKERS.
+
+    RETURNS:
+        dict: Ranked results plus sweep statistics.
+
+    RAISES:
+        ValueError: If the strategy, ranges or sort metric are invalid.
+    """
+    if sort_by not in SORTABLE_METRICS:
+        raise ValueError(f'sort_by must be one of: {", ".join(SORTABLE_METRICS)}')
+    strategy_type = (strategy_type or '').upper()
+    combos = expand_grid(strategy_type, param_ranges)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    indicators, rows = _indicator_matrix(close, strategy_type, combos)
+
+    workers = max(1, min(workers or MAX_SWEEP_WORKERS, MAX_SWEEP_WORKERS))
+    chunks = _chunk_by_period(strategy_type, combos)
+    if workers == 1 or len(combos) < MIN_PARALLEL_COMBINATIONS:
+        results = _evaluate(close, indicators, rows, strategy_type, combos, initial_capital)
+        workers = 1
+    else:
+        results = _run_parallel(close, indicators, rows, strategy_type, chunks, initial_capital, workers)
+
+    descending = SORTABLE_METRICS[sort_by]
+    worst = -np.inf if descending else np.inf
+    results.sort(key=lambda r: r[sort_by] if np.isfinite(r[sort_by]) else worst, reverse=descending)
+    for rank, row in enumerate(results, start=1):
+        row['rank'] = rank
+
+    return {
+        'strategyType': strategy_type,
+        'combinations': len(combos),
+        'indicator_columns': len(rows),
+        'workers': workers,
+        'sort_by': sort_by,
+        'results': results[:max(1, limit)]
+    }
+
+def _run_parallel(
+    close: np.ndarray,
+    indicators: np.ndarray,
+    rows: Dict[int, int],
+    strategy_type: str,
+    chunks: List[List[Dict[str, Any]]],
+    initial_capital: float,
+    workers: int
+) -> List[Dict[str, Any]]:
+    """Fan chunks out over a process pool that shares the price block."""
+    shape = (1 + len(indicators), len(close))
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        block[0] = close
+        block[1:] = indicators
+        # Drop the parent's view so the segment can be closed cleanly
+        del block
+        logger.info(f"🧮 Sweeping {sum(len(c) for c in chunks)} combinations on {workers} workers")
+        # Spawn, not fork: the API process runs threads whose held locks a forked
+        # child would inherit; workers only need the shared block's name
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_attach_shared, initargs=(shm.name, shape, rows)) as pool:
+            futures = [pool.submit(_evaluate_shared, strategy_type, chunk, initial_capital) for chunk in chunks]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+        return results
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,251 @@
+import os
+import logging
+import numpy as np
+from functools import reduce
+from typing import Optional, Dict, Any, List, Tuple, Union
+from Backtest import equity_metrics, TRADING_DAYS_PER_YEAR
+from DataCache import DataCache
+from YahooData import get_price_series_many
+
+logger = logging.getLogger(__name__)
+
+# Aligned close matrices are rebuilt only when one of their source series changes
+ALIGNED_CACHE_SECONDS = 300
+ALIGNED_CACHE_MAX_BYTES = int(os.environ.get('FINRUS_ALIGNED_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+_aligned = DataCache(max_bytes=ALIGNED_CACHE_MAX_BYTES, ttl_seconds=ALIGNED_CACHE_SECONDS)
+
+DEFAULT_BENCHMARK = 'SPY'
+DEFAULT_ROLLING_WINDOW = 63  # about one quarter of trading days
+MAX_PORTFOLIO_TICKERS = 50
+
+class AlignedCloses:
+    """Closes of several tickers on their shared trading dates.
+
+    ``matrix`` is a read-only (dates x tickers) float64 array; a date is
+    kept only when every ticker has a bar on it.
+    """
+
+    __slots__ = ('dates', 'tickers', 'matrix', 'dropped')
+
+    def __init__(self, dates: np.ndarray, tickers: List[str], matrix: np.ndarray, dropped: Dict[str, int]):
+        matrix.flags.writeable = False
+        self.dates = dates
+        self.tickers = tickers
+        self.matrix = matrix
+        self.dropped = dropped
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.matrix.nbytes
+
+    def column(self, ticker: str) -> np.ndarray:
+        return self.matrix[:, self.tickers.index(ticker)]
+
+def align_closes(tickers: List[str], start_date: str, end_date: str, use_cache: bool = True) -> AlignedCloses:
+    """Load each ticker's cached series and align the closes on common dates.
+
+    The aligned matrix is cached under the identity of every source series,
+    so repeated requests skip the join until any series is refreshed.
+
+    RAISES:
+        ValueError: If a ticker has no data in the range or no dates are shared.
+    """
+    series = get_price_series_many(tickers, start_date, end_date, use_cache=use_cache)
+    missing = [ticker for ticker, s in series.items() if s is None]
+    if missing:
+        raise ValueError(f"No price data for: {', '.join(missing)}")
+    tickers = list(series)
+    key = (tuple(tickers), start_date, end_date) + tuple(s.cache_key() for s in series.values())
+
+    def load() -> AlignedCloses:
+        dates = reduce(np.intersect1d, (s.dates for s in series.values()))
+        if len(dates) < 2:
+            raise ValueError('The requested tickers share fewer than two trading days in this range')
+        matrix = np.empty((len(dates), len(tickers)))
+        for j, s in enumerate(series.values()):
+            matrix[:, j] = s.columns['Close'][np.searchsorted(s.dates, dates)]
+        dropped = {ticker: len(s) - len(dates) for ticker, s in series.items() if len(s) != len(dates)}
+        return AlignedCloses(dates, tickers, matrix, dropped)
+
+    if not use_cache:
+        return load()
+    aligned = _aligned.get(key)
+    if aligned is None:
+        aligned = load()
+        _aligned.set(key, aligned, size=aligned.nbytes)
+    return aligned
+
+def normalize_weights(tickers: List[str], weights: Union[None, List[float], Dict[str, float]]) -> np.ndarray:
+    """Weights as an array in ticker order, scaled to sum to 1 (equal weights by default).
+
+    RAISES:
+        ValueError: If weights do not match the tickers or sum to zero.
+    """
+    if weights is None:
+        return np.full(len(tickers), 1.0 / len(tickers))
+    if isinstance(weights, dict):
+        upper = {str(k).upper(): v for k, v in weights.items()}
+        unknown = set(upper) - set(tickers)
+        if unknown:
+            raise ValueError(f"Weights given for tickers not in the portfolio: {', '.join(sorted(unknown))}")
+        weights = [upper.get(ticker, 0.0) for ticker in tickers]
+    if len(weights) != len(tickers):
+        raise ValueError('weights must have one entry per ticker')
+    try:
+        values = np.asarray(weights, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError('weights must be numbers')
+    if not np.all(np.isfinite(values)) or abs(values.sum()) < 1e-12:
+        raise ValueError('weights must be finite and must not sum to zero')
+    return values / values.sum()
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums over trailing windows along axis 0 (one row per complete window)."""
+    csum = np.cumsum(np.concatenate((np.zeros((1,) + values.shape[1:]), values)), axis=0)
+    return csum[window:] - csum[:-window]
+
+def rolling_metrics(portfolio: np.ndarray, benchmark: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """Annualized rolling return, volatility, Sharpe and beta from daily returns."""
+    pairs = np.column_stack((portfolio, benchmark, portfolio * benchmark, portfolio ** 2, benchmark ** 2))
+    sums = _rolling_sum(pairs, window)
+    mean_p, mean_b = sums[:, 0] / window, sums[:, 1] / window
+    var_p = np.maximum(sums[:, 3] / window - mean_p ** 2, 0) * window / (window - 1)
+    var_b = np.maximum(sums[:, 4] / window - mean_b ** 2, 0) * window / (window - 1)
+    cov_pb = (sums[:, 2] / window - mean_p * mean_b) * window / (window - 1)
+    volatility = np.sqrt(var_p * TRADING_DAYS_PER_YEAR)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(var_p > 0, mean_p / np.sqrt(var_p) * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+        beta = np.where(var_b > 0, cov_pb / var_b, np.nan)
+    return {
+        'return': mean_p * TRADING_DAYS_PER_YEAR,
+        'volatility': volatility,
+        'sharpe': sharpe,
+        'beta': beta
+    }
+
+def portfolio_analytics(
+    aligned: AlignedCloses,
+    tickers: List[str],
+    weights: np.ndarray,
+    benchmark: str,
+    window: int = DEFAULT_ROLLING_WINDOW,
+    include_asset_returns: bool = False
+) -> Dict[str, Any]:
+    """Risk and return statistics for a weighted (daily rebalanced) portfolio.
+
+    Everything is computed on the whole returns matrix at once: one
+    covariance matrix for assets and benchmark, betas from its benchmark
+    column, and rolling statistics from cumulative sums.
+    """
+    prices = aligned.matrix[:, [aligned.tickers.index(t) for t in tickers + [benchmark]]]
+    returns = prices[1:] / prices[:-1] - 1
+    asset_returns, benchmark_returns = returns[:, :-1], returns[:, -1]
+    portfolio_returns = asset_returns @ weights
+
+    # Assets, benchmark and portfolio in one covariance matrix
+    combined = np.column_stack((asset_returns, benchmark_returns, portfolio_returns))
+    covariance = np.cov(combined, rowvar=False) * TRADING_DAYS_PER_YEAR
+    volatility = np.sqrt(np.diag(covariance))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.outer(volatility, volatility)
+        beta = covariance[:, len(tickers)] / covariance[len(tickers), len(tickers)]
+    n = len(tickers)
+
+    equity = np.concatenate(([1.0], np.cumprod(1 + portfolio_returns)))
+    summary = equity_metrics(equity)
+    dates = np.datetime_as_string(aligned.dates, unit='D')
+    rolling_dates = dates[window:] if len(portfolio_returns) >= window else dates[:0]
+    rolling = rolling_metrics(portfolio_returns, benchmark_returns, window) if len(portfolio_returns) >= window else {}
+
+    result = {
+        'tickers': tickers,
+        'weights': dict(zip(tickers, _floats(weights))),
+        'benchmark': benchmark,
+        'observations': len(portfolio_returns),
+        'start': str(dates[0]),
+        'end': str(dates[-1]),
+        'dropped_dates': aligned.dropped,
+        'portfolio': {
+            'annual_return': float(portfolio_returns.mean() * TRADING_DAYS_PER_YEAR),
+            'cumulative_return': float(equity[-1] - 1),
+            'volatility': _float(volatility[-1]),
+            'volatility_from_weights': _float(np.sqrt(weights @ covariance[:n, :n] @ weights)),
+            'beta': _float(beta[-1]),
+            'correlation_to_benchmark': _float(correlation[-1, n]),
+            'sharpe_ratio': summary['sharpeRatio'],
+            'max_drawdown': summary['maxDrawdown']
+        },
+        'assets': {
+            ticker: {
+                'annual_return': float(asset_returns[:, j].mean() * TRADING_DAYS_PER_YEAR),
+                'volatility': _float(volatility[j]),
+                'beta': _float(beta[j])
+            }
+            for j, ticker in enumerate(tickers)
+        },
+        'covariance': _matrix(covariance[:n, :n]),
+        'correlation': _matrix(correlation[:n, :n]),
+        'returns': {
+            'dates': dates[1:].tolist(),
+            'portfolio': _floats(portfolio_returns),
+            'benchmark': _floats(benchmark_returns),
+            'equity': _floats(equity[1:])
+        },
+        'rolling': {
+            'window': window,
+            'dates': rolling_dates.tolist(),
+            **{name: _floats(values) for name, values in rolling.items()}
+        }
+    }
+    if include_asset_returns:
+        result['returns']['assets'] = {ticker: _floats(asset_returns[:, j]) for j, ticker in enumerate(tickers)}
+    return result
+
+def analyze_portfolio(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    weights: Union[None, List[float], Dict[str, float]] = None,
+    benchmark: str = DEFAULT_BENCHMARK,
+    window: int = DEFAULT_ROLLING_WINDOW,
+    include_asset_returns: bool = False,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """Align the tickers and benchmark, then compute portfolio analytics.
+
+    RAISES:
+        ValueError: If tickers, weights or window are invalid, or data is missing.
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+    if not tickers:
+        raise ValueError('No tickers provided')
+    if len(tickers) > MAX_PORTFOLIO_TICKERS:
+        raise ValueError(f'Maximum {MAX_PORTFOLIO_TICKERS} tickers allowed per portfolio')
+    if window < 2:
+        raise ValueError('window must be at least 2')
+    benchmark = (benchmark or DEFAULT_BENCHMARK).upper().strip()
+    weight_array = normalize_weights(tickers, weights)
+    aligned = align_closes(tickers + ([benchmark] if benchmark not in tickers else []), start_date, end_date, use_cache)
+    return portfolio_analytics(aligned, tickers, weight_array, benchmark, window, include_asset_returns)
+
+def _floats(values: np.ndarray) -> List[Optional[float]]:
+    """JSON-ready floats with NaN and infinities as None."""
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    if finite.all():
+        return values.tolist()
+    return [v if ok else None for v, ok in zip(values.tolist(), finite.tolist())]
+
+def _float(value: float) -> Optional[float]:
+    """JSON-ready scalar with NaN and infinities as None."""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def _matrix(values: np.ndarray) -> List[List[Optional[float]]]:
+    return [_floats(row) for row in values]
+
+def get_aligned_cache_info() -> Dict[str, Any]:
+    return _aligned.info()
+
+def clear_aligned_cache() -> int:
+    return _aligned.clear()
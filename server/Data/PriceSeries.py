@@ -0,0 +1,171 @@
+import json
+import struct
+import hashlib
+import numpy as np
+import pandas as pd
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Tuple
+
+class PriceSeries:
+    """Immutable daily OHLCV series backed by contiguous NumPy arrays.
+
+    Holds a ``datetime64[ns]`` date array plus one int64 or float64 array
+    per column. All arrays are read-only, so a cached series can be shared
+    between requests without copying; ``slice`` returns views and the
+    DataFrame / records forms are only built when a caller asks for them.
+    """
+
+    __slots__ = ('dates', 'columns', 'attrs')
+
+    # Serialized layout: u32 header length | JSON header padded to 8 bytes |
+    # int64 dates | one little-endian array per column
+    _HEADER = struct.Struct('<I4x')
+
+    def __init__(self, dates: np.ndarray, columns: Mapping[str, np.ndarray], attrs: Optional[Mapping[str, Any]] = None):
+        dates = _readonly(np.asarray(dates, dtype='datetime64[ns]'))
+        arrays = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+            arrays[name] = _readonly(values.astype(dtype, copy=False))
+        object.__setattr__(self, 'dates', dates)
+        object.__setattr__(self, 'columns', MappingProxyType(arrays))
+        object.__setattr__(self, 'attrs', MappingProxyType(dict(attrs or {})))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError('PriceSeries is immutable')
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        span = f'{self.first_date()}..{self.last_date()}' if len(self) else 'empty'
+        return f'PriceSeries({len(self)} bars, {span}, columns={list(self.columns)})'
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'PriceSeries':
+        """Build a series from a prepared date-indexed frame."""
+        return cls(
+            frame.index.values,
+            {name: frame[name].to_numpy() for name in frame.columns},
+            frame.attrs
+        )
+
+    @property
+    def empty(self) -> bool:
+        return len(self.dates) == 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the date and column arrays."""
+        return self.dates.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def first_date(self) -> Optional[str]:
+        return str(self.dates[0].astype('datetime64[D]')) if len(self) else None
+
+    def last_date(self) -> Optional[str]:
+        return str(self.dates[-1].astype('datetime64[D]')) if len(self) else None
+
+    def slice(self, start_date: str, end_date: str) -> 'PriceSeries':
+        """Return the bars with ``start_date <= Date < end_date`` as views."""
+        lo, hi = np.searchsorted(self.dates, [np.datetime64(start_date, 'ns'), np.datetime64(end_date, 'ns')])
+        if lo == 0 and hi == len(self.dates):
+            return self
+        # Views of read-only arrays are read-only, so skip the constructor's checks
+        view = object.__new__(PriceSeries)
+        object.__setattr__(view, 'dates', self.dates[lo:hi])
+        object.__setattr__(view, 'columns', MappingProxyType({name: values[lo:hi] for name, values in self.columns.items()}))
+        object.__setattr__(view, 'attrs', self.attrs)
+        return view
+
+    def merge(self, newer: 'PriceSeries') -> 'PriceSeries':
+        """Combine with a newer series; its bars and attrs win on overlap."""
+        merged = pd.concat([newer.to_frame(), self.to_frame()])
+        merged = merged[~merged.index.duplicated(keep='first')].sort_index()
+        merged.attrs = dict(newer.attrs)
+        return PriceSeries.from_frame(merged)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build a writable DataFrame copy of the series."""
+        frame = pd.DataFrame(dict(self.columns), index=pd.DatetimeIndex(self.dates, name='Date'), copy=True)
+        frame.attrs = dict(self.attrs)
+        return frame
+
+    def date_strings(self) -> List[str]:
+        """Dates as 'YYYY-MM-DD' strings."""
+        return np.datetime_as_string(self.dates, unit='D').tolist()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Rows as JSON-ready dicts with a 'Date' string first."""
+        names = ['Date'] + list(self.columns)
+        values = [self.date_strings()] + [_json_values(v) for v in self.columns.values()]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def column_lists(self) -> Dict[str, List[Any]]:
+        """Columns as JSON-ready lists keyed by name, 'Date' first."""
+        lists = {'Date': self.date_strings()}
+        lists.update((name, _json_values(values)) for name, values in self.columns.items())
+        return lists
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact, self-describing byte string."""
+        header = json.dumps({
+            'rows': len(self),
+            'columns': [[name, values.dtype.str] for name, values in self.columns.items()],
+            'attrs': dict(self.attrs)
+        }).encode('utf-8')
+        header += b' ' * (-len(header) % 8)
+        parts = [self._HEADER.pack(len(header)), header, self.dates.astype('<i8').tobytes()]
+        parts += [values.tobytes() for values in self.columns.values()]
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PriceSeries':
+        """Rebuild a series from ``to_bytes`` output; arrays are views onto ``data``."""
+        (length,) = cls._HEADER.unpack_from(data, 0)
+        offset = cls._HEADER.size
+        header = json.loads(data[offset:offset + length])
+        offset += length
+        rows = header['rows']
+        dates = np.frombuffer(data, dtype='<i8', count=rows, offset=offset).view('datetime64[ns]')
+        offset += rows * 8
+        columns = {}
+        for name, dtype in header['columns']:
+            columns[name] = np.frombuffer(data, dtype=dtype, count=rows, offset=offset)
+            offset += columns[name].nbytes
+        return cls(dates, columns, header['attrs'])
+
+    def cache_key(self) -> Tuple[Any, ...]:
+        """Identity of this exact slice: bounds, length, columns, fetch time and any resampling."""
+        bounds = (int(self.dates[0].view('i8')), int(self.dates[-1].view('i8'))) if len(self) else (None, None)
+        return bounds + (
+            len(self), tuple(self.columns), self.attrs.get('fetched_at'),
+            self.attrs.get('interval'), self.attrs.get('max_points')
+        )
+
+    def content_hash(self) -> str:
+        """Digest of the dates and column values only, so a refetch of identical bars hashes the same."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(self.dates).tobytes())
+        for name, values in self.columns.items():
+            digest.update(name.encode('utf-8') + b'\0' + values.dtype.str.encode('ascii'))
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    """Return a read-only view, leaving the caller's array writable."""
+    values = np.ascontiguousarray(values).view()
+    values.flags.writeable = False
+    return values
+
+def _json_values(values: np.ndarray) -> List[Any]:
+    """Python values for JSON output, with NaN as None."""
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            return [None if m else v for v, m in zip(values.tolist(), missing.tolist())]
+    return values.tolist()
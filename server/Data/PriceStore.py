@@ -0,0 +1,373 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DateRange = Tuple[str, str]
+
+# Superseded generations are kept this long for readers that already loaded the old meta.json
+GENERATION_GRACE_SECONDS = 300
+# An empty answer for a gap this short is taken as final (holidays), not as missing data
+EMPTY_GAP_MAX_BUSDAYS = 5
+# Longer empty answers before the first or after the last bar (pre-listing, post-delisting) are not asked again for this long
+EMPTY_RANGE_TTL_SECONDS = 24 * 3600
+LOCK_DIR = '.locks'
+
+class PriceStore:
+    """Persistent per-ticker columnar store of daily OHLCV bars.
+
+    Each ticker lives in its own directory. Columns are stored as separate
+    ``.npy`` arrays (read back memory-mapped) next to a ``meta.json`` that
+    records the column names, the current data generation and the list of
+    date ranges already fetched from upstream. Ranges use the same
+    ``[start, end)`` convention as yfinance. Ranges upstream had no bars
+    for before the first or after the last stored bar are kept separately
+    with an expiry, so reads reaching back past a listing date do not ask
+    upstream again until ``empty_range_ttl_seconds`` has passed.
+
+    Writes go to a fresh, uniquely named generation directory and only
+    become visible when ``meta.json`` is atomically replaced, so readers
+    never see a half written ticker. Superseded generations are deleted
+    only after ``generation_grace_seconds``. Each ticker's read-modify-write
+    holds a thread lock plus an ``fcntl`` file lock, so server workers
+    sharing the directory do not lose each other's updates.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        generation_grace_seconds: float = GENERATION_GRACE_SECONDS,
+        empty_range_ttl_seconds: float = EMPTY_RANGE_TTL_SECONDS
+    ):
+        self.root_dir = root_dir
+        self.generation_grace_seconds = generation_grace_seconds
+        self.empty_range_ttl_seconds = empty_range_ttl_seconds
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(os.path.join(root_dir, LOCK_DIR), exist_ok=True)
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        """Return the per-ticker write lock."""
+        with self._locks_guard:
+            if ticker not in self._locks:
+                self._locks[ticker] = threading.Lock()
+            return self._locks[ticker]
+
+    @contextmanager
+    def _locked(self, ticker: str) -> Iterator[None]:
+        """Hold a ticker's lock across threads and, where supported, processes."""
+        with self._lock_for(ticker):
+            if fcntl is None:
+                yield
+                return
+            lock_dir = os.path.join(self.root_dir, LOCK_DIR)
+            os.makedirs(lock_dir, exist_ok=True)
+            with open(os.path.join(lock_dir, f'{ticker}.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root_dir, ticker.upper())
+
+    def _read_meta(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Load ``meta.json`` for a ticker, or None if nothing is stored."""
+        meta_path = os.path.join(self._ticker_dir(ticker), 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logger.error(f"❌ Corrupt price store metadata for {ticker}: {str(e)}")
+            return None
+
+    def _load_frame(self, ticker: str, meta: Dict[str, Any], start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Load stored bars using memory-mapped columns.
+
+        Only the rows inside ``[start_date, end_date)`` are copied out of the
+        maps when a range is given; otherwise the full history is loaded.
+        """
+        gen_dir = os.path.join(self._ticker_dir(ticker), _generation_dir(meta))
+        dates = np.load(os.path.join(gen_dir, 'Date.npy'), mmap_mode='r')
+        lo, hi = 0, len(dates)
+        if start_date and end_date:
+            lo = np.searchsorted(dates, np.datetime64(start_date), side='left')
+            hi = np.searchsorted(dates, np.datetime64(end_date), side='left')
+        columns = {
+            col: np.array(np.load(os.path.join(gen_dir, f'{col}.npy'), mmap_mode='r')[lo:hi])
+            for col in meta['columns']
+        }
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(np.array(dates[lo:hi]), name='Date'))
+
+    def _write_frame(
+        self,
+        ticker: str,
+        frame: pd.DataFrame,
+        coverage: List[DateRange],
+        meta: Optional[Dict[str, Any]],
+        empty_ranges: List[DateRange] = ()
+    ) -> None:
+        """Write a new generation of a ticker's data and publish it via ``meta.json``.
+
+        Unexpired empty ranges carry over from ``meta``; ``empty_ranges``
+        are added with a fresh expiry.
+        """
+        ticker_dir = self._ticker_dir(ticker)
+        generation = (meta['generation'] + 1) if meta else 1
+        # Unique per writer, so a writer without the file lock never reuses a live directory
+        dir_name = f"g{generation}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        gen_dir = os.path.join(ticker_dir, dir_name)
+        os.makedirs(gen_dir)
+
+        np.save(os.path.join(gen_dir, 'Date.npy'), frame.index.values.astype('datetime64[ns]'))
+        for col in frame.columns:
+            np.save(os.path.join(gen_dir, f'{col}.npy'), frame[col].to_numpy())
+
+        new_meta = {
+            'ticker': ticker,
+            'generation': generation,
+            'dir': dir_name,
+            'columns': list(frame.columns),
+            'coverage': [list(r) for r in coverage],
+            'empty': _live_empty_entries(meta) + [
+                [start, end, time.time() + self.empty_range_ttl_seconds] for start, end in empty_ranges
+            ],
+            'rows': len(frame),
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        tmp_path = os.path.join(ticker_dir, f'meta.json.{dir_name}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(new_meta, f)
+        os.replace(tmp_path, os.path.join(ticker_dir, 'meta.json'))
+
+        if meta:
+            # The retired generation's mtime now records when it was superseded
+            try:
+                os.utime(os.path.join(ticker_dir, _generation_dir(meta)))
+            except OSError:
+                pass
+        self._sweep_generations(ticker_dir, dir_name)
+
+    def _sweep_generations(self, ticker_dir: str, current: str) -> None:
+        """Delete generations superseded more than the grace period ago."""
+        cutoff = time.time() - self.generation_grace_seconds
+        for name in os.listdir(ticker_dir):
+            path = os.path.join(ticker_dir, name)
+            if name == current or not name.startswith('g') or not os.path.isdir(path):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def missing_ranges(self, ticker: str, start_date: str, end_date: str) -> List[DateRange]:
+        """Return the sub-ranges of ``[start_date, end_date)`` not yet fetched."""
+        meta = self._read_meta(ticker.upper())
+        coverage = [tuple(r) for r in meta['coverage']] if meta else []
+        return _subtract_ranges((start_date, end_date), coverage + _live_empty_ranges(meta))
+
+    def read(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        fetch: Callable[[str, str], Optional[pd.DataFrame]]
+    ) -> pd.DataFrame:
+        """Return stored bars for a range, fetching and merging only the gaps.
+
+        ARGS:
+            ticker (str): Stock ticker symbol.
+            start_date (str): Start date in 'YYYY-MM-DD' format (inclusive).
+            end_date (str): End date in 'YYYY-MM-DD' format (exclusive).
+            fetch (callable): ``fetch(start, end)`` returning a DataFrame of
+                bars for a gap, or None if the upstream call failed. An
+                empty DataFrame marks a gap of up to EMPTY_GAP_MAX_BUSDAYS
+                business days as covered; a longer one is skipped until
+                ``empty_range_ttl_seconds`` has passed if it lies before the
+                first or after the last known bar.
+
+        RETURNS:
+            DataFrame: Bars indexed by a tz-naive 'Date' index. Empty if
+                nothing is available for the range.
+        """
+        ticker = ticker.upper()
+        with self._locked(ticker):
+            meta = self._read_meta(ticker)
+            coverage = [tuple(r) for r in meta['coverage']] if meta else []
+            gaps = _subtract_ranges((start_date, end_date), coverage + _live_empty_ranges(meta))
+
+            if meta and not gaps:
+                return self._load_frame(ticker, meta, start_date, end_date)
+
+            fetched, empty_gaps = [], []
+            for gap_start, gap_end in gaps:
+                if np.busday_count(gap_start, gap_end) == 0:
+                    # Weekend-only gap, nothing to fetch
+                    coverage.append((gap_start, gap_end))
+                    continue
+                logger.info(f"🗄️ Price store gap for {ticker}: {gap_start} to {gap_end}")
+                gap_frame = fetch(gap_start, gap_end)
+                if gap_frame is None:
+                    continue
+                if not gap_frame.empty:
+                    fetched.append(_normalize_frame(gap_frame))
+                elif np.busday_count(gap_start, gap_end) > EMPTY_GAP_MAX_BUSDAYS:
+                    # Too long to be only holidays; not final unless outside the known bars
+                    empty_gaps.append((gap_start, gap_end))
+                    continue
+                coverage.append((gap_start, _covered_end(gap_end)))
+
+            stored = self._load_frame(ticker, meta) if meta else None
+            frame = _merge_frames(stored, fetched)
+            coverage = _merge_ranges(coverage)
+            previous = _merge_ranges([tuple(r) for r in meta['coverage']]) if meta else []
+            # e.g. before the listing date; upstream answered, so skip it until the TTL runs out
+            dead = _outside_bars(frame, empty_gaps)
+            if coverage != previous or dead:
+                # Written even with no bars, so an empty range is not fetched again
+                self._write_frame(ticker, frame if frame is not None else _empty_frame(), coverage, meta, dead)
+
+        if frame is None or frame.empty:
+            return pd.DataFrame()
+        return _slice_frame(frame, start_date, end_date)
+
+    def ingest(self, ticker: str, start_date: str, end_date: str, frame: pd.DataFrame) -> None:
+        """Merge bars fetched elsewhere (e.g. a batch download) and mark the range covered."""
+        ticker = ticker.upper()
+        with self._locked(ticker):
+            meta = self._read_meta(ticker)
+            stored = self._load_frame(ticker, meta) if meta else None
+            coverage = [tuple(r) for r in meta['coverage']] if meta else []
+            dead = []
+            if not frame.empty or np.busday_count(start_date, end_date) <= EMPTY_GAP_MAX_BUSDAYS:
+                coverage.append((start_date, _covered_end(end_date)))
+            else:
+                dead = _outside_bars(stored, [(start_date, end_date)])
+            fetched = [_normalize_frame(frame)] if not frame.empty else []
+            merged = _merge_frames(stored, fetched)
+            self._write_frame(ticker, merged if merged is not None else _empty_frame(), _merge_ranges(coverage), meta, dead)
+
+    def clear(self, ticker: Optional[str] = None) -> None:
+        """Delete stored data for one ticker, or for every ticker."""
+        if ticker:
+            shutil.rmtree(self._ticker_dir(ticker), ignore_errors=True)
+            return
+        for name in os.listdir(self.root_dir):
+            if name == LOCK_DIR:
+                continue
+            shutil.rmtree(os.path.join(self.root_dir, name), ignore_errors=True)
+
+    def info(self) -> Dict[str, Any]:
+        """Summarize what is stored on disk."""
+        tickers = {}
+        for name in sorted(os.listdir(self.root_dir)):
+            meta = self._read_meta(name)
+            if meta:
+                tickers[name] = {'rows': meta['rows'], 'coverage': meta['coverage']}
+        return {
+            'root_dir': self.root_dir,
+            'tickers': len(tickers),
+            'total_rows': sum(t['rows'] for t in tickers.values()),
+            'details': tickers
+        }
+
+def _generation_dir(meta: Dict[str, Any]) -> str:
+    """Directory of the generation a meta.json points at (``g<n>`` before unique names)."""
+    return meta.get('dir') or f"g{meta['generation']}"
+
+def _live_empty_entries(meta: Optional[Dict[str, Any]]) -> List[list]:
+    """Unexpired ``[start, end, expires_at]`` empty ranges recorded in ``meta``."""
+    now = time.time()
+    return [entry for entry in (meta or {}).get('empty', []) if entry[2] > now]
+
+def _live_empty_ranges(meta: Optional[Dict[str, Any]]) -> List[DateRange]:
+    return [(start, end) for start, end, _ in _live_empty_entries(meta)]
+
+def _outside_bars(frame: Optional[pd.DataFrame], ranges: List[DateRange]) -> List[DateRange]:
+    """Return the ranges ending before the first bar of ``frame`` or starting after its last."""
+    if frame is None or frame.empty or not ranges:
+        return []
+    first = frame.index[0].strftime('%Y-%m-%d')
+    last = frame.index[-1].strftime('%Y-%m-%d')
+    return [(start, end) for start, end in ranges if end <= first or start > last]
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+
+def _normalize_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Strip timezone and time-of-day from the index so bars key on date."""
+    frame = frame.copy()
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize().rename('Date')
+    return frame
+
+def _merge_frames(stored: Optional[pd.DataFrame], fetched: List[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Merge newly fetched bars into the stored frame; new bars win on overlap."""
+    frames = [f for f in ([stored] if stored is not None else []) + fetched if not f.empty]
+    if not frames:
+        return stored
+    merged = pd.concat(frames)
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    merged.index.name = 'Date'
+    return merged
+
+def _slice_frame(frame: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """Return rows with ``start_date <= Date < end_date``."""
+    index = frame.index.values
+    lo = np.searchsorted(index, np.datetime64(start_date), side='left')
+    hi = np.searchsorted(index, np.datetime64(end_date), side='left')
+    return frame.iloc[lo:hi]
+
+def _covered_end(end_date: str) -> str:
+    """Clamp a fetched range so today's still-changing bar is never marked final."""
+    today = datetime.now().strftime('%Y-%m-%d')
+    return min(end_date, today)
+
+def _merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Merge overlapping or touching ``[start, end)`` ranges."""
+    merged: List[DateRange] = []
+    for start, end in sorted(r for r in ranges if r[0] < r[1]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _subtract_ranges(requested: DateRange, covered: List[DateRange]) -> List[DateRange]:
+    """Return the parts of ``requested`` not contained in ``covered``."""
+    gaps = []
+    cursor, end = requested
+    for cov_start, cov_end in _merge_ranges([tuple(r) for r in covered]):
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, cov_start))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
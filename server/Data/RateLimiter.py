@@ -0,0 +1,230 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sliding-window state per key: (window_start, current_count, previous_count)
+WindowState = Tuple[float, int, int]
+
+# Keys idle for this many windows are dropped
+IDLE_WINDOWS = 2
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rate_limits.sqlite')
+
+class RateLimitDecision:
+    """Outcome of one rate-limit check."""
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'retry_after', 'reset_after')
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, retry_after: float, reset_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset_after = reset_after
+
+    def headers(self) -> Dict[str, str]:
+        """Standard rate-limit response headers for this decision."""
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(math.ceil(self.reset_after))
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+def sliding_window(state: Optional[WindowState], limit: int, window: float, now: float) -> Tuple[WindowState, RateLimitDecision]:
+    """Apply one request to a sliding-window counter.
+
+    The previous fixed window's count is weighted by how much of it still
+    overlaps the sliding window, so each check is O(1) with two counters
+    instead of a timestamp per request. Rejected requests are not counted.
+
+    RETURNS:
+        tuple: ``(new_state, decision)``.
+    """
+    window_start = math.floor(now / window) * window
+    if state is None or state[0] <= window_start - 2 * window:
+        current, previous = 0, 0
+    elif state[0] < window_start:
+        current, previous = 0, state[1]
+    else:
+        current, previous = state[1], state[2]
+
+    elapsed = (now - window_start) / window
+    estimate = previous * (1 - elapsed) + current
+    reset_after = window_start + window - now
+    if estimate + 1 > limit:
+        return (window_start, current, previous), RateLimitDecision(
+            False, limit, 0, _retry_after(current, previous, limit, window, elapsed), reset_after
+        )
+    current += 1
+    remaining = max(0, int(limit - (estimate + 1)))
+    return (window_start, current, previous), RateLimitDecision(True, limit, remaining, 0.0, reset_after)
+
+def _retry_after(current: int, previous: int, limit: int, window: float, elapsed: float) -> float:
+    """Seconds until one more request fits under the limit."""
+    if current + 1 <= limit and previous:
+        # Wait for enough of the previous window to slide out
+        needed = 1 - (limit - current - 1) / previous
+        return max(0.0, (needed - elapsed) * window)
+    # The current window alone is full; wait into the next one
+    needed = 1 - (limit - 1) / current if current else 0.0
+    return (1 - elapsed) * window + max(0.0, needed) * window
+
+class MemoryRateLimitBackend:
+    """In-process backend; limits apply per worker process.
+
+    Keys are kept in least-recently-used order so idle keys are evicted
+    from the front in amortized O(1) as new requests arrive.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._states: 'OrderedDict[str, Tuple[WindowState, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> RateLimitDecision:
+        with self._lock:
+            entry = self._states.pop(key, None)
+            state, decision = sliding_window(entry[0] if entry else None, limit, window, now)
+            self._states[key] = (state, state[0] + IDLE_WINDOWS * window)
+            self._evict_idle(now)
+            return decision
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop expired keys from the LRU end. Caller holds the lock."""
+        while self._states:
+            key, (_, expires_at) = next(iter(self._states.items()))
+            if expires_at > now and len(self._states) <= self.max_keys:
+                break
+            del self._states[key]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': self.name, 'tracked_keys': len(self._states), 'evictions': self.evictions}
+
+class SQLiteRateLimitBackend:
+    """Backend storing counters in a SQLite file shared by all workers.
+
+    Each check is a single-row read-modify-write inside an immediate
+    transaction, so gunicorn workers on one host share one limit. Idle
+    rows are purged every ``purge_every`` checks.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, purge_every: int = 1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._checks = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Not cached, so a master that imports this before forking holds no open handle
+        with closing(self._open()) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, window_start REAL, current INTEGER, previous INTEGER, expires_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS rate_limits_expires ON rate_limits (expires_at)')
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use (and again after a fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> RateLimitDecision:
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT window_start, current, previous FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            state, decision = sliding_window(tuple(row) if row else None, limit, window, now)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window_start, current, previous, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (key, state[0], state[1], state[2], state[0] + IDLE_WINDOWS * window)
+            )
+            self._checks += 1
+            if self._checks % self.purge_every == 0:
+                conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return decision
+
+    def clear(self) -> None:
+        self._connect().execute('DELETE FROM rate_limits')
+
+    def info(self) -> Dict[str, Any]:
+        count = self._connect().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+        return {'backend': self.name, 'path': self.path, 'tracked_keys': count}
+
+class RateLimiter:
+    """Sliding-window rate limiter over a pluggable counter backend."""
+
+    def __init__(self, backend, default_limit: int, default_window: float):
+        self.backend = backend
+        self.default_limit = default_limit
+        self.default_window = default_window
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, key: str, limit: Optional[int] = None, window: Optional[float] = None) -> RateLimitDecision:
+        """Count one request for ``key`` and return whether it is allowed."""
+        decision = self.backend.hit(key, limit or self.default_limit, window or self.default_window, time.time())
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return decision
+
+    def info(self) -> Dict[str, Any]:
+        info = self.backend.info()
+        info.update({
+            'default_limit': self.default_limit,
+            'default_window_seconds': self.default_window,
+            'allowed': self.allowed,
+            'rejected': self.rejected
+        })
+        return info
+
+def create_backend(kind: Optional[str] = None, path: Optional[str] = None):
+    """Build a backend from ``FINRUS_RATE_LIMIT_BACKEND`` ('memory' or 'sqlite').
+
+    RAISES:
+        ValueError: If the backend kind is unknown.
+    """
+    kind = (kind or os.environ.get('FINRUS_RATE_LIMIT_BACKEND', 'memory')).lower()
+    if kind == 'memory':
+        return MemoryRateLimitBackend()
+    if kind == 'sqlite':
+        return SQLiteRateLimitBackend(path or os.environ.get('FINRUS_RATE_LIMIT_DB', DEFAULT_SQLITE_PATH))
+    raise ValueError(f'Unknown rate limit backend: {kind}')
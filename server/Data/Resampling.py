@@ -0,0 +1,145 @@
+import os
+import logging
+import numpy as np
+from typing import Optional, Dict, Any, Tuple
+from DataCache import DataCache
+from PriceSeries import PriceSeries
+
+logger = logging.getLogger(__name__)
+
+# Reduced series are small, so they can be kept as long as the series they came from
+REDUCED_CACHE_MAX_BYTES = int(os.environ.get('FINRUS_REDUCED_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+_reduced = DataCache(max_bytes=REDUCED_CACHE_MAX_BYTES, ttl_seconds=300)
+
+INTERVALS = ('daily', 'weekly', 'monthly')
+INTERVAL_ALIASES = {'1d': 'daily', 'day': 'daily', '1wk': 'weekly', 'week': 'weekly', '1mo': 'monthly', 'month': 'monthly'}
+
+MIN_POINTS = 3
+MAX_POINTS = 10000
+
+def normalize_interval(interval: Optional[str]) -> str:
+    """Canonical interval name; None means daily.
+
+    RAISES:
+        ValueError: If the interval is unknown.
+    """
+    name = (interval or 'daily').strip().lower()
+    name = INTERVAL_ALIASES.get(name, name)
+    if name not in INTERVALS:
+        raise ValueError(f"Unsupported interval '{interval}'. Use one of: {', '.join(INTERVALS)}")
+    return name
+
+def validate_max_points(max_points: Optional[int]) -> Optional[int]:
+    """Check a ``max_points`` limit (None means no limit).
+
+    RAISES:
+        ValueError: If the limit is out of range.
+    """
+    if max_points is not None and not MIN_POINTS <= max_points <= MAX_POINTS:
+        raise ValueError(f"max_points must be between {MIN_POINTS} and {MAX_POINTS}")
+    return max_points
+
+def _period_starts(dates: np.ndarray, interval: str) -> np.ndarray:
+    """Start date of the week (Monday) or month containing each bar."""
+    days = dates.astype('datetime64[D]')
+    if interval == 'weekly':
+        # Day 0 (1970-01-01) was a Thursday, so shift by 3 to start weeks on Monday
+        offset = (days.view('i8') + 3) % 7
+        return days - offset.astype('timedelta64[D]')
+    return days.astype('datetime64[M]').astype('datetime64[D]')
+
+def resample_ohlcv(series: PriceSeries, interval: str) -> PriceSeries:
+    """Aggregate daily bars into weekly or monthly bars.
+
+    Open is the first open, High / Low the extremes, Close and Adj Close
+    the last values, Volume and Dividends the sums and Stock Splits the
+    combined ratio. Bars are labelled with the period start, like
+    yfinance's weekly and monthly intervals.
+    """
+    if interval == 'daily' or series.empty:
+        return series
+    periods = _period_starts(series.dates, interval)
+    starts = np.concatenate(([0], np.flatnonzero(periods[1:] != periods[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(periods)])) - 1
+    columns = {}
+    for name, values in series.columns.items():
+        if name == 'Open':
+            columns[name] = values[starts]
+        elif name == 'High':
+            columns[name] = np.fmax.reduceat(values, starts)
+        elif name == 'Low':
+            columns[name] = np.fmin.reduceat(values, starts)
+        elif name in ('Volume', 'Dividends'):
+            columns[name] = np.add.reduceat(values, starts)
+        elif name == 'Stock Splits':
+            # 0 means no split on that day; ratios within a period multiply
+            ratios = np.multiply.reduceat(np.where(values == 0, 1.0, values), starts)
+            columns[name] = np.where(ratios == 1.0, 0.0, ratios)
+        else:
+            columns[name] = values[ends]
+    return PriceSeries(periods[starts], columns, series.attrs)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points keeping the shape.
+
+    The first and last points are always kept. Each bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the average of the next bucket.
+    """
+    n = len(y)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.floor(np.arange(threshold - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = end
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    return selected
+
+def downsample(series: PriceSeries, max_points: int) -> PriceSeries:
+    """Keep at most ``max_points`` bars chosen by LTTB on the close.
+
+    Whole bars are kept (not averaged), so every point returned is a real
+    OHLCV bar and the chart keeps its peaks and troughs.
+    """
+    if len(series) <= max_points:
+        return series
+    x = series.dates.astype('datetime64[D]').view('i8').astype(np.float64)
+    y = series.columns['Close'] if 'Close' in series.columns else next(iter(series.columns.values()))
+    indices = lttb_indices(x, y, max_points)
+    return PriceSeries(series.dates[indices], {name: values[indices] for name, values in series.columns.items()}, series.attrs)
+
+def reduce_series(ticker: str, series: PriceSeries, interval: str = 'daily', max_points: Optional[int] = None) -> PriceSeries:
+    """Resample and/or downsample a series, caching the reduced result.
+
+    The cache key includes the source series' identity, so a refreshed
+    source produces a fresh reduction.
+    """
+    if interval == 'daily' and (max_points is None or len(series) <= max_points):
+        return series
+    key = (ticker, interval, max_points) + series.cache_key()
+
+    def load() -> PriceSeries:
+        reduced = downsample(resample_ohlcv(series, interval), max_points) if max_points else resample_ohlcv(series, interval)
+        attrs = dict(series.attrs)
+        attrs.update({'interval': interval, 'max_points': max_points, 'source_points': len(series)})
+        return PriceSeries(reduced.dates, reduced.columns, attrs)
+
+    reduced, _ = _reduced.get_or_load(key, load)
+    return reduced
+
+def get_reduced_cache_info() -> Dict[str, Any]:
+    return _reduced.info()
+
+def clear_reduced_cache() -> int:
+    return _reduced.clear()
@@ -0,0 +1,239 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Tuple, Iterator
+from PriceSeries import PriceSeries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARED_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shared_cache.sqlite')
+
+class SharedSeriesCache:
+    """Host-wide cache of serialized price series in a SQLite file.
+
+    Sits behind each worker's in-process ``RangeCache`` so a series loaded
+    by one worker is a cheap local read for the others. Entries expire
+    after ``ttl_seconds`` and the least recently used ones are dropped
+    once their payloads exceed ``max_bytes``.
+
+    Misses are coordinated with a lease row: the first worker to claim a
+    key runs the loader while the others poll for the result, falling back
+    to their own load only if the lease expires first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_bytes: int,
+        lease_seconds: float = 30,
+        poll_interval: float = 0.05
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._token = uuid.uuid4().hex[:8]
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+        self.lease_waits = 0
+        self.lease_timeouts = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, '
+            'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+        conn.execute('CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)')
+
+    @property
+    def _owner(self) -> str:
+        # Includes the pid so workers forked from a preloaded master hold distinct leases
+        return f'{os.getpid()}-{self._token}'
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use (and again after a fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[PriceSeries]:
+        """Return the cached series for ``key``, or None if missing or expired."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key: str) -> Tuple[Optional[PriceSeries], float]:
+        """Return ``(series, remaining_ttl)``; ``series`` is None if missing or expired."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute('SELECT payload, expires_at FROM entries WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        if row is None:
+            self._count('misses')
+            return None, 0.0
+        conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return PriceSeries.from_bytes(row[0]), row[1] - now
+
+    def set(self, key: str, series: PriceSeries) -> None:
+        """Store a series, then trim expired and least recently used entries."""
+        payload = series.to_bytes()
+        if len(payload) > self.max_bytes:
+            logger.warning(f"Shared cache entry of {len(payload)} bytes exceeds budget of {self.max_bytes}, not cached")
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, payload, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, payload, len(payload), now + self.ttl_seconds, now)
+            )
+            conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(conn, total - self.max_bytes)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, excess: int) -> None:
+        """Delete least recently used entries until ``excess`` bytes are freed."""
+        freed = 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+
+    def _try_lease(self, key: str) -> bool:
+        """Claim the right to fill ``key``; stale leases from dead workers are taken over."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM leases WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, self._owner, now + self.lease_seconds)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def _release(self, key: str) -> None:
+        self._connect().execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner))
+
+    def _lease_held(self, key: str) -> bool:
+        row = self._connect().execute(
+            'SELECT 1 FROM leases WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    @contextmanager
+    def lease(self, key: str) -> Iterator[bool]:
+        """Hold the fill lease for ``key`` during the block; yields whether it was claimed.
+
+        Lets background refreshes in several processes agree on a single
+        refresher per key, using the same lease as ``get_or_fill``.
+        """
+        claimed = self._try_lease(key)
+        try:
+            yield claimed
+        finally:
+            if claimed:
+                self._release(key)
+
+    def get_or_fill(self, key: str, loader: Callable[[], Optional[PriceSeries]]) -> Tuple[Optional[PriceSeries], Optional[float]]:
+        """Return the shared series for ``key``, loading it in one worker only.
+
+        RETURNS:
+            tuple: ``(series, remaining_ttl)``. ``remaining_ttl`` is the
+                shared entry's remaining lifetime, so callers caching the
+                series locally do not extend it; it is None for series
+                loaded here. Empty or missing series are returned but
+                never stored.
+        """
+        series, remaining = self.lookup(key)
+        if series is not None:
+            return series, remaining
+
+        deadline = time.monotonic() + self.lease_seconds
+        while not self._try_lease(key):
+            # Another worker is filling this key; wait for its result
+            self._count('lease_waits')
+            while self._lease_held(key) and time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+            series, remaining = self.lookup(key)
+            if series is not None:
+                return series, remaining
+            if time.monotonic() >= deadline:
+                self._count('lease_timeouts')
+                logger.warning(f"Timed out waiting for another worker to fill {key}, loading locally")
+                break
+
+        try:
+            series = loader()
+            if series is not None and not series.empty:
+                self.set(key, series)
+                self._count('fills')
+            return series, None
+        finally:
+            self._release(key)
+
+    def clear(self) -> int:
+        """Remove every entry and return how many were removed."""
+        conn = self._connect()
+        count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        conn.execute('DELETE FROM entries')
+        return count
+
+    def info(self) -> Dict[str, Any]:
+        """Return occupancy plus this worker's hit/miss/fill counters."""
+        now = time.time()
+        conn = self._connect()
+        total, valid, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(size), 0) FROM entries', (now,)
+        ).fetchone()
+        leases = conn.execute('SELECT COUNT(*) FROM leases WHERE expires_at > ?', (now,)).fetchone()[0]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'path': self.path,
+                'total_items': total,
+                'valid_items': valid,
+                'current_bytes': size,
+                'max_bytes': self.max_bytes,
+                'active_leases': leases,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'fills': self.fills,
+                'lease_waits': self.lease_waits,
+                'lease_timeouts': self.lease_timeouts
+            }
@@ -0,0 +1,265 @@
+import os
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Iterator, Union
+from Backtest import build_signals, run_backtest, TRADING_DAYS_PER_YEAR
+from PortfolioAnalytics import align_closes, normalize_weights
+from YahooData import get_price_series
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('bootstrap', 'gbm')
+MAX_SIMULATION_PATHS = 200000
+MAX_HORIZON_DAYS = 3 * TRADING_DAYS_PER_YEAR
+MAX_SIMULATION_WORKERS = int(os.environ.get('FINRUS_SIMULATION_WORKERS', os.cpu_count() or 1))
+# Paths generated per task; bounds worker memory at chunk_size x horizon floats
+DEFAULT_CHUNK_PATHS = 5000
+# Below this many paths a process pool costs more than it saves
+MIN_PARALLEL_PATHS = 20000
+DEFAULT_CONFIDENCE_LEVELS = (0.95, 0.99)
+HISTOGRAM_BINS = 50
+
+def _simulate_chunk(method: str, returns: np.ndarray, horizon: int, paths: int, block_size: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    """Generate one chunk of paths and reduce it to per-path and per-step aggregates.
+
+    Paths are growth factors starting at 1. Only the terminal value and
+    max drawdown of each path, plus per-step sums for mean/std bands, leave
+    the worker.
+    """
+    rng = np.random.default_rng(seed)
+    if method == 'gbm':
+        log_returns = np.log1p(returns)
+        steps = rng.normal(log_returns.mean(), log_returns.std(ddof=1), size=(paths, horizon))
+    else:
+        # Moving-block bootstrap keeps short-range autocorrelation and volatility clustering
+        blocks = -(-horizon // block_size)
+        starts = rng.integers(0, len(returns) - block_size + 1, size=(paths, blocks))
+        index = (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :horizon]
+        steps = np.log1p(returns[index])
+    growth = np.exp(np.cumsum(steps, axis=1))
+    peaks = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    return {
+        'terminal': growth[:, -1],
+        'max_drawdown': ((peaks - growth) / peaks).max(axis=1),
+        'step_sum': growth.sum(axis=0),
+        'step_sumsq': np.square(growth).sum(axis=0)
+    }
+
+class SimulationAggregate:
+    """Running statistics merged from path chunks, independent of arrival order."""
+
+    def __init__(self, horizon: int):
+        self.paths = 0
+        self.terminal: List[np.ndarray] = []
+        self.max_drawdown: List[np.ndarray] = []
+        self.step_sum = np.zeros(horizon)
+        self.step_sumsq = np.zeros(horizon)
+
+    def add(self, chunk: Dict[str, np.ndarray]) -> None:
+        self.paths += len(chunk['terminal'])
+        self.terminal.append(chunk['terminal'])
+        self.max_drawdown.append(chunk['max_drawdown'])
+        self.step_sum += chunk['step_sum']
+        self.step_sumsq += chunk['step_sumsq']
+
+    def risk(self, levels: List[float]) -> Dict[str, Any]:
+        """VaR / CVaR of the terminal return as positive loss fractions."""
+        returns = np.concatenate(self.terminal) - 1
+        risk = {}
+        for level in levels:
+            cutoff = np.quantile(returns, 1 - level)
+            tail = returns[returns <= cutoff]
+            risk[f'{level:g}'] = {
+                'var': float(-cutoff),
+                'cvar': float(-tail.mean()) if len(tail) else float(-cutoff)
+            }
+        return risk
+
+    def summary(self, levels: List[float], initial_value: float) -> Dict[str, Any]:
+        returns = np.concatenate(self.terminal) - 1
+        drawdowns = np.concatenate(self.max_drawdown)
+        mean = self.step_sum / self.paths
+        std = np.sqrt(np.maximum(self.step_sumsq / self.paths - mean ** 2, 0))
+        percentiles = [1, 5, 25, 50, 75, 95, 99]
+        counts, edges = np.histogram(returns, bins=HISTOGRAM_BINS)
+        return {
+            'paths': self.paths,
+            'terminal_return': {
+                'mean': float(returns.mean()),
+                'std': float(returns.std()),
+                'probability_of_loss': float((returns < 0).mean()),
+                'percentiles': {str(p): float(v) for p, v in zip(percentiles, np.percentile(returns, percentiles))}
+            },
+            'terminal_value': {
+                'mean': float(initial_value * (1 + returns.mean())),
+                'median': float(initial_value * (1 + np.median(returns)))
+            },
+            'max_drawdown': {
+                'mean': float(drawdowns.mean()),
+                'percentiles': {str(p): float(v) for p, v in zip(percentiles, np.percentile(drawdowns, percentiles))}
+            },
+            'risk': self.risk(levels),
+            'histogram': {'edges': edges.tolist(), 'counts': counts.tolist()},
+            'bands': {
+                'mean': (initial_value * mean).tolist(),
+                'lower': (initial_value * (mean - std)).tolist(),
+                'upper': (initial_value * (mean + std)).tolist()
+            }
+        }
+
+def _chunk_sizes(paths: int, chunk_paths: int) -> List[int]:
+    full, rest = divmod(paths, chunk_paths)
+    return [chunk_paths] * full + ([rest] if rest else [])
+
+def validate_simulation(
+    returns: np.ndarray,
+    method: str,
+    paths: int,
+    horizon: int,
+    block_size: int,
+    confidence_levels: List[float]
+) -> None:
+    """Check simulation inputs.
+
+    RAISES:
+        ValueError: If any parameter is out of range or the history is too short.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+    if not 1 <= paths <= MAX_SIMULATION_PATHS:
+        raise ValueError(f'paths must be between 1 and {MAX_SIMULATION_PATHS}')
+    if not 1 <= horizon <= MAX_HORIZON_DAYS:
+        raise ValueError(f'horizon must be between 1 and {MAX_HORIZON_DAYS} trading days')
+    if block_size < 1:
+        raise ValueError('block_size must be at least 1')
+    if len(returns) < max(2, block_size):
+        raise ValueError(f'Need at least {max(2, block_size)} historical returns, got {len(returns)}')
+    if not np.all(np.isfinite(returns)) or np.any(returns <= -1):
+        raise ValueError('Historical returns must be finite and above -100%')
+    if not confidence_levels or any(not 0.5 <= level < 1 for level in confidence_levels):
+        raise ValueError('confidence levels must be between 0.5 and 1')
+
+def iter_simulation(
+    returns: np.ndarray,
+    method: str = 'bootstrap',
+    paths: int = 10000,
+    horizon: int = TRADING_DAYS_PER_YEAR,
+    block_size: int = 5,
+    seed: Optional[int] = None,
+    confidence_levels: Optional[List[float]] = None,
+    initial_value: float = 10000,
+    workers: Optional[int] = None,
+    chunk_paths: int = DEFAULT_CHUNK_PATHS
+) -> Iterator[Dict[str, Any]]:
+    """Run a simulation, yielding running risk after each chunk and then a summary.
+
+    Each chunk draws from its own stream spawned from one ``SeedSequence``,
+    so a given seed reproduces the same paths whatever the worker count or
+    completion order. Chunks go to a process pool when there are enough
+    paths; only per-path terminal values and drawdowns are kept, so memory
+    is bounded by ``chunk_paths x horizon`` per worker.
+
+    RAISES:
+        ValueError: If parameters are invalid (raised before the first item).
+    """
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    levels = sorted(set(confidence_levels or DEFAULT_CONFIDENCE_LEVELS))
+    validate_simulation(returns, method, paths, horizon, block_size, levels)
+    seed_sequence = np.random.SeedSequence(seed)
+    sizes = _chunk_sizes(paths, max(1, chunk_paths))
+    streams = seed_sequence.spawn(len(sizes))
+    workers = max(1, min(workers or MAX_SIMULATION_WORKERS, MAX_SIMULATION_WORKERS, len(sizes)))
+    if paths < MIN_PARALLEL_PATHS:
+        workers = 1
+    return _run_chunks(returns, method, horizon, block_size, sizes, streams, workers, levels, initial_value, seed_sequence.entropy)
+
+def _run_chunks(returns, method, horizon, block_size, sizes, streams, workers, levels, initial_value, entropy) -> Iterator[Dict[str, Any]]:
+    aggregate = SimulationAggregate(horizon)
+    chunks: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def progress(index: int, chunk: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        chunks[index] = chunk
+        aggregate.add(chunk)
+        return {
+            'type': 'progress',
+            'chunks_done': len(chunks),
+            'chunks_total': len(sizes),
+            'paths_done': aggregate.paths,
+            'risk': aggregate.risk(levels)
+        }
+
+    logger.info(f"🎲 Simulating {sum(sizes)} {method} paths over {horizon} days in {len(sizes)} chunks on {workers} workers")
+    if workers == 1:
+        for index, (size, stream) in enumerate(zip(sizes, streams)):
+            yield progress(index, _simulate_chunk(method, returns, horizon, size, block_size, stream))
+    else:
+        # Spawn, not fork, so workers never inherit locks held by the API's threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {
+                pool.submit(_simulate_chunk, method, returns, horizon, size, block_size, stream): index
+                for index, (size, stream) in enumerate(zip(sizes, streams))
+            }
+            try:
+                for future in as_completed(futures):
+                    yield progress(futures[future], future.result())
+            finally:
+                # A consumer that stops early (e.g. a dropped stream) cancels queued chunks
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    # Merge in chunk order so the summary is bit-for-bit reproducible
+    ordered = SimulationAggregate(horizon)
+    for index in range(len(sizes)):
+        ordered.add(chunks[index])
+    summary = ordered.summary(levels, initial_value)
+    summary.update({
+        'type': 'summary',
+        'method': method,
+        'horizon_days': horizon,
+        'block_size': block_size if method == 'bootstrap' else None,
+        'seed': entropy,
+        'chunks': len(sizes),
+        'workers': workers,
+        'initial_value': initial_value,
+        'history': {
+            'observations': len(returns),
+            'annual_return': float(returns.mean() * TRADING_DAYS_PER_YEAR),
+            'annual_volatility': float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR))
+        }
+    })
+    yield summary
+
+def run_simulation(returns: np.ndarray, **kwargs) -> Dict[str, Any]:
+    """Run ``iter_simulation`` to completion and return its summary."""
+    result = None
+    for result in iter_simulation(returns, **kwargs):
+        pass
+    return result
+
+def portfolio_returns(tickers: List[str], start_date: str, end_date: str, weights: Union[None, List[float], Dict[str, float]] = None) -> np.ndarray:
+    """Daily returns of a daily-rebalanced portfolio over the shared trading days.
+
+    RAISES:
+        ValueError: If tickers or weights are invalid or data is missing.
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+    if not tickers:
+        raise ValueError('No tickers provided')
+    aligned = align_closes(tickers, start_date, end_date)
+    prices = aligned.matrix[:, [aligned.tickers.index(t) for t in tickers]]
+    return (prices[1:] / prices[:-1] - 1) @ normalize_weights(tickers, weights)
+
+def strategy_returns(ticker: str, strategy_type: str, params: Optional[Dict[str, Any]], start_date: str, end_date: str) -> np.ndarray:
+    """Daily returns of a strategy's backtest equity curve on one ticker.
+
+    RAISES:
+        ValueError: If the strategy spec is invalid or data is missing.
+    """
+    series = get_price_series(ticker, start_date, end_date)
+    if series is None:
+        raise ValueError(f'No price data for {ticker}')
+    close = np.asarray(series.columns['Close'], dtype=float)
+    equity = np.asarray(run_backtest(close, build_signals(close, strategy_type, params), detail=True)['equity'])
+    # The first step only marks the starting cash to the first bar
+    return (equity[1:] / equity[:-1] - 1)[1:]
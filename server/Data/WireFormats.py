@@ -0,0 +1,296 @@
+import os
+import gzip
+import json
+import time
+import struct
+import logging
+import numpy as np
+from typing import Optional, Dict, Any, List, Tuple
+from DataCache import DataCache
+from PriceSeries import PriceSeries
+from Metrics import stage
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always offered
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Supported wire formats and the media type each one is served as
+FORMAT_MIMETYPES = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.finrus.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'binary': 'application/vnd.finrus.ohlcv'
+}
+FORMAT_ALIASES = {
+    'records': 'json',
+    'columns': 'columnar',
+    'ipc': 'arrow',
+    'bin': 'binary'
+}
+
+# Encoded payloads are kept separately from the series cache, keyed by the
+# series' fetch time so a refetch never serves stale bytes
+ENCODED_CACHE_MAX_BYTES = int(os.environ.get('FINRUS_ENCODED_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+ENCODED_CACHE_TTL = 300
+_encoded = DataCache(max_bytes=ENCODED_CACHE_MAX_BYTES, ttl_seconds=ENCODED_CACHE_TTL)
+
+# First time each content hash was served, used as its Last-Modified; outlives
+# refetches of the same bars so polling clients keep getting 304s
+_first_seen = DataCache(max_bytes=4 * 1024 * 1024, ttl_seconds=24 * 3600)
+
+# Bodies below this size are sent as is; compression framing would eat the savings
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = int(os.environ.get('FINRUS_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('FINRUS_BROTLI_QUALITY', 5))
+
+# Compact binary layout:
+#   header   'FRUS' | u8 version | 3 pad bytes | u32 metadata length | 4 pad bytes
+#   metadata UTF-8 JSON, zero-padded to 8 bytes
+#   payload  u32 rows | u16 columns | 2 pad bytes
+#            per column: u8 type ('i' int32, 'q' int64, 'd' float64) | u8 name length | name
+#            zero-padded to 8 bytes, then each column's little-endian values
+#            padded to 8 bytes. 'Date' is int32 days since 1970-01-01.
+BINARY_MAGIC = b'FRUS'
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct('<4sB3xI4x')
+_BINARY_PAYLOAD_HEADER = struct.Struct('<IH2x')
+
+def negotiate_format(format_param: Optional[str], accept_mimetypes=None) -> str:
+    """Pick the wire format from a ``format`` parameter or an Accept header.
+
+    An explicit ``format`` parameter wins. Otherwise the best Accept match
+    among the supported media types is used, defaulting to records JSON.
+
+    RAISES:
+        ValueError: If the ``format`` parameter names an unknown format.
+    """
+    if format_param:
+        fmt = format_param.strip().lower()
+        fmt = FORMAT_ALIASES.get(fmt, fmt)
+        if fmt not in FORMAT_MIMETYPES:
+            raise ValueError(f"Unsupported format: {format_param} (use one of: {', '.join(FORMAT_MIMETYPES)})")
+        return fmt
+    if accept_mimetypes:
+        # Prefer records JSON on ties so '*/*' keeps the original behaviour
+        best = accept_mimetypes.best_match(list(FORMAT_MIMETYPES.values()), default=FORMAT_MIMETYPES['json'])
+        for fmt, mimetype in FORMAT_MIMETYPES.items():
+            if mimetype == best:
+                return fmt
+    return 'json'
+
+def arrow_available() -> bool:
+    """Whether pyarrow is installed so Arrow IPC output can be served."""
+    return pa is not None
+
+def content_encodings() -> List[str]:
+    """Content codings this server can produce, most preferred first."""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+def negotiate_encoding(accept_encodings=None) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, or None for identity."""
+    if not accept_encodings:
+        return None
+    return accept_encodings.best_match(content_encodings())
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+def _pad8(data: bytes) -> bytes:
+    return data + b'\0' * (-len(data) % 8)
+
+def _date_days(series: PriceSeries) -> np.ndarray:
+    """Dates of a series as int32 days since the Unix epoch."""
+    return series.dates.astype('datetime64[D]').astype(np.int32)
+
+def _encode_records(series: PriceSeries) -> bytes:
+    """Rows as a JSON array of objects, like the original response."""
+    return _dumps(series.records())
+
+def _encode_columnar(series: PriceSeries) -> bytes:
+    """Rows as one JSON array per column; field names are sent once."""
+    return _dumps(series.column_lists())
+
+def _encode_arrow(series: PriceSeries) -> bytes:
+    """Rows as an Arrow IPC stream with 'Date' as date32."""
+    arrays = [pa.array(_date_days(series), type=pa.int32()).cast(pa.date32())]
+    arrays += [pa.array(values) for values in series.columns.values()]
+    table = pa.Table.from_arrays(arrays, names=['Date'] + series.column_names)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _binary_column(name: str, values: np.ndarray) -> Tuple[bytes, bytes]:
+    """Return ``(descriptor, data)`` for one column of the binary layout."""
+    code = b'q' if values.dtype.kind == 'i' else b'd'
+    encoded = name.encode('utf-8')
+    values = values.astype('<i8' if code == b'q' else '<f8', copy=False)
+    return code + bytes([len(encoded)]) + encoded, _pad8(values.tobytes())
+
+def _encode_binary(series: PriceSeries) -> bytes:
+    """Rows as fixed-width little-endian columns (see the layout above)."""
+    descriptors = [b'i' + bytes([4]) + b'Date']
+    blocks = [_pad8(_date_days(series).astype('<i4').tobytes())]
+    for name, values in series.columns.items():
+        descriptor, block = _binary_column(name, values)
+        descriptors.append(descriptor)
+        blocks.append(block)
+    header = _BINARY_PAYLOAD_HEADER.pack(len(series), len(descriptors))
+    return header + _pad8(b''.join(descriptors)) + b''.join(blocks)
+
+_ENCODERS = {
+    'json': _encode_records,
+    'columnar': _encode_columnar,
+    'arrow': _encode_arrow,
+    'binary': _encode_binary
+}
+
+def encode_payload(fmt: str, ticker: str, series: PriceSeries) -> bytes:
+    """Return the encoded rows of a price series, reusing cached bytes.
+
+    The cache key includes the series' fetch time and bounds, so the same
+    cached series sliced the same way hits while a refreshed one misses.
+    """
+    if fmt == 'arrow' and pa is None:
+        raise ValueError('Arrow output requires pyarrow')
+    key = (fmt, ticker) + series.cache_key()
+    payload, _ = _encoded.get_or_load(key, lambda: _encode(fmt, series))
+    return payload
+
+def _encode(fmt: str, series: PriceSeries) -> bytes:
+    with stage('serialize'):
+        return _ENCODERS[fmt](series)
+
+def build_body(
+    fmt: str,
+    ticker: str,
+    series: PriceSeries,
+    metadata: Dict[str, Any],
+    encoding: Optional[str] = None
+) -> Tuple[bytes, Dict[str, str]]:
+    """Wrap a series' encoded rows in the per-request envelope.
+
+    Only the row payload is cached; the small envelope (metadata, cached
+    flag) is spliced around it on every request. With an ``encoding``,
+    the compressed body is cached under the series and metadata, so
+    repeated hits on a hot key skip both the envelope and compression.
+
+    RETURNS:
+        tuple: ``(body, headers)``. Arrow responses carry the metadata in
+            an ``X-FinRus-Metadata`` header since the IPC stream is cached
+            as is; compressed bodies carry ``Content-Encoding``.
+    """
+    if encoding is None:
+        payload = encode_payload(fmt, ticker, series)
+        with stage('envelope'):
+            return _envelope(fmt, ticker, payload, metadata)
+    key = ('compressed', encoding, fmt, ticker) + series.cache_key() + (_dumps(metadata),)
+
+    def load() -> Tuple[bytes, Dict[str, str]]:
+        body, headers = build_body(fmt, ticker, series, metadata)
+        if len(body) < MIN_COMPRESS_BYTES:
+            return body, headers
+        return _compress(body, encoding), dict(headers, **{'Content-Encoding': encoding})
+
+    (body, headers), _ = _encoded.get_or_load(key, load)
+    return body, dict(headers)
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    with stage('compress'):
+        if encoding == 'br':
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        # A fixed mtime keeps gzip output identical for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def content_validators(fmt: str, ticker: str, series: PriceSeries) -> Tuple[str, float]:
+    """Return ``(etag, last_modified)`` for a series in a wire format.
+
+    The ETag hashes the bars themselves rather than the fetch time, so a
+    refetch of unchanged data keeps its ETag; Last-Modified is when this
+    process first served that content. Both ignore the envelope metadata,
+    so the ETag should be sent as a weak validator.
+    """
+    digest, _ = _encoded.get_or_load(('etag', ticker) + series.cache_key(), series.content_hash)
+    etag = f'{fmt}-{digest}'
+    last_modified, _ = _first_seen.get_or_load((ticker, etag), lambda: float(int(time.time())))
+    return etag, last_modified
+
+def _envelope(fmt: str, ticker: str, payload: bytes, metadata: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    if fmt == 'arrow':
+        return payload, {'X-FinRus-Ticker': ticker, 'X-FinRus-Metadata': json.dumps(metadata)}
+    if fmt == 'binary':
+        meta = _dumps({'ticker': ticker, 'success': True, 'metadata': metadata})
+        header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(meta))
+        return header + _pad8(meta) + payload, {}
+    # Records JSON keeps the original response shape; other formats name themselves
+    body = b''.join([
+        b'{"ticker":', _dumps(ticker),
+        b',"format":' + _dumps(fmt) if fmt != 'json' else b'',
+        b',"data":', payload,
+        b',"metadata":', _dumps(metadata),
+        b',"success":true}'
+    ])
+    return body, {}
+
+def encode_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Turn a records list into ``{column: values}`` for columnar JSON."""
+    if not records:
+        return {}
+    return {name: [row.get(name) for row in records] for name in records[0]}
+
+def decode_binary(body: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Parse the compact binary layout back into ``(envelope, columns)``.
+
+    Columns are zero-copy views onto ``body``; 'Date' is returned as
+    ``datetime64[D]``.
+
+    RAISES:
+        ValueError: If the body is not a supported binary payload.
+    """
+    magic, version, meta_len = _BINARY_HEADER.unpack_from(body, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError('Not a FinRus binary payload')
+    offset = _BINARY_HEADER.size
+    envelope = json.loads(body[offset:offset + meta_len])
+    offset += meta_len + (-meta_len % 8)
+
+    rows, count = _BINARY_PAYLOAD_HEADER.unpack_from(body, offset)
+    offset += _BINARY_PAYLOAD_HEADER.size
+    start = offset
+    descriptors = []
+    for _ in range(count):
+        code, length = chr(body[offset]), body[offset + 1]
+        descriptors.append((code, body[offset + 2:offset + 2 + length].decode('utf-8')))
+        offset += 2 + length
+    offset += -(offset - start) % 8
+
+    dtypes = {'i': '<i4', 'q': '<i8', 'd': '<f8'}
+    columns = {}
+    for code, name in descriptors:
+        values = np.frombuffer(body, dtype=dtypes[code], count=rows, offset=offset)
+        offset += values.nbytes + (-values.nbytes % 8)
+        columns[name] = values.astype('datetime64[D]') if name == 'Date' else values
+    return envelope, columns
+
+def get_encoded_cache_info() -> Dict[str, Any]:
+    """Return stats for the encoded-payload cache."""
+    info = _encoded.info()
+    info['arrow_available'] = arrow_available()
+    info['content_encodings'] = content_encodings()
+    info['validators'] = _first_seen.info()
+    return info
+
+def clear_encoded_cache() -> int:
+    """Drop every cached encoded payload and return how many were removed.
+
+    Last-Modified times are kept so clients' validators stay valid.
+    """
+    return _encoded.clear()
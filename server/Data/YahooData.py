@@ -1,94 +1,183 @@
 import pandas as pd
-import yfinance as yf
 import time
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import logging
-import hashlib
-from typing import Optional, Dict, Any, List
+import sqlite3
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from DataProviders import YFinanceProvider, TokenBucket, CircuitBreaker, UpstreamUnavailableError
+from PriceStore import PriceStore
+from DataCache import RangeCache, DataCache
+from PriceSeries import PriceSeries
+from SharedCache import SharedSeriesCache, DEFAULT_SHARED_CACHE_PATH
+from CacheWarmer import CacheWarmer
+from Resampling import reduce_series, normalize_interval, validate_max_points, clear_reduced_cache, get_reduced_cache_info
+from Metrics import stage, in_current_context, UPSTREAM_REQUESTS, UPSTREAM_RETRIES
 
 # Set up logging for better error tracking
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# In-memory cache with expiration
-_cache: Dict[str, Dict[str, Any]] = {}
-_cache_expiry: Dict[str, datetime] = {}
+# Bounded in-memory LRU cache with expiration, indexed by ticker and date range
 CACHE_DURATION = 300  # 5 minutes
+CACHE_MAX_BYTES = int(os.environ.get('FINRUS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Expired entries are still served this long while a background refresh runs
+CACHE_STALE_SECONDS = float(os.environ.get('FINRUS_CACHE_STALE_SECONDS', 120))
+_cache = RangeCache(max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_DURATION, stale_seconds=CACHE_STALE_SECONDS)
 
-def _get_cache_key(ticker: str, start_date: str, end_date: str) -> str:
-    """Generate cache key for the request."""
-    return hashlib.md5(f"{ticker}_{start_date}_{end_date}".encode()).hexdigest()
+# Upstream data provider (swappable for offline testing)
+_provider = YFinanceProvider()
 
-def _is_cache_valid(cache_key: str) -> bool:
-    """Check if cached data is still valid."""
-    if cache_key not in _cache_expiry:
-        return False
-    return datetime.now() < _cache_expiry[cache_key]
+# Retries back off exponentially with full jitter, capped at this many seconds
+BACKOFF_MAX_SECONDS = float(os.environ.get('FINRUS_BACKOFF_MAX_SECONDS', 8))
+
+# One circuit breaker per upstream provider name
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('FINRUS_BREAKER_FAILURES', 5))
+BREAKER_RESET_SECONDS = float(os.environ.get('FINRUS_BREAKER_RESET_SECONDS', 30))
+_breakers: Dict[str, CircuitBreaker] = {}
+
+# Short-lived cache of ranges that returned no data (bad or delisted tickers)
+NEGATIVE_CACHE_SECONDS = float(os.environ.get('FINRUS_NEGATIVE_CACHE_SECONDS', 60))
+_negative_cache = DataCache(max_bytes=4 * 1024 * 1024, ttl_seconds=NEGATIVE_CACHE_SECONDS)
+
+# Shared pacing toward the upstream and bounded fan-out for multi-ticker fetches
+UPSTREAM_RATE_PER_SECOND = float(os.environ.get('FINRUS_UPSTREAM_RATE', 5))
+UPSTREAM_BURST = float(os.environ.get('FINRUS_UPSTREAM_BURST', 10))
+MAX_FETCH_WORKERS = int(os.environ.get('FINRUS_FETCH_WORKERS', 8))
+_upstream_limiter = TokenBucket(rate=UPSTREAM_RATE_PER_SECOND, capacity=UPSTREAM_BURST)
+
+# Persistent on-disk price store sitting under the in-memory cache
+PRICE_STORE_DIR = os.environ.get('FINRUS_PRICE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_store'))
+USE_PRICE_STORE = os.environ.get('FINRUS_USE_PRICE_STORE', 'true').lower() == 'true'
+_price_store: Optional[PriceStore] = PriceStore(PRICE_STORE_DIR) if USE_PRICE_STORE else None
+
+# Host-wide cache tier shared by all worker processes, behind the in-process cache
+SHARED_CACHE_PATH = os.environ.get('FINRUS_SHARED_CACHE_PATH', DEFAULT_SHARED_CACHE_PATH)
+SHARED_CACHE_MAX_BYTES = int(os.environ.get('FINRUS_SHARED_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+USE_SHARED_CACHE = os.environ.get('FINRUS_USE_SHARED_CACHE', 'true').lower() == 'true'
+_shared_cache: Optional[SharedSeriesCache] = (
+    SharedSeriesCache(SHARED_CACHE_PATH, ttl_seconds=CACHE_DURATION, max_bytes=SHARED_CACHE_MAX_BYTES)
+    if USE_SHARED_CACHE else None
+)
+
+# Background refresh-ahead warmer for the watchlist and popular ranges
+WARMER_ENABLED = os.environ.get('FINRUS_CACHE_WARMER', 'true').lower() == 'true'
+WARM_WATCHLIST = os.environ.get('FINRUS_WARM_WATCHLIST', '')
+WARM_DAYS_BACK = int(os.environ.get('FINRUS_WARM_DAYS', 30))
+WARM_WORKERS = int(os.environ.get('FINRUS_WARM_WORKERS', 2))
+WARM_BUDGET_PER_MINUTE = float(os.environ.get('FINRUS_WARM_BUDGET_PER_MINUTE', 30))
+REFRESH_AHEAD_SECONDS = float(os.environ.get('FINRUS_REFRESH_AHEAD_SECONDS', 60))
+WARM_INTERVAL_SECONDS = float(os.environ.get('FINRUS_WARM_INTERVAL', 15))
 
-def _fetch_data_simple(ticker: str, start_date: str, end_date: str, retries: int = 3, delay: int = 1) -> Optional[pd.DataFrame]:
+def set_provider(provider) -> None:
+    """Replace the upstream data provider (e.g. with a local fake)."""
+    global _provider
+    _provider = provider
+    logger.info(f"🔌 Upstream provider set to {getattr(provider, 'name', type(provider).__name__)}")
+
+def set_price_store(store: Optional[PriceStore]) -> None:
+    """Replace the persistent price store, or disable it with None."""
+    global _price_store
+    _price_store = store
+
+def set_shared_cache(cache: Optional[SharedSeriesCache]) -> None:
+    """Replace the cross-process cache tier, or disable it with None."""
+    global _shared_cache
+    _shared_cache = cache
+
+def _get_breaker() -> CircuitBreaker:
+    """Return the circuit breaker for the current provider, creating it on first use."""
+    name = getattr(_provider, 'name', type(_provider).__name__)
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers.setdefault(name, CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS))
+    return breaker
+
+def _backoff_delay(attempt: int, delay: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, delay * 2**attempt)]."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, delay * (2 ** attempt)))
+
+def _fetch_data_simple(ticker: str, start_date: str, end_date: str, retries: int = 3, delay: int = 1, empty_ok: bool = False) -> Optional[pd.DataFrame]:
     """
     Simple fetch function using the exact approach from Tester.ipynb that works.
-    Returns pandas DataFrame directly.
+    Returns pandas DataFrame directly, or None when upstream has no data
+    (with ``empty_ok``, an empty DataFrame at once, without retrying; e.g.
+    a holiday-only gap or a range before the listing date).
+    
+    Raises UpstreamUnavailableError when the upstream keeps failing or its
+    circuit breaker is open, so callers can fail fast or fall back.
     """
+    breaker = _get_breaker()
     for attempt in range(retries):
+        if not breaker.allow():
+            raise UpstreamUnavailableError(f"Upstream {breaker.name} unavailable (circuit open)")
         try:
-            # Getting stock data (exact same approach as notebook)
-            stock = yf.Ticker(ticker)
-            # Fetch historical data
-            hist = stock.history(start=start_date, end=end_date)
-            
-            # Check if data is empty
-            if hist.empty:
-                logger.warning(f"No data found for {ticker} between {start_date} and {end_date}.")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying...({attempt + 1}/{retries})")
-                    time.sleep(delay)
-                    continue
-                else:
-                    logger.error(f"No data available after {retries} attempts")
-                    return None
-            
-            # Success - return the DataFrame
-            return hist
-            
+            # Fetch historical data from the configured provider
+            _upstream_limiter.acquire()
+            with stage('upstream_fetch'):
+                hist = _provider.history(ticker, start_date, end_date)
         except Exception as e:
+            breaker.record_failure()
+            UPSTREAM_REQUESTS.inc(upstream=breaker.name, outcome='error')
             logger.error(f"❌ Error fetching {ticker} data: {str(e)}")
             
+            # Stop retrying as soon as this failure opened the circuit
+            if attempt < retries - 1 and not breaker.is_open:
+                wait = _backoff_delay(attempt, delay)
+                UPSTREAM_RETRIES.inc(upstream=breaker.name, reason='error')
+                logger.info(f"Retrying in {wait:.2f} seconds...")
+                time.sleep(wait)
+                continue
+            logger.error(f"All retry attempts failed for {ticker}")
+            raise UpstreamUnavailableError(f"Upstream {breaker.name} failed for {ticker}: {str(e)}") from e
+        
+        # The upstream answered, even if it had nothing for this range
+        breaker.record_success()
+        
+        # Check if data is empty
+        if hist is None or hist.empty:
+            UPSTREAM_REQUESTS.inc(upstream=breaker.name, outcome='empty')
+            logger.warning(f"No data found for {ticker} between {start_date} and {end_date}.")
+            if empty_ok:
+                # The store records the empty answer; retrying would only hold its ticker lock longer
+                return pd.DataFrame()
             if attempt < retries - 1:
-                logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                logger.error(f"All retry attempts failed for {ticker}")
-                return None
+                UPSTREAM_RETRIES.inc(upstream=breaker.name, reason='empty')
+                logger.info(f"Retrying...({attempt + 1}/{retries})")
+                time.sleep(_backoff_delay(attempt, delay))
+                continue
+            logger.error(f"No data available after {retries} attempts")
+            return None
+        
+        # Success - return the DataFrame
+        UPSTREAM_REQUESTS.inc(upstream=breaker.name, outcome='ok')
+        return hist
     
     return None
 
-def fetch_historical_data(
-    ticker: str, 
-    start_date: str, 
-    end_date: str, 
-    retries: int = 3, 
-    delay: int = 1, 
-    use_cache: bool = True
-) -> Optional[Dict[str, Any]]:
-    """Fetch historical stock data from Yahoo Finance with caching support.
-    Uses the simple, proven approach from Tester.ipynb.
+def _load_history(ticker: str, start_date: str, end_date: str, retries: int, delay: int, use_store: bool) -> Optional[pd.DataFrame]:
+    """Load bars through the price store, fetching only missing ranges upstream."""
+    if not use_store or _price_store is None:
+        return _fetch_data_simple(ticker, start_date, end_date, retries, delay)
+    try:
+        return _price_store.read(
+            ticker, start_date, end_date,
+            fetch=lambda gap_start, gap_end: _fetch_data_simple(ticker, gap_start, gap_end, retries, delay, empty_ok=True)
+        )
+    except UpstreamUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Price store read failed for {ticker}, falling back to upstream: {str(e)}")
+        return _fetch_data_simple(ticker, start_date, end_date, retries, delay)
+
+def _normalize_request(ticker: str, start_date: str, end_date: str) -> Tuple[str, str, str]:
+    """Validate a request and clamp future dates, returning the effective range.
     
-    ARGS:
-        ticker (str): Stock ticker symbol.
-        start_date (str): Start date in 'YYYY-MM-DD' format.
-        end_date (str): End date in 'YYYY-MM-DD' format.
-        retries (int): Number of retry attempts.
-        delay (int): Delay between retries in seconds.
-        use_cache (bool): Whether to use caching mechanism.
-        
-    RETURNS:
-        dict: Dictionary containing historical stock data, or None if all attempts fail.
-              
     RAISES:
         ValueError: If ticker is invalid or dates are malformed.
     """
-    
     # Input validation
     if not ticker or not isinstance(ticker, str):
         raise ValueError("Ticker must be a non-empty string")
@@ -114,74 +203,415 @@ def fetch_historical_data(
         start_date = (today - timedelta(days=30)).strftime('%Y-%m-%d')
         logger.warning(f"Start date was in future, adjusted to last 30 days: {start_date} to {end_date}")
     
-    # Check cache first
-    if use_cache:
-        cache_key = _get_cache_key(ticker, start_date, end_date)
-        if cache_key in _cache and _is_cache_valid(cache_key):
-            logger.info(f"📊 Returning cached data for {ticker}")
-            cached_data = _cache[cache_key].copy()
-            cached_data['metadata']['cached'] = True
-            return cached_data
-    
-    # Use the simple fetch function from notebook
-    logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
-    hist = _fetch_data_simple(ticker, start_date, end_date, retries, delay)
+    return ticker, start_date, end_date
+
+def fetch_historical_data(
+    ticker: str, 
+    start_date: str, 
+    end_date: str, 
+    retries: int = 3, 
+    delay: int = 1, 
+    use_cache: bool = True,
+    interval: str = 'daily',
+    max_points: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Fetch historical stock data from Yahoo Finance with caching support.
+    Uses the simple, proven approach from Tester.ipynb.
+    
+    ARGS:
+        ticker (str): Stock ticker symbol.
+        start_date (str): Start date in 'YYYY-MM-DD' format.
+        end_date (str): End date in 'YYYY-MM-DD' format.
+        retries (int): Number of retry attempts.
+        delay (int): Delay between retries in seconds.
+        use_cache (bool): Whether to use the in-memory cache and the on-disk
+            price store. When False the full range is fetched upstream.
+        interval (str): 'daily', 'weekly' or 'monthly' OHLCV bars.
+        max_points (int): Optional cap on returned bars, chosen by LTTB
+            downsampling so charts keep their shape.
+        
+    RETURNS:
+        dict: Dictionary containing historical stock data, or None if all attempts fail.
+              
+    RAISES:
+        ValueError: If ticker is invalid or dates are malformed.
+    """
+    
+    series, metadata = fetch_historical_series(ticker, start_date, end_date, retries, delay, use_cache, interval, max_points)
+    ticker = ticker.upper().strip()
+    if series is None:
+        return {'ticker': ticker, 'data': [], 'metadata': metadata}
+    with stage('serialize'):
+        records = series.records()
+    return {'ticker': ticker, 'data': records, 'metadata': metadata}
+
+def fetch_historical_series(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    retries: int = 3,
+    delay: int = 1,
+    use_cache: bool = True,
+    interval: str = 'daily',
+    max_points: Optional[int] = None
+) -> Tuple[Optional[PriceSeries], Dict[str, Any]]:
+    """Fetch historical data as a cached price series plus response metadata.
+    
+    Same lookup path as ``fetch_historical_data`` but without building the
+    records list, so callers that serialize the series themselves (columnar
+    and binary wire formats) skip the per-row dict conversion. Resampled
+    and downsampled series are computed from the cached daily bars and
+    cached themselves.
+    
+    RETURNS:
+        tuple: ``(series, metadata)``. ``series`` is None when no data was
+            found or the fetch failed; ``metadata`` then carries the error.
+              
+    RAISES:
+        ValueError: If ticker is invalid or dates are malformed.
+    """
+    ticker, start_date, end_date = _normalize_request(ticker, start_date, end_date)
+    interval = normalize_interval(interval)
+    max_points = validate_max_points(max_points)
+    
+    try:
+        series, cached = _get_series(ticker, start_date, end_date, retries, delay, use_cache)
+    except Exception as e:
+        logger.error(f"❌ Error processing data for {ticker}: {str(e)}")
+        return None, _create_error_response(ticker, start_date, end_date, str(e), retries)['metadata']
     
     # Check if we got data
-    if hist is None or hist.empty:
+    if series is None or series.empty:
         logger.error(f"No data available for {ticker}")
-        return _create_error_response(ticker, start_date, end_date, "No data found", retries)
+        return None, _create_error_response(ticker, start_date, end_date, "No data found", retries)['metadata']
+    
+    if cached:
+        logger.info(f"📊 Returning cached data for {ticker}")
+    else:
+        logger.info(f"✅ Successfully fetched {len(series)} data points for {ticker}")
+    with stage('transform'):
+        series = reduce_series(ticker, series, interval, max_points)
+    return series, _series_metadata(series, start_date, end_date, cached)
+
+def get_price_series(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    retries: int = 3,
+    delay: int = 1,
+    use_cache: bool = True
+) -> Optional[PriceSeries]:
+    """Return the cached, read-only price series for a range.
+    
+    RETURNS:
+        PriceSeries: Bars with prices rounded like the JSON response, or
+            None if no data is available.
+    
+    RAISES:
+        ValueError: If ticker is invalid or dates are malformed.
+    """
+    ticker, start_date, end_date = _normalize_request(ticker, start_date, end_date)
+    series, _ = _get_series(ticker, start_date, end_date, retries, delay, use_cache)
+    if series is None or series.empty:
+        return None
+    return series
+
+def get_price_series_many(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    retries: int = 3,
+    delay: int = 1,
+    use_cache: bool = True,
+    max_workers: int = MAX_FETCH_WORKERS
+) -> Dict[str, Optional[PriceSeries]]:
+    """Return cached price series for several tickers, fetched concurrently.
+    
+    Cold tickers are seeded with one batch download first, like
+    ``fetch_multiple_tickers``, but no records are built.
+    
+    RAISES:
+        ValueError: If a ticker is invalid or dates are malformed.
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers))
+    if use_cache and len(tickers) > 1:
+        prefetch_tickers(tickers, start_date, end_date)
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        series = executor.map(in_current_context(lambda t: get_price_series(t, start_date, end_date, retries, delay, use_cache)), tickers)
+        return dict(zip(tickers, series))
+
+def get_unrounded_series_many(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    retries: int = 3,
+    delay: int = 1,
+    max_workers: int = MAX_FETCH_WORKERS
+) -> Dict[str, Optional[PriceSeries]]:
+    """Return price series for several tickers at the provider's full precision.
+    
+    The caches hold prices rounded for JSON, so this reads past them,
+    through the price store when enabled (which keeps upstream precision).
+    Cold tickers are still seeded with one batch download.
+    
+    RAISES:
+        ValueError: If a ticker is invalid or dates are malformed.
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers))
+    if _price_store is not None and len(tickers) > 1:
+        prefetch_tickers(tickers, start_date, end_date)
+    
+    def load(ticker: str) -> Optional[PriceSeries]:
+        ticker, start, end = _normalize_request(ticker, start_date, end_date)
+        hist = _load_history(ticker, start, end, retries, delay, use_store=True)
+        if hist is None or hist.empty:
+            return None
+        return PriceSeries.from_frame(_prepare_frame(hist, decimals=None))
+    
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(tickers, executor.map(in_current_context(load), tickers)))
+
+def get_price_frame(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    retries: int = 3,
+    delay: int = 1,
+    use_cache: bool = True
+) -> Optional[pd.DataFrame]:
+    """Return the prepared OHLCV DataFrame behind ``fetch_historical_data``.
+    
+    Used by the in-process analytics (backtests, indicators) so they work on
+    the cached arrays directly instead of the JSON records. The frame is a
+    writable copy of the cached series.
     
+    RETURNS:
+        DataFrame: Bars indexed by a tz-naive 'Date' index with prices rounded
+            like the JSON response, or None if no data is available.
+    
+    RAISES:
+        ValueError: If ticker is invalid or dates are malformed.
+    """
+    series = get_price_series(ticker, start_date, end_date, retries, delay, use_cache)
+    return series.to_frame() if series is not None else None
+
+def _get_series(ticker: str, start_date: str, end_date: str, retries: int, delay: int, use_cache: bool) -> Tuple[Optional[PriceSeries], bool]:
+    """Return ``(series, cached)`` for a normalized request.
+    
+    While the upstream is unavailable, the last known bars from the price
+    store are served instead, marked stale.
+    """
     try:
-        # Reset index to make 'Date' a column
-        hist_reset = hist.reset_index()
-        
-        # Convert datetime index to string for JSON serialization
-        # Handle timezone-aware dates properly
-        if 'Date' in hist_reset.columns:
-            # Remove timezone info and format as string
-            if hist_reset['Date'].dt.tz is not None:
-                hist_reset['Date'] = hist_reset['Date'].dt.tz_localize(None)
-            hist_reset['Date'] = hist_reset['Date'].dt.strftime('%Y-%m-%d')
-        
-        # Round numerical values for cleaner JSON
-        numerical_columns = ['Open', 'High', 'Low', 'Close', 'Adj Close']
-        for col in numerical_columns:
-            if col in hist_reset.columns:
-                hist_reset[col] = hist_reset[col].round(2)
-        
-        # Convert Volume to int if it exists
-        if 'Volume' in hist_reset.columns:
-            hist_reset['Volume'] = hist_reset['Volume'].astype(int)
-        
-        # Create response data
-        data_json = {
-            'ticker': ticker,
-            'data': hist_reset.to_dict(orient='records'),
-            'metadata': {
-                'start_date': start_date,
-                'end_date': end_date,
-                'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'data_points': len(hist_reset),
-                'success': True,
-                'cached': False,
-                'columns': list(hist_reset.columns)
-            }
-        }
-        
-        # Cache the result
-        if use_cache:
-            cache_key = _get_cache_key(ticker, start_date, end_date)
-            _cache[cache_key] = data_json.copy()
-            _cache_expiry[cache_key] = datetime.now() + timedelta(seconds=CACHE_DURATION)
-            logger.info(f"💾 Cached data for {ticker}")
-        
-        logger.info(f"✅ Successfully fetched {len(hist_reset)} data points for {ticker}")
-        return data_json
-        
+        return _get_live_series(ticker, start_date, end_date, retries, delay, use_cache)
+    except UpstreamUnavailableError as e:
+        fallback = _last_known_series(ticker, start_date, end_date)
+        if fallback is None:
+            raise
+        logger.warning(f"⚡ {str(e)}; serving last stored data for {ticker}")
+        return fallback, True
+
+def _get_live_series(ticker: str, start_date: str, end_date: str, retries: int, delay: int, use_cache: bool) -> Tuple[Optional[PriceSeries], bool]:
+    # Serve from any cached superset range; concurrent misses share one fetch
+    if use_cache:
+        _warmer.record(ticker, start_date, end_date)
+        return _cache.get_or_load(
+            ticker, start_date, end_date,
+            lambda: _load_uncached_series(ticker, start_date, end_date, retries, delay),
+            on_hit=lambda remaining: _on_cache_hit(ticker, start_date, end_date, remaining)
+        )
+    return _load_series(ticker, start_date, end_date, retries, delay, use_cache), False
+
+def _load_uncached_series(ticker: str, start_date: str, end_date: str, retries: int, delay: int) -> Tuple[Optional[PriceSeries], Optional[float]]:
+    """Load an in-process miss, short-circuiting ranges recently found to have no data.
+    
+    RETURNS:
+        tuple: ``(series, ttl_seconds)``, where the TTL is the shared
+            entry's remaining lifetime when the series came from that tier.
+    """
+    key = (ticker, start_date, end_date)
+    if _negative_cache.get(key) is not None:
+        logger.info(f"🚫 No data for {ticker} (negative cache)")
+        return None, None
+    series, ttl_seconds = _load_shared_series(ticker, start_date, end_date, retries, delay)
+    if series is None or series.empty:
+        _negative_cache.set(key, True, size=64)
+    return series, ttl_seconds
+
+def _last_known_series(ticker: str, start_date: str, end_date: str) -> Optional[PriceSeries]:
+    """Bars already in the price store for a range, without going upstream."""
+    if _price_store is None:
+        return None
+    try:
+        hist = _price_store.read(ticker, start_date, end_date, fetch=lambda gap_start, gap_end: None)
     except Exception as e:
-        logger.error(f"❌ Error processing data for {ticker}: {str(e)}")
-        return _create_error_response(ticker, start_date, end_date, str(e), retries)
+        logger.error(f"❌ Price store fallback failed for {ticker}: {str(e)}")
+        return None
+    if hist is None or hist.empty:
+        return None
+    frame = _prepare_frame(hist)
+    frame.attrs['stale'] = True
+    return PriceSeries.from_frame(frame)
+
+def _load_shared_series(ticker: str, start_date: str, end_date: str, retries: int, delay: int) -> Tuple[Optional[PriceSeries], Optional[float]]:
+    """Fill an in-process miss from the shared tier, loading once per host on a shared miss.
+    
+    RETURNS:
+        tuple: ``(series, remaining_ttl)``; the TTL is None unless the
+            series was read from the shared tier.
+    """
+    if _shared_cache is None:
+        return _load_series(ticker, start_date, end_date, retries, delay, True), None
+    try:
+        return _shared_cache.get_or_fill(
+            _shared_key(ticker, start_date, end_date),
+            lambda: _load_series(ticker, start_date, end_date, retries, delay, True)
+        )
+    except sqlite3.Error as e:
+        # The shared tier is an optimization; never fail a request over it
+        logger.warning(f"Shared cache unavailable, loading {ticker} directly: {str(e)}")
+        return _load_series(ticker, start_date, end_date, retries, delay, True), None
+
+def _shared_key(ticker: str, start_date: str, end_date: str) -> str:
+    return f'{ticker}|{start_date}|{end_date}'
+
+def _on_cache_hit(ticker: str, start_date: str, end_date: str, remaining: float) -> None:
+    """Stale-while-revalidate: refresh stale or nearly expired hits in the background."""
+    if remaining <= 0:
+        logger.info(f"♻️ Serving stale data for {ticker}, refreshing in background")
+        _warmer.schedule(ticker, start_date, end_date)
+    elif remaining < REFRESH_AHEAD_SECONDS:
+        _warmer.schedule(ticker, start_date, end_date)
+
+def _refresh_series(ticker: str, start_date: str, end_date: str) -> Optional[bool]:
+    """Reload a range past both cache tiers and store the result in each.
+    
+    With the shared tier, a range another process refreshed recently is
+    adopted from it, and the tier's lease picks a single refresher per
+    range; None means another process holds that lease.
+    """
+    if _shared_cache is None:
+        return _reload_series(ticker, start_date, end_date)
+    key = _shared_key(ticker, start_date, end_date)
+    try:
+        series, remaining = _shared_cache.lookup(key)
+        if series is not None and remaining > REFRESH_AHEAD_SECONDS:
+            _cache.put(ticker, start_date, end_date, series, remaining)
+            return True
+        with _shared_cache.lease(key) as claimed:
+            return _reload_series(ticker, start_date, end_date) if claimed else None
+    except sqlite3.Error as e:
+        logger.warning(f"Shared cache unavailable, refreshing {ticker} locally: {str(e)}")
+        return _reload_series(ticker, start_date, end_date)
+
+def _reload_series(ticker: str, start_date: str, end_date: str) -> bool:
+    series = _load_series(ticker, start_date, end_date, retries=1, delay=0, use_store=True)
+    if series is None or series.empty:
+        return False
+    _cache.put(ticker, start_date, end_date, series)
+    if _shared_cache is not None:
+        _shared_cache.set(_shared_key(ticker, start_date, end_date), series)
+    return True
+
+def _warm_range() -> Tuple[str, str]:
+    return recent_date_range(WARM_DAYS_BACK)
+
+# Process that started the warmer; see ensure_cache_warmer
+_warmer_pid: Optional[int] = None
+
+_warmer = CacheWarmer(
+    refresh=_refresh_series,
+    remaining_ttl=_cache.remaining_ttl,
+    watch_range=_warm_range,
+    watchlist=WARM_WATCHLIST.split(','),
+    max_workers=WARM_WORKERS,
+    budget_per_minute=WARM_BUDGET_PER_MINUTE,
+    refresh_ahead_seconds=REFRESH_AHEAD_SECONDS,
+    interval_seconds=WARM_INTERVAL_SECONDS
+)
+
+def ensure_cache_warmer() -> bool:
+    """Start this process's warmer once, on first use rather than at import.
+    
+    Called per request so each server worker runs its own warmer thread,
+    including workers forked from a preloaded master (threads do not
+    survive a fork). Returns whether the warmer is enabled.
+    """
+    global _warmer_pid
+    if _warmer_pid != os.getpid():
+        _warmer_pid = os.getpid()
+        start_cache_warmer()
+    return WARMER_ENABLED
+
+def start_cache_warmer(watchlist: Optional[List[str]] = None) -> bool:
+    """Start the background warmer if enabled; returns whether it is running."""
+    if watchlist is not None:
+        _warmer.set_watchlist(watchlist)
+    if not WARMER_ENABLED:
+        return False
+    _warmer.start()
+    return True
+
+def set_warm_watchlist(tickers: List[str]) -> None:
+    """Replace the tickers the warmer keeps loaded."""
+    _warmer.set_watchlist(tickers)
+
+def get_warmer_info() -> Dict[str, Any]:
+    """Return the warmer's configuration and counters."""
+    info = _warmer.info()
+    info['enabled'] = WARMER_ENABLED
+    info['watch_days'] = WARM_DAYS_BACK
+    return info
+
+def _load_series(ticker: str, start_date: str, end_date: str, retries: int, delay: int, use_store: bool) -> Optional[PriceSeries]:
+    """Load bars for a validated request and pack them for caching."""
+    # Load from the price store, going upstream only for missing ranges
+    logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
+    hist = _load_history(ticker, start_date, end_date, retries, delay, use_store)
+    if hist is None or hist.empty:
+        return None
+    with stage('transform'):
+        return PriceSeries.from_frame(_prepare_frame(hist))
+
+def _prepare_frame(hist: pd.DataFrame, decimals: Optional[int] = 2) -> pd.DataFrame:
+    """Normalize a raw history frame to a tz-naive 'Date' index with prices rounded to ``decimals`` (None keeps them as is)."""
+    frame = hist.copy()
+    
+    # Remove timezone info so cached ranges can be sliced by plain dates
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize().rename('Date')
+    
+    # Round numerical values for cleaner JSON
+    numerical_columns = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+    for col in numerical_columns:
+        if col in frame.columns and decimals is not None:
+            frame[col] = frame[col].round(decimals)
+    
+    # Convert Volume to int if it exists
+    if 'Volume' in frame.columns:
+        frame['Volume'] = frame['Volume'].astype(int)
+    
+    frame.attrs['fetched_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return frame
+
+def _series_metadata(series: PriceSeries, start_date: str, end_date: str, cached: bool) -> Dict[str, Any]:
+    """Build the response metadata for a price series."""
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'fetched_at': series.attrs.get('fetched_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+        'data_points': len(series),
+        'success': True,
+        'cached': cached,
+        'stale': bool(series.attrs.get('stale', False)),
+        'columns': ['Date'] + series.column_names,
+        'interval': series.attrs.get('interval', 'daily'),
+        'max_points': series.attrs.get('max_points'),
+        'source_points': series.attrs.get('source_points', len(series))
+    }
 
 def _create_error_response(ticker: str, start_date: str, end_date: str, error_msg: str, attempts: int) -> Dict[str, Any]:
     """Create a standardized error response."""
@@ -206,9 +636,14 @@ def fetch_multiple_tickers(
     end_date: str, 
     retries: int = 3, 
     delay: int = 1,
-    use_cache: bool = True
+    use_cache: bool = True,
+    max_workers: int = MAX_FETCH_WORKERS
 ) -> Dict[str, Optional[Dict[str, Any]]]:
-    """Fetch historical data for multiple tickers.
+    """Fetch historical data for multiple tickers concurrently.
+    
+    Cold tickers are first fetched together with a single batch download
+    when the provider supports it; the rest run on a bounded thread pool.
+    All upstream calls share one token-bucket limiter.
     
     ARGS:
         tickers (list): List of ticker symbols.
@@ -217,21 +652,105 @@ def fetch_multiple_tickers(
         retries (int): Number of retry attempts per ticker.
         delay (int): Delay between retries in seconds.
         use_cache (bool): Whether to use caching mechanism.
+        max_workers (int): Maximum concurrent fetches (1 fetches sequentially).
         
     RETURNS:
         dict: Dictionary with ticker symbols as keys and data dictionaries as values.
     """
-    results = {}
+    results = dict(iter_multiple_tickers(tickers, start_date, end_date, retries, delay, use_cache, max_workers))
+    return {ticker: results[ticker] for ticker in tickers}
+
+def iter_multiple_tickers(
+    tickers: List[str], 
+    start_date: str, 
+    end_date: str, 
+    retries: int = 3, 
+    delay: int = 1,
+    use_cache: bool = True,
+    max_workers: int = MAX_FETCH_WORKERS
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(ticker, data)`` pairs in completion order.
+    
+    Same fetch strategy and arguments as ``fetch_multiple_tickers``, but each
+    ticker is handed back as soon as it is ready so callers can stream it.
+    """
+    workers = max(1, min(max_workers, len(tickers)))
     
-    for i, ticker in enumerate(tickers):
-        logger.info(f"Processing ticker {i+1}/{len(tickers)}: {ticker}")
-        results[ticker] = fetch_historical_data(ticker, start_date, end_date, retries, delay, use_cache)
-        
-        # Small delay between requests to be respectful to the API
-        if i < len(tickers) - 1:  # Don't delay after the last request
-            time.sleep(0.1)
+    # Seed cold tickers with one multi-symbol download where the provider supports it
+    if use_cache and len(tickers) > 1:
+        prefetch_tickers(tickers, start_date, end_date)
     
-    return results
+    logger.info(f"Processing {len(tickers)} tickers with {workers} workers")
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(in_current_context(fetch_historical_data), ticker, start_date, end_date, retries, delay, use_cache): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                data = future.result()
+            except ValueError as ve:
+                data = _create_error_response(ticker, start_date, end_date, str(ve), 0)
+            yield ticker, data
+    finally:
+        # A consumer that stops early (e.g. a dropped stream) cancels queued fetches
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def prefetch_tickers(tickers: List[str], start_date: str, end_date: str) -> None:
+    """Warm the price store and cache for several tickers with one batch call.
+    
+    Best effort: failures are logged and the tickers stay cold, so the
+    normal per-ticker fetch path still applies afterwards.
+    """
+    try:
+        _prefetch_batch(tickers, start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Batch prefetch failed, falling back to per-ticker fetches: {str(e)}")
+
+def _prefetch_batch(tickers: List[str], start_date: str, end_date: str) -> None:
+    """Fetch every cold ticker in one provider batch call and seed the store and cache.
+    
+    Tickers missing from the batch result are left cold so the per-ticker
+    path can retry them individually.
+    """
+    history_many = getattr(_provider, 'history_many', None)
+    if history_many is None:
+        return
+    
+    cold = []
+    for ticker in dict.fromkeys(t.upper().strip() for t in tickers):
+        ticker, start, end = _normalize_request(ticker, start_date, end_date)
+        if _cache.covers(ticker, start, end):
+            continue
+        if _price_store is not None and not _price_store.missing_ranges(ticker, start, end):
+            continue
+        cold.append(ticker)
+    if len(cold) < 2:
+        return
+    
+    breaker = _get_breaker()
+    if not breaker.allow():
+        return
+    logger.info(f"📦 Batch fetching {len(cold)} tickers from {start} to {end}")
+    _upstream_limiter.acquire()
+    try:
+        with stage('upstream_fetch'):
+            frames = history_many(cold, start, end)
+    except Exception:
+        breaker.record_failure()
+        UPSTREAM_REQUESTS.inc(upstream=breaker.name, outcome='error')
+        raise
+    breaker.record_success()
+    UPSTREAM_REQUESTS.inc(upstream=breaker.name, outcome='ok')
+    for ticker, hist in frames.items():
+        if _price_store is not None:
+            _price_store.ingest(ticker, start, end, hist)
+        series = PriceSeries.from_frame(_prepare_frame(hist))
+        _cache.put(ticker, start, end, series)
+        if _shared_cache is not None:
+            _shared_cache.set(_shared_key(ticker, start, end), series)
 
 def get_recent_data(
     ticker: str, 
@@ -252,25 +771,48 @@ def get_recent_data(
     RETURNS:
         dict: Dictionary containing recent stock data.
     """
-    end_date = datetime.now().strftime('%Y-%m-%d')
-    start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-    
+    start_date, end_date = recent_date_range(days_back)
     return fetch_historical_data(ticker, start_date, end_date, retries, delay, use_cache)
 
+def recent_date_range(days_back: int) -> Tuple[str, str]:
+    """Return ``(start_date, end_date)`` covering the last ``days_back`` days up to today."""
+    now = datetime.now()
+    return (now - timedelta(days=days_back)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
 def clear_cache() -> None:
-    """Clear the data cache."""
-    global _cache, _cache_expiry
-    cleared_items = len(_cache)
-    _cache.clear()
-    _cache_expiry.clear()
-    logger.info(f"🧹 Cache cleared ({cleared_items} items removed)")
+    """Clear the in-process cache and the shared cross-process tier."""
+    cleared_items = _cache.clear()
+    _negative_cache.clear()
+    clear_reduced_cache()
+    shared_items = _shared_cache.clear() if _shared_cache is not None else 0
+    logger.info(f"🧹 Cache cleared ({cleared_items} local, {shared_items} shared items removed)")
 
 def get_cache_info() -> Dict[str, Any]:
-    """Get information about the current cache state."""
-    valid_items = sum(1 for key in _cache.keys() if _is_cache_valid(key))
+    """Get information about the current cache state of both tiers."""
+    info = _cache.info()
+    info['cache_duration_seconds'] = CACHE_DURATION
+    info['stale_seconds'] = CACHE_STALE_SECONDS
+    info['shared_cache'] = _shared_cache.info() if _shared_cache is not None else {'enabled': False}
+    info['price_store'] = _get_price_store_info()
+    info['upstream_limiter'] = _upstream_limiter.info()
+    info['warmer'] = get_warmer_info()
+    info['negative_cache'] = _negative_cache.info()
+    info['reduced'] = get_reduced_cache_info()
+    return info
+
+def get_upstream_health() -> Dict[str, Any]:
+    """Return circuit breaker state per upstream provider."""
+    _get_breaker()
+    return {name: breaker.info() for name, breaker in list(_breakers.items())}
+
+def _get_price_store_info() -> Dict[str, Any]:
+    """Summarize the on-disk price store without per-ticker details."""
+    if _price_store is None:
+        return {'enabled': False}
+    info = _price_store.info()
     return {
-        'total_items': len(_cache),
-        'valid_items': valid_items,
-        'expired_items': len(_cache) - valid_items,
-        'cache_duration_seconds': CACHE_DURATION
+        'enabled': True,
+        'root_dir': info['root_dir'],
+        'tickers': info['tickers'],
+        'total_rows': info['total_rows']
     }
\ No newline at end of file
@@ -0,0 +1,36 @@
+import os
+import numpy as np
+import pytest
+
+# Keep tests hermetic: no on-disk tiers, no background threads, no upstream pacing.
+# Set before any test module imports YahooData, which reads them at import time.
+for name, value in {
+    'FINRUS_USE_PRICE_STORE': 'false',
+    'FINRUS_USE_SHARED_CACHE': 'false',
+    'FINRUS_CACHE_WARMER': 'false',
+    'FINRUS_RATE_LIMIT_BACKEND': 'memory',
+    'FINRUS_UPSTREAM_RATE': '1000000',
+    'FINRUS_UPSTREAM_BURST': '1000000'
+}.items():
+    os.environ.setdefault(name, value)
+
+def random_walk(n: int, seed: int = 0, start: float = 100.0, volatility: float = 0.02) -> np.ndarray:
+    """Closing prices of a geometric random walk, rounded to cents like the API serves them."""
+    rng = np.random.default_rng(seed)
+    return np.round(start * np.exp(np.cumsum(rng.normal(0.0003, volatility, n))), 2)
+
+@pytest.fixture
+def synthetic_upstream(tmp_path):
+    """Point YahooData at the deterministic fake provider and a temporary price store."""
+    import YahooData
+    from DataProviders import SyntheticProvider
+    from PriceStore import PriceStore
+
+    previous_provider, previous_store = YahooData._provider, YahooData._price_store
+    YahooData.set_provider(SyntheticProvider())
+    YahooData.set_price_store(PriceStore(str(tmp_path / 'price_store')))
+    YahooData.clear_cache()
+    yield YahooData
+    YahooData.set_provider(previous_provider)
+    YahooData.set_price_store(previous_store)
+    YahooData.clear_cache()
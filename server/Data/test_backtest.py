@@ -0,0 +1,177 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from Backtest import BUY, SELL, build_signals, run_backtest, sma, rsi, equity_metrics
+from conftest import random_walk
+
+NODE_ENGINE = Path(__file__).resolve().parents[1] / 'services' / 'backtesting.js'
+
+# Runs the Node engine on {close, strategyType, params, initialCapital} read from stdin
+NODE_SCRIPT = """
+import BacktestingEngine, { SMAStrategy, RSIStrategy } from %s;
+let input = '';
+process.stdin.on('data', chunk => { input += chunk; });
+process.stdin.on('end', () => {
+  const { close, strategyType, params, initialCapital } = JSON.parse(input);
+  const strategy = strategyType === 'SMA'
+    ? new SMAStrategy(params.shortPeriod, params.longPeriod)
+    : new RSIStrategy(params.period, params.oversold, params.overbought);
+  const bars = close.map((price, i) => ({ date: i, close: price }));
+  process.stdout.write(JSON.stringify(new BacktestingEngine(strategy, bars, initialCapital).run()));
+});
+"""
+
+CASES = [
+    ('SMA', {'shortPeriod': 20, 'longPeriod': 50}),
+    ('SMA', {'shortPeriod': 5, 'longPeriod': 12}),
+    ('RSI', {'period': 14, 'oversold': 30, 'overbought': 70}),
+    ('RSI', {'period': 5, 'oversold': 40, 'overbought': 60})
+]
+
+def reference_backtest(close, strategy_type, params, initial_capital=10000):
+    """Line-by-line port of BacktestingEngine.run with its SMA / RSI strategies."""
+    def window_sma(period, index):
+        total = 0.0
+        for i in range(index - period + 1, index + 1):
+            total += close[i]
+        return total / period
+
+    def signal(index):
+        if strategy_type == 'SMA':
+            short, long_ = params['shortPeriod'], params['longPeriod']
+            if index < long_:
+                return 'HOLD'
+            s, l = window_sma(short, index), window_sma(long_, index)
+            ps, pl = window_sma(short, index - 1), window_sma(long_, index - 1)
+            if ps <= pl and s > l:
+                return 'BUY'
+            if ps >= pl and s < l:
+                return 'SELL'
+            return 'HOLD'
+        period = params['period']
+        if index < period:
+            return 'HOLD'
+        gains = losses = 0.0
+        for i in range(index - period + 1, index + 1):
+            change = close[i] - close[i - 1]
+            if change > 0:
+                gains += change
+            else:
+                losses += abs(change)
+        value = 100.0 if losses / period == 0 else 100 - 100 / (1 + (gains / period) / (losses / period))
+        if value < params['oversold']:
+            return 'BUY'
+        if value > params['overbought']:
+            return 'SELL'
+        return 'HOLD'
+
+    cash, position, trades, equity = float(initial_capital), None, [], [float(initial_capital)]
+
+    def sell(index):
+        quantity, entry = position
+        trades.append({'entry': entry, 'exit': index, 'quantity': quantity, 'profit': quantity * close[index] - quantity * close[entry]})
+        return cash + quantity * close[index]
+
+    for i in range(len(close)):
+        action = signal(i)
+        if action == 'BUY' and position is None:
+            quantity = int(cash // close[i])
+            if quantity > 0:
+                position = (quantity, i)
+                cash -= quantity * close[i]
+        elif action == 'SELL' and position is not None:
+            cash = sell(i)
+            position = None
+        equity.append(cash + (position[0] * close[i] if position else 0.0))
+    if position is not None:
+        cash = sell(len(close) - 1)
+    return {'finalCapital': cash, 'trades': trades, 'equity': equity}
+
+def _series():
+    trending = random_walk(600, seed=3)
+    # Flat stretches make the averages tie exactly and leave RSI windows without losses
+    flat = np.concatenate((np.full(80, 50.0), random_walk(200, seed=4, start=50.0), np.full(60, 61.0), random_walk(200, seed=5, start=61.0)))
+    return {'trending': trending, 'flat': flat, 'volatile': random_walk(400, seed=7, volatility=0.05)}
+
+@pytest.mark.parametrize('strategy_type,params', CASES)
+@pytest.mark.parametrize('name', ['trending', 'flat', 'volatile'])
+def test_matches_reference_engine(name, strategy_type, params):
+    close = _series()[name]
+    expected = reference_backtest(close, strategy_type, params)
+    result = run_backtest(close, build_signals(close, strategy_type, params))
+
+    assert result['finalCapital'] == pytest.approx(expected['finalCapital'], rel=1e-12)
+    assert [(t['entryDate'], t['exitDate'], t['quantity']) for t in result['trades']] == [
+        (t['entry'], t['exit'], t['quantity']) for t in expected['trades']
+    ]
+    np.testing.assert_allclose(result['equity'], expected['equity'], rtol=1e-12)
+    assert result['totalTrades'] == len(expected['trades'])
+    wins = sum(t['profit'] > 0 for t in expected['trades'])
+    assert result['winRate'] == pytest.approx(wins / len(expected['trades']) * 100 if expected['trades'] else 0)
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+@pytest.mark.parametrize('strategy_type,params', CASES)
+def test_matches_node_engine(strategy_type, params):
+    close = np.concatenate([_series()[name] for name in ('flat', 'trending')])
+    script = NODE_SCRIPT % json.dumps(NODE_ENGINE.as_uri())
+    completed = subprocess.run(
+        ['node', '--input-type=module', '-e', script],
+        input=json.dumps({'close': close.tolist(), 'strategyType': strategy_type, 'params': params, 'initialCapital': 10000}),
+        capture_output=True, text=True, timeout=60, check=True
+    )
+    expected = json.loads(completed.stdout)
+    result = run_backtest(close, build_signals(close, strategy_type, params))
+
+    for field in ('finalCapital', 'totalReturn', 'sharpeRatio', 'maxDrawdown', 'winRate'):
+        assert result[field] == pytest.approx(expected[field], rel=1e-9, abs=1e-9), field
+    assert result['totalTrades'] == expected['totalTrades']
+    assert [(t['entryDate'], t['exitDate'], t['quantity']) for t in result['trades']] == [
+        (t['entryDate'], t['exitDate'], t['quantity']) for t in expected['trades']
+    ]
+    np.testing.assert_allclose(result['equity'], expected['equity'], rtol=1e-12)
+
+def test_indicators_match_rolling_definitions():
+    close = random_walk(300, seed=11)
+    expected_sma = np.array([close[i - 19:i + 1].mean() if i >= 19 else np.nan for i in range(len(close))])
+    np.testing.assert_allclose(sma(close, 20), expected_sma, rtol=1e-12)
+
+    changes = np.diff(close)
+    expected_rsi = np.full(len(close), np.nan)
+    for i in range(14, len(close)):
+        window = changes[i - 14:i]
+        gain, loss = window[window > 0].sum() / 14, -window[window < 0].sum() / 14
+        expected_rsi[i] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+    np.testing.assert_allclose(rsi(close, 14), expected_rsi, rtol=1e-9)
+
+def test_open_position_is_closed_on_last_bar():
+    close = np.array([10.0, 11.0, 12.0, 13.0])
+    signals = np.array([BUY, 0, 0, 0], dtype=np.int8)
+    result = run_backtest(close, signals, initial_capital=100)
+    assert result['totalTrades'] == 1
+    assert result['trades'][0]['exitDate'] == 3
+    assert result['finalCapital'] == pytest.approx(100 - 10 * 10 + 10 * 13)
+    # The close-out happens after the last bar is marked, like the Node engine
+    assert result['equity'][-1] == pytest.approx(result['finalCapital'])
+
+def test_sell_without_position_and_unaffordable_buy_are_ignored():
+    close = np.array([500.0, 20.0, 25.0, 30.0])
+    signals = np.array([SELL, BUY, BUY, SELL], dtype=np.int8)
+    result = run_backtest(close, signals, initial_capital=100)
+    assert [(t['entryDate'], t['exitDate'], t['quantity']) for t in result['trades']] == [(1, 3, 5)]
+
+def test_equity_metrics_flat_curve():
+    assert equity_metrics(np.full(10, 1000.0)) == {'sharpeRatio': 0, 'maxDrawdown': 0}
+
+def test_build_signals_rejects_bad_specs():
+    close = random_walk(100)
+    with pytest.raises(ValueError):
+        build_signals(close, 'MACD')
+    with pytest.raises(ValueError):
+        build_signals(close, 'SMA', {'shortPeriod': 0})
+    with pytest.raises(ValueError):
+        build_signals(close, 'RSI', {'period': 'abc'})
@@ -0,0 +1,25 @@
+import pytest
+
+from BatchBacktest import BatchBacktestManager, main
+
+BODY = {'tickers': ['AAA', 'BBB'], 'strategyType': 'SMA', 'startDate': '2024-01-01', 'endDate': '2024-06-01'}
+
+@pytest.mark.parametrize('capital', [0, -100, float('nan')])
+def test_submit_rejects_non_positive_capital(capital):
+    manager = BatchBacktestManager()
+    with pytest.raises(ValueError, match='initialCapital'):
+        manager.submit(['AAA'], 'SMA', None, '2024-01-01', '2024-06-01', capital, background=False)
+    assert manager.list_jobs() == []
+
+def test_cli_rejects_non_positive_capital():
+    with pytest.raises(SystemExit):
+        main(['--tickers', 'AAA', '--strategy', 'SMA', '--start', '2024-01-01', '--end', '2024-06-01', '--capital', '0'])
+
+@pytest.mark.parametrize('capital,message', [(0, 'positive'), (-5, 'positive'), ('abc', 'number')])
+def test_api_rejects_bad_capital(capital, message):
+    from HistoricalDataAPI import app, batch_manager
+    before = len(batch_manager.list_jobs())
+    response = app.test_client().post('/api/backtest/batch', json=dict(BODY, initialCapital=capital))
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+    assert len(batch_manager.list_jobs()) == before
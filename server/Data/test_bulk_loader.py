@@ -0,0 +1,113 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from BulkLoader import PriceTarget, SqliteTarget, load_prices, main, plan_ranges, read_symbols, series_rows
+from PriceSeries import PriceSeries
+
+@pytest.fixture
+def target(tmp_path):
+    target = SqliteTarget(str(tmp_path / 'prices.sqlite'))
+    target.ensure_schema()
+    yield target
+    target.close()
+
+def stored(target, symbol):
+    return target.conn.execute(
+        'SELECT date, open, high, low, close, volume FROM historical_prices WHERE symbol = ? ORDER BY date', (symbol,)
+    ).fetchall()
+
+def test_price_target_is_abstract():
+    with pytest.raises(TypeError):
+        PriceTarget(None)
+
+def test_upsert_skips_unchanged_rows(target):
+    rows = [('AAA', '2024-01-02', 1.0, 2.0, 0.5, 1.5, 100), ('AAA', '2024-01-03', 1.5, 2.5, 1.0, 2.0, None)]
+    target.upsert_prices(rows)
+    target.commit()
+    before = target.conn.total_changes
+    target.upsert_prices(rows)
+    target.commit()
+    assert target.conn.total_changes == before
+
+    target.upsert_prices([('AAA', '2024-01-03', 1.5, 2.5, 1.0, 2.25, 120)])
+    target.commit()
+    assert target.conn.total_changes == before + 1
+    assert stored(target, 'AAA') == [('2024-01-02', 1.0, 2.0, 0.5, 1.5, 100), ('2024-01-03', 1.5, 2.5, 1.0, 2.25, 120)]
+
+def test_high_water_marks(target):
+    target.upsert_prices([('OLD', '2023-05-01', 1, 1, 1, 1, 1), ('OLD', '2023-06-01', 1, 1, 1, 1, 1)])
+    target.set_high_water_marks([('NEW', '2024-02-01', 10)])
+    target.commit()
+    target.set_high_water_marks([('NEW', '2024-03-01', 5)])
+    target.commit()
+    # Rows loaded by other tools fall back to MAX(date)
+    assert target.high_water_marks(['NEW', 'OLD', 'NONE']) == {'NEW': '2024-03-01', 'OLD': '2023-06-01'}
+    assert target.conn.execute("SELECT rows_loaded FROM historical_prices_sync WHERE symbol = 'NEW'").fetchone() == (15,)
+
+def test_rollback_discards_chunk(target):
+    target.upsert_prices([('AAA', '2024-01-02', 1, 1, 1, 1, 1)])
+    target.set_high_water_marks([('AAA', '2024-01-02', 1)])
+    target.rollback()
+    assert stored(target, 'AAA') == [] and target.high_water_marks(['AAA']) == {}
+
+def test_plan_ranges_groups_by_resume_date():
+    marks = {'A': '2024-01-31', 'B': '2024-01-31', 'C': '2024-02-29'}
+    groups = plan_ranges(['A', 'B', 'C', 'D'], marks, '2020-01-01', '2024-03-01')
+    assert groups == {'2024-02-01': ['A', 'B'], '2020-01-01': ['D']}
+    assert plan_ranges(['A', 'D'], marks, '2020-01-01', '2024-03-01', full=True) == {'2020-01-01': ['A', 'D']}
+    assert plan_ranges(['A'], marks, '2024-02-15', '2024-03-01') == {'2024-02-15': ['A']}
+
+def test_series_rows_keeps_four_decimals_and_drops_gaps():
+    dates = pd.bdate_range('2024-01-01', periods=3).values.astype('datetime64[ns]')
+    series = PriceSeries(dates, {
+        'Open': [1.234567, np.nan, 3.0], 'High': [2.0, 2.0, 3.5], 'Low': [1.0, 1.0, 2.5],
+        'Close': [1.98766, 1.5, 3.123449], 'Volume': [100, 200, 300]
+    })
+    assert series_rows('AAA', series) == [
+        ('AAA', '2024-01-01', 1.2346, 2.0, 1.0, 1.9877, 100),
+        ('AAA', '2024-01-03', 3.0, 3.5, 2.5, 3.1234, 300)
+    ]
+
+def test_load_and_sync(synthetic_upstream, target):
+    symbols = ['AAA', 'BBB', 'CCC']
+    first = load_prices(target, symbols, '2024-01-01', '2024-03-01', batch_rows=50, chunk_symbols=2)
+    assert first['loaded'] == 3 and not first['failed']
+    weekdays = len(pd.bdate_range('2024-01-01', '2024-02-29'))
+    assert first['rows'] == 3 * weekdays
+
+    # Prices keep the provider's precision up to the column's 4 decimals
+    raw = synthetic_upstream._provider.history('AAA', '2024-01-01', '2024-03-01')
+    rows = stored(target, 'AAA')
+    np.testing.assert_allclose([row[4] for row in rows], np.round(raw['Close'].to_numpy(), 4))
+    assert any(round(row[4], 2) != row[4] for row in rows)
+
+    again = load_prices(target, symbols, '2024-01-01', '2024-03-01')
+    assert again['up_to_date'] == 3 and again['rows'] == 0
+
+    synced = load_prices(target, symbols + ['DDD'], '2024-01-01', '2024-03-15')
+    assert synced['rows'] == 3 * len(pd.bdate_range('2024-03-01', '2024-03-14')) + len(pd.bdate_range('2024-01-01', '2024-03-14'))
+    assert target.high_water_marks(symbols) == {symbol: '2024-03-14' for symbol in symbols}
+
+    before = target.conn.total_changes
+    reloaded = load_prices(target, ['AAA'], '2024-01-01', '2024-03-15', full=True)
+    assert reloaded['rows'] == len(rows) + len(pd.bdate_range('2024-03-01', '2024-03-14'))
+    # Identical bars are skipped by the upsert; only the sync row changes
+    assert target.conn.total_changes - before == 1
+
+def test_read_symbols(tmp_path, monkeypatch):
+    path = tmp_path / 'symbols.txt'
+    path.write_text('aapl  # Apple\n\nmsft\nAAPL\n')
+    assert read_symbols('spy, qqq', str(path)) == ['SPY', 'QQQ', 'AAPL', 'MSFT']
+    monkeypatch.setenv('FINRUS_WARM_WATCHLIST', 'iwm,dia')
+    assert read_symbols(None, None) == ['IWM', 'DIA']
+
+def test_main_sqlite(synthetic_upstream, tmp_path):
+    path = str(tmp_path / 'cli.sqlite')
+    assert main(['--tickers', 'AAA,BBB', '--sqlite', path, '--start', '2024-01-01', '--end', '2024-02-01']) == 0
+    count = sqlite3.connect(path).execute('SELECT COUNT(*) FROM historical_prices').fetchone()[0]
+    assert count == 2 * len(pd.bdate_range('2024-01-01', '2024-01-31'))
+    with pytest.raises(SystemExit):
+        main(['--tickers', 'TOOLONGSYMBOL', '--sqlite', path])
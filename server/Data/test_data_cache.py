@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import DataCache as data_cache
+from DataCache import DataCache, RangeCache, SingleFlight
+from PriceSeries import PriceSeries
+
+class FakeClock:
+    """Stands in for the ``time`` module so TTLs can be stepped through."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(data_cache, 'time', fake)
+    return fake
+
+def bars(start: str, end: str, offset: float = 0.0) -> PriceSeries:
+    """Weekday bars over ``[start, end)`` whose close encodes the date, so slices are checkable."""
+    dates = pd.bdate_range(start, end, inclusive='left').values.astype('datetime64[ns]')
+    days = dates.astype('datetime64[D]').astype(np.int64).astype(float)
+    return PriceSeries(dates, {'Close': days + offset})
+
+def test_lru_eviction_keeps_budget(clock):
+    cache = DataCache(max_bytes=300, ttl_seconds=60)
+    for key in 'abc':
+        cache.set(key, key, size=100)
+    cache.get('a')
+    cache.set('d', 'd', size=100)
+    assert cache.peek('b') is None
+    assert [cache.peek(k) for k in 'acd'] == ['a', 'c', 'd']
+    assert cache.info()['current_bytes'] == 300 and cache.info()['evictions'] == 1
+
+def test_ttl_and_stale_window(clock):
+    cache = DataCache(max_bytes=1000, ttl_seconds=10, stale_seconds=5)
+    cache.set('k', 'v', size=1)
+    clock.advance(9)
+    assert cache.lookup('k') == ('v', pytest.approx(1))
+    clock.advance(3)
+    assert cache.get('k') is None
+    assert cache.lookup('k') == ('v', pytest.approx(-2))
+    clock.advance(3)
+    assert cache.lookup('k') == (None, 0.0)
+
+def test_per_entry_ttl_is_capped(clock):
+    cache = DataCache(max_bytes=1000, ttl_seconds=10)
+    cache.set('short', 1, size=1, ttl_seconds=3)
+    cache.set('long', 1, size=1, ttl_seconds=30)
+    assert cache.remaining_ttl('short') == pytest.approx(3)
+    assert cache.remaining_ttl('long') == pytest.approx(10)
+
+def test_single_flight_runs_loader_once():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', loader)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', loader))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight.deduplicated < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(results) == [('value', False)] + [('value', True)] * 3
+
+def test_sub_range_is_served_by_slicing(clock):
+    cache = RangeCache(max_bytes=1 << 20, ttl_seconds=60)
+    full = bars('2024-01-01', '2024-07-01')
+    cache.put('AAA', '2024-01-01', '2024-07-01', full)
+    part = cache.get('AAA', '2024-02-05', '2024-03-04')
+    direct = full.slice('2024-02-05', '2024-03-04')
+    np.testing.assert_array_equal(part.dates, direct.dates)
+    np.testing.assert_array_equal(part.columns['Close'], direct.columns['Close'])
+    assert np.shares_memory(part.columns['Close'], full.columns['Close'])
+    assert cache.info()['range_hits'] == 1
+    assert cache.get('AAA', '2023-12-01', '2024-02-01') is None
+    assert cache.get('BBB', '2024-02-05', '2024-03-04') is None
+
+def test_overlapping_puts_merge_into_one_interval(clock):
+    cache = RangeCache(max_bytes=1 << 20, ttl_seconds=60)
+    cache.put('AAA', '2024-01-01', '2024-03-01', bars('2024-01-01', '2024-03-01'))
+    cache.put('AAA', '2024-02-01', '2024-05-01', bars('2024-02-01', '2024-05-01', offset=0.5))
+    merged = cache.get('AAA', '2024-01-01', '2024-05-01')
+    expected = bars('2024-01-01', '2024-05-01')
+    np.testing.assert_array_equal(merged.dates, expected.dates)
+    # The newer put wins where the two overlap
+    newer = merged.slice('2024-02-01', '2024-05-01').columns['Close']
+    np.testing.assert_array_equal(newer, bars('2024-02-01', '2024-05-01', offset=0.5).columns['Close'])
+    np.testing.assert_array_equal(merged.slice('2024-01-01', '2024-02-01').columns['Close'], bars('2024-01-01', '2024-02-01').columns['Close'])
+    assert cache.info()['total_items'] == 1
+
+def test_merge_keeps_oldest_contributing_expiry(clock):
+    cache = RangeCache(max_bytes=1 << 20, ttl_seconds=10)
+    cache.put('AAA', '2024-01-01', '2024-03-01', bars('2024-01-01', '2024-03-01'))
+    clock.advance(4)
+    cache.put('AAA', '2024-02-01', '2024-04-01', bars('2024-02-01', '2024-04-01'))
+    assert cache.remaining_ttl('AAA', '2024-01-01', '2024-04-01') == pytest.approx(6)
+    # A put covering the whole cached interval replaces it, so it is fresh again
+    cache.put('AAA', '2023-12-01', '2024-05-01', bars('2023-12-01', '2024-05-01'))
+    assert cache.remaining_ttl('AAA', '2024-01-01', '2024-04-01') == pytest.approx(10)
+
+def test_get_or_load_honours_loader_ttl(clock):
+    cache = RangeCache(max_bytes=1 << 20, ttl_seconds=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return bars('2024-01-01', '2024-02-01'), 15.0
+
+    first, from_cache = cache.get_or_load('AAA', '2024-01-01', '2024-02-01', loader)
+    assert not from_cache and len(first) > 0
+    again, from_cache = cache.get_or_load('AAA', '2024-01-08', '2024-01-20', loader)
+    assert from_cache and len(calls) == 1
+    assert cache.remaining_ttl('AAA', '2024-01-01', '2024-02-01') == pytest.approx(15)
+
+def test_empty_loads_are_not_cached(clock):
+    cache = RangeCache(max_bytes=1 << 20, ttl_seconds=60)
+    empty = bars('2024-01-06', '2024-01-08')
+    assert empty.empty
+    cache.get_or_load('AAA', '2024-01-06', '2024-01-08', lambda: (empty, None))
+    assert not cache.covers('AAA', '2024-01-06', '2024-01-08')
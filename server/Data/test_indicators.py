@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators import INDICATORS, IndicatorResult, compute_indicator, parse_indicator_specs
+from PriceSeries import PriceSeries
+from conftest import random_walk
+
+SPECS = 'sma:20,ema:12,rsi:14,macd:12:26:9,bbands:20:2,atr:14'
+
+def ohlc_series(n: int = 400, seed: int = 0) -> PriceSeries:
+    close = random_walk(n, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    spread = np.abs(rng.normal(0, 0.01, n))
+    dates = pd.bdate_range('2022-01-03', periods=n).values.astype('datetime64[ns]')
+    return PriceSeries(dates, {
+        'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread), 'Close': close,
+        'Volume': rng.integers(1000, 10000, n)
+    })
+
+def head(series: PriceSeries, n: int) -> PriceSeries:
+    return PriceSeries(series.dates[:n], {name: values[:n] for name, values in series.columns.items()})
+
+@pytest.mark.parametrize('spec', parse_indicator_specs(SPECS), ids=lambda spec: spec.key)
+@pytest.mark.parametrize('splits', [[1, 2, 3], [5, 40], [25, 26, 27, 200], [100, 399]])
+def test_incremental_matches_full(spec, splits):
+    series = ohlc_series()
+    full, how = compute_indicator(spec, series)
+    assert how == 'full'
+
+    result = None
+    for end in splits + [len(series)]:
+        result, how = compute_indicator(spec, head(series, end), result)
+        assert how == ('full' if end == splits[0] else 'incremental')
+    assert list(result.values.columns) == list(full.values.columns)
+    for name in full.values.columns:
+        np.testing.assert_allclose(result.values.columns[name], full.values.columns[name], rtol=1e-10, atol=1e-12, equal_nan=True)
+
+def test_reference_definitions():
+    series = ohlc_series()
+    close = pd.Series(series.columns['Close'])
+    specs = {spec.key: compute_indicator(spec, series)[0].values.columns for spec in parse_indicator_specs(SPECS)}
+    np.testing.assert_allclose(specs['sma_20']['sma'], close.rolling(20).mean(), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(specs['bbands_20_2']['middle'], close.rolling(20).mean(), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(specs['bbands_20_2']['upper'], close.rolling(20).mean() + 2 * close.rolling(20).std(ddof=0), rtol=1e-10, equal_nan=True)
+
+    # EMA seeded with the SMA of the first 12 closes, then y = y + alpha * (x - y)
+    expected = np.full(len(close), np.nan)
+    expected[11] = close[:12].mean()
+    for i in range(12, len(close)):
+        expected[i] = expected[i - 1] + 2 / 13 * (close[i] - expected[i - 1])
+    np.testing.assert_allclose(specs['ema_12']['ema'], expected, rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(specs['macd_12_26_9']['histogram'], specs['macd_12_26_9']['macd'] - specs['macd_12_26_9']['signal'], equal_nan=True)
+
+    rsi = specs['rsi_14']['rsi']
+    assert np.isnan(rsi[:14]).all() and not np.isnan(rsi[14:]).any()
+    assert ((rsi[14:] >= 0) & (rsi[14:] <= 100)).all()
+
+def test_revised_history_forces_full_recompute():
+    spec = parse_indicator_specs('ema:10')[0]
+    series = ohlc_series()
+    previous, _ = compute_indicator(spec, head(series, 200))
+    revised_close = series.columns['Close'].copy()
+    revised_close[50] *= 0.5  # e.g. a split adjustment deep in the history
+    revised = PriceSeries(series.dates, dict(series.columns, Close=revised_close))
+    result, how = compute_indicator(spec, revised, previous)
+    assert how == 'full'
+    np.testing.assert_allclose(result.values.columns['ema'], compute_indicator(spec, revised)[0].values.columns['ema'], equal_nan=True)
+
+def test_unchanged_series_is_reused():
+    spec = parse_indicator_specs('sma:5')[0]
+    series = ohlc_series(50)
+    previous, _ = compute_indicator(spec, series)
+    assert compute_indicator(spec, series, previous) == (previous, 'cached')
+    assert not IndicatorResult(previous.values, previous.close, None).prefix_of(head(ohlc_series(50, seed=9), 10))
+
+def test_parse_indicator_specs():
+    specs = parse_indicator_specs('SMA:10, rsi, macd::30, sma:10')
+    assert [spec.key for spec in specs] == ['sma_10', 'rsi_14', 'macd_12_30_9']
+    for bad in ['', 'foo', 'sma:0', 'sma:abc', 'macd:30:12', 'sma:1:2', f'sma:{10 ** 6}']:
+        with pytest.raises(ValueError):
+            parse_indicator_specs(bad)
+    assert set(INDICATORS) == {'sma', 'ema', 'rsi', 'macd', 'bbands', 'atr'}
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import ParameterSweep
+from Backtest import build_signals, run_backtest
+from ParameterSweep import expand_grid, run_sweep
+from conftest import random_walk
+
+GRIDS = [
+    ('SMA', {'shortPeriod': {'start': 5, 'stop': 30, 'step': 5}, 'longPeriod': [20, 40, 60, 80]}),
+    ('RSI', {'period': [7, 14], 'oversold': {'start': 20, 'stop': 35, 'step': 5}, 'overbought': [65, 70, 75]})
+]
+
+def by_params(results):
+    return {tuple(sorted(row['params'].items())): row for row in results}
+
+def metrics(row):
+    return {name: value for name, value in row.items() if name not in ('rank', 'params')}
+
+@pytest.mark.parametrize('strategy_type,ranges', GRIDS, ids=[grid[0] for grid in GRIDS])
+def test_sweep_matches_single_backtests(strategy_type, ranges):
+    close = random_walk(500, seed=4)
+    combos = expand_grid(strategy_type, ranges)
+    sweep = run_sweep(close, strategy_type, ranges, limit=len(combos), workers=1)
+    assert sweep['combinations'] == len(sweep['results']) == len(combos)
+    rows = by_params(sweep['results'])
+    for combo in combos:
+        expected = run_backtest(close, build_signals(close, strategy_type, combo), 10000, detail=False)
+        actual = rows[tuple(sorted(combo.items()))]
+        for name, value in expected.items():
+            assert actual[name] == pytest.approx(value, nan_ok=True), (combo, name)
+
+def test_parallel_sweep_matches_serial(monkeypatch):
+    monkeypatch.setattr(ParameterSweep, 'MAX_SWEEP_WORKERS', 2)
+    close = random_walk(400, seed=8)
+    ranges = {'shortPeriod': {'start': 2, 'stop': 40, 'step': 2}, 'longPeriod': {'start': 30, 'stop': 90, 'step': 10}}
+    serial = run_sweep(close, 'SMA', ranges, limit=1000, workers=1)
+    parallel = run_sweep(close, 'SMA', ranges, limit=1000, workers=2)
+    assert parallel['workers'] == 2 and serial['combinations'] >= ParameterSweep.MIN_PARALLEL_COMBINATIONS
+    expected, actual = by_params(serial['results']), by_params(parallel['results'])
+    assert actual.keys() == expected.keys()
+    for key, row in expected.items():
+        assert metrics(actual[key]) == pytest.approx(metrics(row), nan_ok=True), key
+
+def test_ranking_and_validation():
+    close = random_walk(300, seed=1)
+    result = run_sweep(close, 'rsi', {'period': [7, 14]}, sort_by='maxDrawdown', limit=1)
+    assert result['strategyType'] == 'RSI' and len(result['results']) == 1 and result['results'][0]['rank'] == 1
+    with pytest.raises(ValueError):
+        run_sweep(close, 'SMA', {}, sort_by='nope')
+    with pytest.raises(ValueError):
+        expand_grid('SMA', {'shortPeriod': [50], 'longPeriod': [20]})
+    with pytest.raises(ValueError):
+        expand_grid('SMA', {'window': [5]})
@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceSeries import PriceSeries
+from WireFormats import build_body, decode_binary, encode_payload
+from conftest import random_walk
+
+def make_frame(start='2024-01-01', periods=30, seed=0) -> pd.DataFrame:
+    close = random_walk(periods, seed=seed)
+    index = pd.bdate_range(start, periods=periods, name='Date').as_unit('ns')
+    frame = pd.DataFrame({
+        'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+        'Volume': np.arange(periods, dtype=np.int64) * 1000 + 1
+    }, index=index)
+    frame.attrs['fetched_at'] = '2024-03-01 12:00:00'
+    return frame
+
+def test_frame_round_trip():
+    frame = make_frame()
+    series = PriceSeries.from_frame(frame)
+    pd.testing.assert_frame_equal(series.to_frame(), frame, check_freq=False)
+    assert series.to_frame().attrs == frame.attrs
+    assert series.columns['Volume'].dtype == np.int64
+
+def test_bytes_round_trip():
+    series = PriceSeries.from_frame(make_frame())
+    restored = PriceSeries.from_bytes(series.to_bytes())
+    np.testing.assert_array_equal(restored.dates, series.dates)
+    for name in series.columns:
+        np.testing.assert_array_equal(restored.columns[name], series.columns[name])
+        assert restored.columns[name].dtype == series.columns[name].dtype
+    assert dict(restored.attrs) == dict(series.attrs)
+    assert restored.content_hash() == series.content_hash()
+
+def test_records_match_pandas_records():
+    frame = make_frame(periods=5)
+    series = PriceSeries.from_frame(frame)
+    expected = frame.reset_index()
+    expected['Date'] = expected['Date'].dt.strftime('%Y-%m-%d')
+    assert series.records() == expected.to_dict('records')
+    assert series.column_lists() == {name: [row[name] for row in series.records()] for name in ['Date'] + list(frame.columns)}
+
+def test_slice_is_half_open_view():
+    series = PriceSeries.from_frame(make_frame(periods=20))
+    part = series.slice('2024-01-03', '2024-01-10')
+    assert part.date_strings() == ['2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09']
+    assert np.shares_memory(part.columns['Close'], series.columns['Close'])
+    assert series.slice('2000-01-01', '2100-01-01') is series
+    with pytest.raises(ValueError):
+        part.columns['Close'][0] = 1.0
+
+def test_merge_prefers_newer_bars():
+    older = PriceSeries.from_frame(make_frame('2024-01-01', 10, seed=1))
+    newer_frame = make_frame('2024-01-08', 10, seed=2)
+    newer_frame.attrs['fetched_at'] = '2024-03-02 12:00:00'
+    merged = older.merge(PriceSeries.from_frame(newer_frame))
+    assert merged.first_date() == '2024-01-01'
+    assert merged.last_date() == newer_frame.index[-1].strftime('%Y-%m-%d')
+    overlap = merged.slice('2024-01-08', '2024-01-13')
+    np.testing.assert_array_equal(overlap.columns['Close'], newer_frame['Close'].to_numpy()[:5])
+    assert merged.attrs['fetched_at'] == '2024-03-02 12:00:00'
+
+def test_content_hash_ignores_fetch_time_but_not_values():
+    frame = make_frame()
+    refetched = frame.copy()
+    refetched.attrs['fetched_at'] = '2024-03-05 09:30:00'
+    revised = frame.copy()
+    revised.iloc[3, revised.columns.get_loc('Close')] += 0.01
+    series = PriceSeries.from_frame(frame)
+    assert PriceSeries.from_frame(refetched).content_hash() == series.content_hash()
+    assert PriceSeries.from_frame(revised).content_hash() != series.content_hash()
+    assert PriceSeries.from_frame(refetched).cache_key() != series.cache_key()
+
+@pytest.mark.parametrize('fmt', ['json', 'columnar'])
+def test_json_formats_carry_the_same_rows(fmt):
+    series = PriceSeries.from_frame(make_frame())
+    body, _ = build_body(fmt, 'TEST', series, {'data_points': len(series)})
+    payload = json.loads(body)
+    assert payload['ticker'] == 'TEST' and payload['success'] is True
+    rows = payload['data']
+    if fmt == 'columnar':
+        assert payload['format'] == 'columnar'
+        rows = [dict(zip(rows, values)) for values in zip(*rows.values())]
+    assert rows == series.records()
+
+def test_binary_format_round_trip():
+    series = PriceSeries.from_frame(make_frame())
+    body, _ = build_body('binary', 'TEST', series, {'data_points': len(series)})
+    envelope, columns = decode_binary(body)
+    assert envelope['ticker'] == 'TEST' and envelope['metadata'] == {'data_points': len(series)}
+    np.testing.assert_array_equal(columns['Date'], series.dates.astype('datetime64[D]'))
+    for name, values in series.columns.items():
+        np.testing.assert_array_equal(columns[name], values)
+
+def test_compressed_body_decompresses_to_plain_body():
+    import gzip
+    series = PriceSeries.from_frame(make_frame(periods=400))
+    plain, _ = build_body('json', 'TEST', series, {})
+    compressed, headers = build_body('json', 'TEST', series, {}, encoding='gzip')
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed) == plain
+
+def test_arrow_format_round_trip():
+    pa = pytest.importorskip('pyarrow')
+    series = PriceSeries.from_frame(make_frame())
+    table = pa.ipc.open_stream(encode_payload('arrow', 'TEST', series)).read_all()
+    assert table.column_names == ['Date'] + series.column_names
+    np.testing.assert_array_equal(table.column('Close').to_numpy(), series.columns['Close'])
+    assert [d.isoformat() for d in table.column('Date').to_pylist()] == series.date_strings()
@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceStore import PriceStore
+
+def bars(start: str, end: str) -> pd.DataFrame:
+    dates = pd.bdate_range(start, end, inclusive='left').as_unit('ns')
+    days = dates.values.astype('datetime64[D]').astype(np.int64).astype(float)
+    return pd.DataFrame({'Open': days, 'Close': days + 0.5, 'Volume': days.astype(np.int64) * 10}, index=pd.DatetimeIndex(dates, name='Date'))
+
+class Upstream:
+    """Records every range the store asks for."""
+
+    def __init__(self, holidays=(), listed='1990-01-01', delisted='2100-01-01'):
+        self.calls = []
+        self.holidays = set(holidays)
+        self.listed, self.delisted = listed, delisted
+
+    def __call__(self, start: str, end: str) -> pd.DataFrame:
+        self.calls.append((start, end))
+        frame = bars(start, end)
+        dates = frame.index.strftime('%Y-%m-%d')
+        return frame[(dates >= self.listed) & (dates < self.delisted) & ~dates.isin(self.holidays)]
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'store'))
+
+def test_only_gaps_are_fetched(store):
+    upstream = Upstream()
+    first = store.read('aaa', '2024-02-01', '2024-03-01', upstream)
+    pd.testing.assert_frame_equal(first, bars('2024-02-01', '2024-03-01'), check_freq=False)
+
+    wider = store.read('AAA', '2024-01-01', '2024-04-01', upstream)
+    assert upstream.calls == [('2024-02-01', '2024-03-01'), ('2024-01-01', '2024-02-01'), ('2024-03-01', '2024-04-01')]
+    pd.testing.assert_frame_equal(wider, bars('2024-01-01', '2024-04-01'), check_freq=False)
+
+    store.read('AAA', '2024-01-15', '2024-03-15', upstream)
+    assert len(upstream.calls) == 3
+    assert store.missing_ranges('AAA', '2023-12-01', '2024-05-01') == [('2023-12-01', '2024-01-01'), ('2024-04-01', '2024-05-01')]
+
+def test_failed_fetch_is_retried(store):
+    assert store.read('AAA', '2024-01-01', '2024-02-01', lambda start, end: None).empty
+    upstream = Upstream()
+    assert len(store.read('AAA', '2024-01-01', '2024-02-01', upstream)) == len(bars('2024-01-01', '2024-02-01'))
+    assert upstream.calls == [('2024-01-01', '2024-02-01')]
+
+def test_short_empty_gap_is_covered(store):
+    upstream = Upstream(holidays={'2024-07-04', '2024-07-05'})
+    store.read('AAA', '2024-06-03', '2024-07-04', upstream)
+    # Two business days with no bars (a holiday and a closure) are remembered as fetched
+    assert store.read('AAA', '2024-07-04', '2024-07-06', upstream).empty
+    assert store.read('AAA', '2024-07-04', '2024-07-06', upstream).empty
+    assert upstream.calls == [('2024-06-03', '2024-07-04'), ('2024-07-04', '2024-07-06')]
+
+def test_long_empty_gap_is_asked_again(store):
+    calls = []
+    empty = lambda start, end: calls.append((start, end)) or pd.DataFrame()
+    store.read('AAA', '2024-01-01', '2024-02-01', empty)
+    store.read('AAA', '2024-01-01', '2024-02-01', empty)
+    assert len(calls) == 2
+
+def test_range_before_listing_is_not_asked_again(store):
+    upstream = Upstream(listed='2024-03-01')
+    store.read('AAA', '2024-03-01', '2024-04-01', upstream)
+    assert len(store.read('AAA', '2020-01-01', '2024-04-01', upstream)) == len(bars('2024-03-01', '2024-04-01'))
+    assert len(upstream.calls) == 2
+    store.read('AAA', '2020-01-01', '2024-04-01', upstream)
+    store.read('AAA', '2021-06-01', '2024-03-15', upstream)
+    assert len(upstream.calls) == 2
+    assert store.missing_ranges('AAA', '2020-01-01', '2024-04-01') == []
+
+def test_range_after_delisting_is_not_asked_again(store):
+    upstream = Upstream(delisted='2024-02-01')
+    store.read('AAA', '2024-01-01', '2024-02-01', upstream)
+    store.read('AAA', '2024-01-01', '2024-06-01', upstream)
+    store.read('AAA', '2024-01-01', '2024-06-01', upstream)
+    assert upstream.calls == [('2024-01-01', '2024-02-01'), ('2024-02-01', '2024-06-01')]
+
+def test_empty_ranges_expire(tmp_path):
+    store = PriceStore(str(tmp_path / 'store'), empty_range_ttl_seconds=0)
+    upstream = Upstream(listed='2024-03-01')
+    store.read('AAA', '2024-03-01', '2024-04-01', upstream)
+    store.read('AAA', '2024-01-01', '2024-04-01', upstream)
+    store.read('AAA', '2024-01-01', '2024-04-01', upstream)
+    assert upstream.calls[1:] == [('2024-01-01', '2024-03-01')] * 2
+
+def test_ingest_records_empty_range_before_listing(store):
+    store.ingest('AAA', '2024-03-01', '2024-04-01', bars('2024-03-01', '2024-04-01'))
+    store.ingest('AAA', '2023-01-01', '2024-03-01', pd.DataFrame())
+    assert store.missing_ranges('AAA', '2023-01-01', '2024-04-01') == []
+
+def test_store_gap_before_listing_fetches_once(synthetic_upstream, monkeypatch):
+    from DataProviders import SyntheticProvider
+    provider = SyntheticProvider(first_date='2024-03-01')
+    calls = []
+    history = provider.history
+    monkeypatch.setattr(provider, 'history', lambda *args: calls.append(args) or history(*args))
+    slept = []
+    monkeypatch.setattr(synthetic_upstream.time, 'sleep', slept.append)
+    synthetic_upstream.set_provider(provider)
+
+    synthetic_upstream._load_history('AAA', '2024-03-01', '2024-04-01', 3, 1, use_store=True)
+    synthetic_upstream._load_history('AAA', '2000-01-01', '2024-04-01', 3, 1, use_store=True)
+    # The empty pre-listing answer is taken at once, not retried with backoff
+    assert len(calls) == 2 and slept == []
+    hist = synthetic_upstream._load_history('AAA', '2000-01-01', '2024-04-01', 3, 1, use_store=True)
+    assert len(calls) == 2 and len(hist) == len(pd.bdate_range('2024-03-01', '2024-03-31'))
+
+def test_ingest_merges_and_newer_bars_win(store):
+    store.ingest('AAA', '2024-01-01', '2024-02-01', bars('2024-01-01', '2024-02-01'))
+    revised = bars('2024-01-15', '2024-02-15') * 2
+    store.ingest('AAA', '2024-01-15', '2024-02-15', revised)
+    upstream = Upstream()
+    merged = store.read('AAA', '2024-01-01', '2024-02-15', upstream)
+    assert upstream.calls == []
+    assert merged.loc['2024-01-12', 'Close'] == bars('2024-01-12', '2024-01-13')['Close'].iloc[0]
+    pd.testing.assert_frame_equal(merged.loc['2024-01-15':], revised, check_freq=False, check_dtype=False)
+
+def test_generations_are_unique_and_swept(tmp_path):
+    store = PriceStore(str(tmp_path / 'store'), generation_grace_seconds=3600)
+    for month in range(1, 4):
+        store.ingest('AAA', f'2024-0{month}-01', f'2024-0{month + 1}-01', bars(f'2024-0{month}-01', f'2024-0{month + 1}-01'))
+    ticker_dir = tmp_path / 'store' / 'AAA'
+    generations = sorted(name for name in os.listdir(ticker_dir) if name.startswith('g'))
+    # Superseded generations stay readable during the grace period
+    assert len(generations) == 3 and len({name.split('-')[0] for name in generations}) == 3
+
+    store.generation_grace_seconds = 0
+    for name in generations:
+        os.utime(ticker_dir / name, (0, 0))
+    store.ingest('AAA', '2024-04-01', '2024-05-01', bars('2024-04-01', '2024-05-01'))
+    assert len([name for name in os.listdir(ticker_dir) if name.startswith('g')]) == 1
+    assert store.info()['total_rows'] == len(bars('2024-01-01', '2024-05-01'))
+
+def test_clear_keeps_lock_directory(store):
+    store.ingest('AAA', '2024-01-01', '2024-02-01', bars('2024-01-01', '2024-02-01'))
+    store.clear()
+    assert store.info()['tickers'] == 0
+    assert os.listdir(store.root_dir) == ['.locks']
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pytest
+
+import DataProviders
+from DataProviders import TokenBucket
+from RateLimiter import (
+    IDLE_WINDOWS, MemoryRateLimitBackend, RateLimiter, SQLiteRateLimitBackend, create_backend, sliding_window
+)
+
+def replay(times, limit, window):
+    """Run ``sliding_window`` over request times; returns the decisions in order."""
+    state, decisions = None, []
+    for now in times:
+        state, decision = sliding_window(state, limit, window, now)
+        decisions.append(decision)
+    return decisions
+
+def test_burst_is_capped_at_limit():
+    decisions = replay([1000.0 + i * 0.01 for i in range(15)], limit=10, window=60)
+    assert [d.allowed for d in decisions] == [True] * 10 + [False] * 5
+    assert [d.remaining for d in decisions[:10]] == list(range(9, -1, -1))
+    assert decisions[-1].reset_after == pytest.approx(1020.0 - 1000.14)
+
+def test_previous_window_is_weighted_by_overlap():
+    # 10 requests at the end of one window, then a check a quarter into the next:
+    # estimate = 10 * 0.75 + current, so only 2 more fit under a limit of 10
+    times = [59.0 + i * 0.01 for i in range(10)] + [75.0 + i * 0.01 for i in range(4)]
+    decisions = replay(times, limit=10, window=60)
+    assert [d.allowed for d in decisions[10:]] == [True, True, False, False]
+
+def test_state_resets_after_two_idle_windows():
+    decisions = replay([10.0] * 6 + [10.0 + 2 * 60 + 1], limit=5, window=60)
+    assert not decisions[5].allowed
+    assert decisions[6].allowed and decisions[6].remaining == 4
+
+@pytest.mark.parametrize('seed', range(5))
+def test_retry_after_is_exact(seed):
+    """A rejected client retrying after ``retry_after`` is let in, and not a moment sooner."""
+    rng = np.random.default_rng(seed)
+    limit, window = 20, 10.0
+    times = np.cumsum(rng.exponential(0.2, 400))
+    state = None
+    checked = 0
+    for now in times:
+        state, decision = sliding_window(state, limit, window, now)
+        if decision.allowed or decision.retry_after <= 0.01:
+            continue
+        _, early = sliding_window(state, limit, window, now + decision.retry_after - 0.01)
+        _, on_time = sliding_window(state, limit, window, now + decision.retry_after + 1e-6)
+        assert not early.allowed
+        assert on_time.allowed
+        checked += 1
+    assert checked > 10
+
+@pytest.mark.parametrize('seed', range(5))
+def test_never_exceeds_limit_in_a_fixed_window(seed):
+    rng = np.random.default_rng(seed)
+    limit, window = 15, 5.0
+    times = np.sort(rng.uniform(0, 60, 600))
+    decisions = replay(times, limit, window)
+    allowed = times[[d.allowed for d in decisions]]
+    counts = np.bincount((allowed // window).astype(int))
+    assert counts.max() <= limit
+
+def test_sqlite_backend_matches_memory_backend(tmp_path):
+    rng = np.random.default_rng(3)
+    memory = MemoryRateLimitBackend()
+    shared = SQLiteRateLimitBackend(str(tmp_path / 'limits.sqlite'))
+    other_worker = SQLiteRateLimitBackend(str(tmp_path / 'limits.sqlite'))
+    now = 0.0
+    for i in range(300):
+        now += rng.exponential(0.1)
+        key = f'client-{rng.integers(3)}'
+        expected = memory.hit(key, 10, 5.0, now)
+        # Alternate between two backends on the same file, as two workers would
+        actual = (shared if i % 2 else other_worker).hit(key, 10, 5.0, now)
+        assert (actual.allowed, actual.remaining, actual.retry_after) == (expected.allowed, expected.remaining, pytest.approx(expected.retry_after))
+
+def test_sqlite_schema_connection_is_not_cached(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / 'limits.sqlite'))
+    assert getattr(backend._local, 'conn', None) is None
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_sqlite_connection_is_reopened_after_fork(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / 'limits.sqlite'))
+    assert backend.hit('ip', 3, 60.0, 0.0).remaining == 2
+    parent_conn = backend._local.conn
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            decision = backend.hit('ip', 3, 60.0, 1.0)
+            reopened = backend._local.conn is not parent_conn
+            os.write(write_fd, f'{int(reopened)} {decision.remaining}'.encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        reopened, remaining = pipe.read().split()
+    os.waitpid(pid, 0)
+    # The child opened its own handle and still counted against the shared limit
+    assert (reopened, remaining) == ('1', '1')
+    assert backend._local.conn is parent_conn
+    assert backend.hit('ip', 3, 60.0, 2.0).remaining == 0
+
+def test_idle_keys_are_evicted():
+    backend = MemoryRateLimitBackend(max_keys=1000)
+    for i in range(50):
+        backend.hit(f'k{i}', 5, 1.0, 0.0)
+    backend.hit('fresh', 5, 1.0, IDLE_WINDOWS * 1.0 + 0.5)
+    assert backend.info()['tracked_keys'] == 1
+    assert backend.evictions == 50
+
+def test_limiter_counts_and_headers():
+    limiter = RateLimiter(create_backend('memory'), default_limit=2, default_window=60)
+    decisions = [limiter.check('ip') for _ in range(3)]
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert limiter.info()['allowed'] == 2 and limiter.info()['rejected'] == 1
+    headers = decisions[-1].headers()
+    assert headers['X-RateLimit-Remaining'] == '0' and int(headers['Retry-After']) >= 1
+    with pytest.raises(ValueError):
+        create_backend('redis')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_token_bucket_refills_at_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(DataProviders, 'time', clock)
+    bucket = TokenBucket(rate=2.0, capacity=4)
+    assert all(bucket.try_acquire() for _ in range(4))
+    assert not bucket.try_acquire()
+    clock.now += 1.0
+    assert bucket.try_acquire() and bucket.try_acquire() and not bucket.try_acquire()
+    clock.now += 100.0
+    assert bucket.info()['available_tokens'] == 4
+    for _ in range(4):
+        bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceSeries import PriceSeries
+from Resampling import downsample, lttb_indices, normalize_interval, reduce_series, resample_ohlcv, validate_max_points
+from conftest import random_walk
+
+def reference_lttb(x, y, threshold):
+    """The original Largest-Triangle-Three-Buckets loop (Steinarsson, 2013)."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        start, end = int(np.floor(i * every)) + 1, int(np.floor((i + 1) * every)) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) * 0.5
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+def daily_series(n: int = 600, seed: int = 0) -> PriceSeries:
+    close = random_walk(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2021-01-01', periods=n).values.astype('datetime64[ns]')
+    return PriceSeries(dates, {
+        'Open': np.round(close * (1 + rng.normal(0, 0.003, n)), 2),
+        'High': np.round(close * 1.01, 2),
+        'Low': np.round(close * 0.99, 2),
+        'Close': close,
+        'Volume': rng.integers(1000, 100000, n),
+        'Stock Splits': np.where(np.arange(n) % 97 == 5, 2.0, 0.0)
+    }, {'fetched_at': 'test'})
+
+@pytest.mark.parametrize('n,threshold', [(1000, 100), (1000, 3), (101, 50), (5000, 999), (10, 9)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n + threshold)
+    x = np.sort(rng.uniform(0, 1000, n))
+    y = np.cumsum(rng.normal(size=n))
+    indices = lttb_indices(x, y, threshold)
+    assert indices.tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+    assert len(indices) == threshold and indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+def test_lttb_keeps_everything_under_threshold():
+    assert lttb_indices(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+def test_downsample_keeps_whole_bars_and_spikes():
+    series = daily_series()
+    close = series.columns['Close'].copy()
+    close[[123, 321]] = [close.max() * 2, close.min() / 2]
+    series = PriceSeries(series.dates, dict(series.columns, Close=close))
+    reduced = downsample(series, 60)
+    assert len(reduced) == 60
+    positions = np.searchsorted(series.dates, reduced.dates)
+    for name, values in series.columns.items():
+        np.testing.assert_array_equal(reduced.columns[name], values[positions])
+    assert 123 in positions and 321 in positions
+
+@pytest.mark.parametrize('interval,period', [('weekly', 'W-SUN'), ('monthly', 'M')])
+def test_resample_matches_pandas(interval, period):
+    series = daily_series()
+    frame = series.to_frame()
+    groups = frame.groupby(frame.index.to_period(period).start_time)
+    expected = pd.DataFrame({
+        'Open': groups['Open'].first(), 'High': groups['High'].max(), 'Low': groups['Low'].min(),
+        'Close': groups['Close'].last(), 'Volume': groups['Volume'].sum(),
+        'Stock Splits': groups['Stock Splits'].agg(lambda s: s[s != 0].prod() if (s != 0).any() else 0.0)
+    })
+    resampled = resample_ohlcv(series, interval)
+    np.testing.assert_array_equal(resampled.dates, expected.index.values.astype('datetime64[ns]'))
+    for name in expected.columns:
+        np.testing.assert_allclose(resampled.columns[name], expected[name].to_numpy(dtype=float), err_msg=name)
+
+def test_weekly_bars_start_on_monday():
+    resampled = resample_ohlcv(daily_series(50), 'weekly')
+    assert (pd.DatetimeIndex(resampled.dates).dayofweek == 0).all()
+
+def test_reduce_series_is_cached_per_source():
+    series = daily_series()
+    first = reduce_series('TEST', series, 'weekly', 40)
+    assert reduce_series('TEST', series, 'weekly', 40) is first
+    assert first.attrs['source_points'] == len(series) and first.attrs['interval'] == 'weekly'
+    assert reduce_series('TEST', series) is series
+
+def test_validation():
+    assert normalize_interval(None) == 'daily'
+    assert normalize_interval('1wk') == 'weekly'
+    with pytest.raises(ValueError):
+        normalize_interval('hourly')
+    with pytest.raises(ValueError):
+        validate_max_points(2)
+    assert validate_max_points(None) is None
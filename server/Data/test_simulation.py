@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import Simulation
+from Simulation import MIN_PARALLEL_PATHS, iter_simulation, run_simulation
+
+def history(n: int = 500, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0.0004, 0.012, n)
+
+def test_seed_reproduces_summary_across_workers(monkeypatch):
+    monkeypatch.setattr(Simulation, 'MAX_SIMULATION_WORKERS', 2)
+    kwargs = dict(paths=MIN_PARALLEL_PATHS, horizon=20, seed=42, chunk_paths=5000)
+    serial = run_simulation(history(), workers=1, **kwargs)
+    parallel = run_simulation(history(), workers=2, **kwargs)
+    assert (serial['workers'], parallel['workers']) == (1, 2)
+    serial.pop('workers'), parallel.pop('workers')
+    assert parallel == serial
+
+def test_same_seed_same_result():
+    first = run_simulation(history(), method='gbm', paths=3000, horizon=10, seed=7, chunk_paths=1000)
+    again = run_simulation(history(), method='gbm', paths=3000, horizon=10, seed=7, chunk_paths=1000)
+    other = run_simulation(history(), method='gbm', paths=3000, horizon=10, seed=8, chunk_paths=1000)
+    assert first == again
+    assert first['terminal_return'] != other['terminal_return']
+
+def test_bootstrap_only_replays_history():
+    returns = np.array([0.01, -0.02, 0.03, 0.0, 0.015])
+    result = run_simulation(returns, paths=500, horizon=1, block_size=1, seed=1)
+    # One-day paths can only end on a historical return
+    edges = result['histogram']['edges']
+    assert edges[0] == pytest.approx(returns.min()) and edges[-1] == pytest.approx(returns.max())
+    assert result['paths'] == 500 and result['block_size'] == 1
+
+def test_progress_then_summary():
+    items = list(iter_simulation(history(), paths=2500, horizon=5, seed=3, chunk_paths=1000))
+    assert [item['type'] for item in items] == ['progress'] * 3 + ['summary']
+    assert [item['paths_done'] for item in items[:-1]] == [1000, 2000, 2500]
+    assert items[-2]['risk'] == items[-1]['risk']
+
+@pytest.mark.parametrize('kwargs', [
+    {'method': 'mc'}, {'paths': 0}, {'horizon': 0}, {'block_size': 0}, {'confidence_levels': [0.4]}
+])
+def test_validation(kwargs):
+    with pytest.raises(ValueError):
+        iter_simulation(history(), **kwargs)
+    with pytest.raises(ValueError):
+        iter_simulation(np.array([0.01, np.nan, 0.02]))
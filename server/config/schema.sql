@@ -65,6 +65,14 @@ CREATE TABLE IF NOT EXISTS historical_prices (
     UNIQUE(symbol, date)
 );
 
+-- Per-symbol high-water marks for the Python bulk loader (Data/BulkLoader.py)
+CREATE TABLE IF NOT EXISTS historical_prices_sync (
+    symbol VARCHAR(10) PRIMARY KEY,
+    last_date DATE NOT NULL,
+    rows_loaded BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_strategies_type ON strategies(type);
 CREATE INDEX IF NOT EXISTS idx_backtest_results_strategy_id ON backtest_results(strategy_id);